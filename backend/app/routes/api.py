@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.encoders import jsonable_encoder
-from typing import Dict, Any, List
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, List, Optional
 import os
+import json
+import time
 from datetime import datetime
 import logging
 import pandas as pd
@@ -16,12 +19,17 @@ from ..models.lotto_models import (
     VisualizationData
 )
 from ..services.data_service import DataService
-from ..services.analysis_service import AnalysisService
+from ..services import analysis_service as analysis_service_module
+from ..services import analysis_state as analysis_state_module
+from ..services import draw_matrix as draw_matrix_module
+from ..services.analysis_service import AnalysisService, COMPREHENSIVE_SECTIONS
 from ..services.prediction_service import PredictionService
+from ..services.analysis_cache import AnalysisResultCache, code_version
 from ..db.session import get_session
 from ..db import models as dbm
 from ..services.match_service import evaluate_matches_for_draw
 from ..utils.slack_notifier import post_to_slack
+from ..utils import metrics
 from sqlalchemy.orm import Session
 import requests
 import importlib
@@ -36,6 +44,101 @@ data_service = DataService()
 analysis_service = AnalysisService()
 prediction_service = PredictionService()
 
+# 종합 분석 data 바이트 캐시 (데이터셋 버전 키, 데이터 파일 변경 시 무효화)
+# 디스크 파일은 분석 코드 버전별로 구분해 응답 형태가 바뀐 배포 후 이전 본문을 쓰지 않는다
+COMPREHENSIVE_SCHEMA_VERSION = code_version(analysis_service_module, analysis_state_module, draw_matrix_module)
+comprehensive_cache = AnalysisResultCache('comprehensive', schema_version=COMPREHENSIVE_SCHEMA_VERSION)
+DataService.add_invalidation_listener(comprehensive_cache.invalidate)
+# fields/exclude로 고른 부분 응답은 조합이 많으므로 메모리에만 보관
+comprehensive_sections_cache = AnalysisResultCache('comprehensive_sections', max_entries=32, persist=False,
+                                                   schema_version=COMPREHENSIVE_SCHEMA_VERSION)
+DataService.add_invalidation_listener(comprehensive_sections_cache.invalidate)
+
+
+def _split_names(value: Optional[str]) -> List[str]:
+    """쉼표 구분 쿼리 값 → 이름 목록"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def _build_comprehensive_data(df: pd.DataFrame, sections: Optional[List[str]] = None,
+                              debug_out: Optional[Dict[str, Any]] = None) -> bytes:
+    """종합 분석 data 객체를 JSON 바이트로 직렬화
+
+    요청마다 달라지는 'debug'(작업별 소요 시간)는 캐시되는 바이트에서 빼고 debug_out에 담는다.
+    """
+    analysis_result = analysis_service.comprehensive_analysis(df, state=data_service.get_analysis_state(df),
+                                                              sections=sections)
+    debug = analysis_result.pop('debug', {})
+    if debug_out is not None:
+        debug_out.update(debug)
+    return JSONResponse(content=jsonable_encoder(analysis_result)).body
+
+
+def _comprehensive_envelope(data: bytes, debug: Dict[str, Any]) -> bytes:
+    """data 바이트 끝에 debug를 붙여 APIResponse(FastAPI 기본 응답)와 같은 JSON 바이트로 감싼다"""
+    head = JSONResponse(content={"success": True, "message": "종합 분석이 완료되었습니다."}).body[:-1]
+    debug_bytes = JSONResponse(content=jsonable_encoder(debug)).body
+    separator = b',' if data != b'{}' else b''
+    return head + b',"data":' + data[:-1] + separator + b'"debug":' + debug_bytes + b'},"error":null}'
+
+
+def get_comprehensive_body(sections: Optional[List[str]] = None) -> bytes:
+    """현재 데이터셋 버전의 종합 분석 응답 바이트 (캐시 우선, 동시 요청은 1회만 계산)
+
+    sections(AnalysisService.resolve_sections 결과)가 전체가 아니면 해당 섹션만 계산한다.
+    'debug'는 이번 요청 기준이다: 계산했으면 작업별 소요 시간, 캐시 적중이면 cache_hit=True와 조회 시간.
+    """
+    started = time.perf_counter()
+    df = data_service.load_data()
+    version = df.attrs.get('dataset_version')
+    if sections is not None and len(sections) == len(COMPREHENSIVE_SECTIONS):
+        sections = None
+    debug: Dict[str, Any] = {}
+    if not version:
+        # 샘플 데이터(파일 없음)는 매번 달라지므로 캐시하지 않음
+        data = _build_comprehensive_data(df, sections, debug)
+    elif sections is None:
+        data = comprehensive_cache.get_or_compute(version, lambda: _build_comprehensive_data(df, None, debug))
+    else:
+        data = comprehensive_sections_cache.get_or_compute(f"{version}|{','.join(sections)}",
+                                                           lambda: _build_comprehensive_data(df, sections, debug))
+    if debug:
+        debug['cache_hit'] = False
+    else:
+        debug = {'cache_hit': True, 'total_ms': (time.perf_counter() - started) * 1000.0}
+    return _comprehensive_envelope(data, debug)
+
+# NDJSON 스트리밍에서 리스트 섹션을 나눠 보내는 한 줄당 최대 항목 수
+STREAM_LIST_CHUNK = 500
+
+# /predict/bulk JSON 응답의 최대 세트 수 (그 이상은 format=binary) - 파이썬 리스트/JSON 인코딩 비용 상한
+BULK_JSON_MAX_SETS = 10000
+
+
+def _ndjson_line(payload: Dict[str, Any]) -> bytes:
+    # JSONResponse.render와 같은 직렬화 옵션
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _iter_comprehensive_ndjson(df: pd.DataFrame, state, sections: Optional[List[str]]):
+    """종합 분석 섹션을 계산되는 대로 한 줄씩 내보내는 NDJSON 제너레이터
+
+    각 줄은 {"section": 이름, "data": 값}. 리스트 섹션은 STREAM_LIST_CHUNK개씩 여러 줄로 나누고
+    "part"(0부터)를 붙인다. 클라이언트는 같은 섹션의 data를 이어 붙이면 된다.
+    계산 중 오류가 나면 {"section": "error", "data": 메시지}를 보내고 끝낸다.
+    """
+    try:
+        for name, value in analysis_service.iter_comprehensive_sections(df, state, sections):
+            if isinstance(value, list) and len(value) > STREAM_LIST_CHUNK:
+                for part, start in enumerate(range(0, len(value), STREAM_LIST_CHUNK)):
+                    yield _ndjson_line({"section": name, "data": value[start:start + STREAM_LIST_CHUNK], "part": part})
+            else:
+                yield _ndjson_line({"section": name, "data": value})
+    except Exception as e:
+        logger.error(f"종합 분석 스트리밍 중 오류: {e}")
+        yield _ndjson_line({"section": "error", "data": str(e)})
+
 @router.get("/health")
 async def health_check():
     """서비스 상태 확인"""
@@ -60,13 +163,14 @@ async def get_data_summary():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/data/collect")
-async def collect_lotto_data(start_draw: int = 1, end_draw: int = None):
-    """실제 로또 데이터 수집"""
+async def collect_lotto_data(start_draw: int = 1, end_draw: int = None, resume: bool = False):
+    """실제 로또 데이터 수집 (resume=true: 저장된 회차는 건너뛰고 이어받기)"""
     try:
         logger.info(f"로또 데이터 수집 시작: {start_draw}회차 ~ {end_draw}회차")
         
-        df = data_service.collect_lotto_data(start_draw, end_draw)
-        data_service.save_data(df)
+        # 수집은 블로킹 I/O이므로 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+        df = await run_in_threadpool(data_service.collect_lotto_data, start_draw, end_draw, resume)
+        await run_in_threadpool(data_service.save_data, df)
         
         summary = data_service.get_data_summary(df)
         
@@ -262,6 +366,9 @@ async def update_latest_data(req: Request, db: Session = Depends(get_session)):
                 )
             except Exception:
                 pass
+
+        # 새 회차 기준 피처/위치별 확률표를 미리 만들어 첫 ML 요청이 모델을 로드하지 않게 한다
+        await run_in_threadpool(prediction_service.prewarm, data_service.load_data())
         
         return APIResponse(
             success=True,
@@ -427,56 +534,132 @@ async def match_supabase_and_notify(db: Session = Depends(get_session)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/analysis/comprehensive")
-async def get_comprehensive_analysis():
-    """종합 분석 결과 조회"""
+async def get_comprehensive_analysis(fields: Optional[str] = None, exclude: Optional[str] = None,
+                                     stream: bool = False):
+    """종합 분석 결과 조회
+
+    - fields/exclude: 쉼표로 구분한 섹션 이름, 지정한 섹션만 계산
+    - stream=true: 섹션이 계산되는 대로 NDJSON(application/x-ndjson)으로 전송 (캐시 미사용)
+    """
+    try:
+        sections = None
+        if fields or exclude:
+            sections = analysis_service.resolve_sections(_split_names(fields), _split_names(exclude))
+        if stream:
+            df = await run_in_threadpool(data_service.load_data)
+            state = await run_in_threadpool(data_service.get_analysis_state, df)
+            return StreamingResponse(_iter_comprehensive_ndjson(df, state, sections),
+                                     media_type="application/x-ndjson")
+        body = await run_in_threadpool(get_comprehensive_body, sections)
+        return Response(content=body, media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"종합 분석 중 오류: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analysis/consecutive-patterns")
+async def get_consecutive_patterns(cursor: Optional[int] = None, limit: int = Query(100, ge=1, le=1000)):
+    """연속 번호 패턴 커서 페이지 (cursor: 이전 페이지의 next_cursor 회차, 그 다음 회차부터 조회)"""
     try:
         df = data_service.load_data()
-        analysis_result = analysis_service.comprehensive_analysis(df)
+        page = await run_in_threadpool(analysis_service.consecutive_patterns_page, df, cursor, limit)
         
         return APIResponse(
             success=True,
-            message="종합 분석이 완료되었습니다.",
-            data=analysis_result
+            message="연속 번호 패턴을 조회했습니다.",
+            data=page
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"종합 분석 중 오류: {e}")
+        logger.error(f"연속 번호 패턴 조회 중 오류: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analysis/draw-series")
+async def get_draw_series(cursor: Optional[int] = None, limit: int = Query(100, ge=1, le=1000)):
+    """회차별 지표(합계/홀수/소수/연속) 시계열 커서 페이지"""
+    try:
+        df = data_service.load_data()
+        page = await run_in_threadpool(analysis_service.draw_series_page, df, cursor, limit)
+        
+        return APIResponse(
+            success=True,
+            message="회차별 지표를 조회했습니다.",
+            data=page
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"회차별 지표 조회 중 오류: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/analysis/frequency")
-async def get_frequency_analysis():
-    """번호별 출현 빈도 분석"""
+async def get_frequency_analysis(start_draw: Optional[int] = None, end_draw: Optional[int] = None,
+                                 window: Optional[int] = Query(None, ge=1)):
+    """번호별 출현 빈도 분석 (start_draw~end_draw 구간, window: 구간 끝에서 최근 N회차)"""
     try:
         df = data_service.load_data()
-        frequency = analysis_service.analyze_frequency(df)
+        frequency = analysis_service.analyze_frequency_range(df, start_draw, end_draw, window)
         
         return APIResponse(
             success=True,
             message="번호별 출현 빈도 분석이 완료되었습니다.",
-            data={"frequency": frequency}
+            data={
+                "frequency": frequency,
+                "draw_range": analysis_service.resolve_draw_range(df, start_draw, end_draw, window)
+            }
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"빈도 분석 중 오류: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/analysis/hot-cold")
-async def get_hot_cold_analysis():
-    """핫/콜드 번호 분석"""
+async def get_hot_cold_analysis(start_draw: Optional[int] = None, end_draw: Optional[int] = None,
+                                window: Optional[int] = Query(None, ge=1)):
+    """핫/콜드 번호 분석 (기본: 최근 HOT_COLD_WINDOW회차, start_draw/end_draw/window로 구간 지정)"""
     try:
         df = data_service.load_data()
-        hot_numbers, cold_numbers = analysis_service.find_hot_cold_numbers(df)
+        if window is None and start_draw is None:
+            window = analysis_service.hot_cold_window
+        hot_numbers, cold_numbers = analysis_service.find_hot_cold_numbers(df, window, start_draw, end_draw)
         
         return APIResponse(
             success=True,
             message="핫/콜드 번호 분석이 완료되었습니다.",
             data={
                 "hot_numbers": hot_numbers,
-                "cold_numbers": cold_numbers
+                "cold_numbers": cold_numbers,
+                "draw_range": analysis_service.resolve_draw_range(df, start_draw, end_draw, window)
             }
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"핫/콜드 분석 중 오류: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/analysis/co-occurrence")
+async def get_co_occurrence_analysis(top_n: int = Query(20, ge=1, le=500), number: Optional[int] = Query(None, ge=1, le=45)):
+    """번호 쌍/3개 조합 동시 출현 분석 (상위 top_n, number 지정 시 해당 번호 포함 조합만)"""
+    try:
+        df = data_service.load_data()
+        state = await run_in_threadpool(data_service.get_analysis_state, df)
+        co_occurrence = analysis_service.analyze_co_occurrence(df, top_n, number, state=state)
+        
+        return APIResponse(
+            success=True,
+            message="동시 출현 분석이 완료되었습니다.",
+            data=co_occurrence
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"동시 출현 분석 중 오류: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # 새로운 세밀한 분석 API 엔드포인트들
 @router.get("/analysis/seasonal")
 async def get_seasonal_analysis():
@@ -715,6 +898,34 @@ async def predict_numbers(req: Request, request: PredictionRequest, db: Session
             pass
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/predict/bulk")
+async def predict_numbers_bulk(num_sets: int = Query(1000, ge=1, le=1000000), seed: Optional[int] = None,
+                               format: str = Query("json", pattern="^(json|binary)$")):
+    """통계 예측 대량 모드 (가중 비복원 일괄 샘플링, 저장/일일 고정 없음)
+
+    format=binary면 num_sets×6 uint8 원시 바이트(application/octet-stream)를 반환한다.
+    JSON은 BULK_JSON_MAX_SETS세트까지만 허용한다.
+    """
+    try:
+        if format == "json" and num_sets > BULK_JSON_MAX_SETS:
+            raise ValueError(f"JSON 응답은 {BULK_JSON_MAX_SETS}세트까지 가능합니다. 더 많으면 format=binary를 사용하세요.")
+        df = data_service.load_data()
+        sets = await run_in_threadpool(prediction_service.bulk_statistical_sets, df, num_sets, seed)
+        if format == "binary":
+            return Response(content=sets.tobytes(), media_type="application/octet-stream",
+                            headers={"X-Set-Shape": f"{sets.shape[0]},{sets.shape[1]}"})
+        
+        return APIResponse(
+            success=True,
+            message=f"{num_sets}세트를 생성했습니다.",
+            data={"num_sets": num_sets, "seed": seed, "sets": sets.tolist()}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"대량 예측 중 오류: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/predict/test")
 async def predict_numbers_test():
     """기본 파라미터로 예측을 수행해 배포 상태를 간편 점검"""
@@ -864,6 +1075,23 @@ async def get_db_conn_info(req: Request):
         info["env_has_database_url"] = bool(os.getenv("DATABASE_URL"))
         return APIResponse(success=False, message="엔진 로드 실패", data=info, error=str(e))
 
+@router.get("/debug/metrics")
+async def get_metrics(req: Request):
+    """프로세스 내 메트릭(작업별 소요 시간, 카운터, 게이지)과 분석/예측 캐시 적중, ML 보정 대기열 현황"""
+    # 운영 보안: DEBUG_TOKEN이 설정되어 있으면 헤더 검증 필요
+    debug_token = os.getenv("DEBUG_TOKEN")
+    if debug_token:
+        provided = req.headers.get("x-debug-token") or req.headers.get("X-Debug-Token")
+        if provided != debug_token:
+            raise HTTPException(status_code=403, detail="forbidden")
+    data = metrics.snapshot()
+    data["analysis_cache"] = {
+        "comprehensive": {"hits": comprehensive_cache.hits, "misses": comprehensive_cache.misses}
+    }
+    data["prediction_cache"] = prediction_service.cache_stats()
+    data["ml_refine"] = prediction_service.refine_stats()
+    return APIResponse(success=True, message="메트릭", data=data)
+
 @router.get("/disclaimer")
 async def get_disclaimer():
     """법적 고지사항"""
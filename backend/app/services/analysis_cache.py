@@ -0,0 +1,129 @@
+"""
+데이터셋 버전별 분석 응답 캐시
+
+분석 결과는 새 회차가 반영될 때만 바뀌므로, 데이터셋 버전(최신 회차:내용 해시)을 키로
+이미 직렬화된 응답 바이트를 보관한다.
+- 같은 버전의 동시 요청은 한 번만 계산한다(single-flight). 나머지는 계산이 끝날 때까지 기다린다.
+- 데이터 파일이 바뀌면 DataService 무효화 콜백으로 메모리 항목을 비운다.
+- 선택적으로 디스크에 저장해, 재시작한 워커도 같은 버전이면 바로 응답한다.
+  파일 이름에 코드 버전(schema_version)을 넣어, 응답 형태가 바뀐 배포 후에는 이전 파일을 쓰지 않는다.
+"""
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from types import ModuleType
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERSIST_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'analysis_cache')
+
+
+def code_version(*modules: ModuleType) -> str:
+    """모듈 소스 파일 내용의 해시 12자리 (응답을 만드는 코드가 바뀌면 달라지는 캐시 스키마 버전)"""
+    digest = hashlib.blake2b(digest_size=6)
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class AnalysisResultCache:
+    """{데이터셋 버전: 직렬화된 응답 bytes} 캐시 (스레드 안전)"""
+
+    def __init__(self, name: str, persist_dir: Optional[str] = None, max_entries: int = 2,
+                 persist: Optional[bool] = None, schema_version: str = ''):
+        self.name = name
+        self.schema_version = schema_version
+        self.max_entries = max_entries
+        # persist=None이면 ANALYSIS_CACHE_PERSIST 환경변수를 따른다
+        if persist is None:
+            persist = os.getenv('ANALYSIS_CACHE_PERSIST', 'true').strip().lower() in ('1', 'true', 'yes', 'y', 'on')
+        self.persist_dir = (persist_dir or os.getenv('ANALYSIS_CACHE_DIR') or DEFAULT_PERSIST_DIR) if persist else None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, version: str) -> str:
+        safe = ''.join(c if c.isalnum() else '_' for c in f'{self.schema_version}_{version}')
+        return os.path.join(self.persist_dir, f'{self.name}_{safe}.json')
+
+    def get(self, version: str) -> Optional[bytes]:
+        """메모리 → 디스크 순으로 조회 (없으면 None)"""
+        with self._lock:
+            body = self._entries.get(version)
+            if body is not None:
+                self._entries.move_to_end(version)
+                return body
+        if self.persist_dir is None:
+            return None
+        try:
+            with open(self._path(version), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        self._remember(version, body)
+        logger.info(f"{self.name} 분석 캐시 디스크 적중: {version}")
+        return body
+
+    def put(self, version: str, body: bytes) -> None:
+        self._remember(version, body)
+        if self.persist_dir is None:
+            return
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            path = self._path(version)
+            tmp = f"{path}.tmp.{os.getpid()}"
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+            # 같은 이름의 이전 버전 파일 정리
+            prefix = f'{self.name}_'
+            for entry in os.listdir(self.persist_dir):
+                if entry.startswith(prefix) and entry.endswith('.json') and os.path.join(self.persist_dir, entry) != path:
+                    try:
+                        os.remove(os.path.join(self.persist_dir, entry))
+                    except OSError:
+                        pass
+        except Exception as e:
+            logger.error(f"{self.name} 분석 캐시 디스크 저장 실패(무시): {e}")
+
+    def _remember(self, version: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[version] = body
+            self._entries.move_to_end(version)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, version: str, build: Callable[[], bytes]) -> bytes:
+        """캐시된 응답 반환, 없으면 build()로 한 번만 계산해 저장"""
+        body = self.get(version)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        with self._lock:
+            flight = self._inflight.setdefault(version, threading.Lock())
+        with flight:
+            # 먼저 계산한 요청이 있으면 그 결과 사용
+            body = self.get(version)
+            if body is not None:
+                self.hits += 1
+                return body
+            self.misses += 1
+            try:
+                body = build()
+                self.put(version, body)
+            finally:
+                with self._lock:
+                    self._inflight.pop(version, None)
+        return body
+
+    def invalidate(self, _filename: Optional[str] = None) -> None:
+        """메모리 항목 비우기 (디스크 파일은 버전 키가 달라 다시 쓰일 때 정리됨)"""
+        with self._lock:
+            self._entries.clear()
@@ -1,14 +1,55 @@
 import os
+import time
+import threading
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple, Any, Optional
 import logging
-from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 import calendar
 
+from .draw_matrix import matrix_for_frame
+from .analysis_state import (
+    AnalysisState, pair_counts_from_matrix, range_ids, triple_counts_from_matrix, top_co_occurrences,
+)
+from ..utils import metrics
+from ..utils.task_graph import TaskGraph
+
 logger = logging.getLogger(__name__)
 
+RANGE_LABELS = ['1-10', '11-20', '21-30', '31-40', '41-45']
+PRIME_NUMBERS = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43]
+
+# 종합 분석 응답 섹션 (응답 키 순서) → 계산 작업 이름 (total_draws는 작업 없음)
+COMPREHENSIVE_SECTIONS = (
+    'total_draws', 'number_frequency', 'hot_numbers', 'cold_numbers', 'odd_even_ratio',
+    'number_range_distribution', 'consecutive_patterns', 'missing_periods', 'missing_period_details',
+    'recent_trends', 'seasonal_analysis', 'monthly_analysis', 'weekly_analysis', 'date_analysis',
+    'sum_analysis', 'gap_analysis', 'prime_analysis', 'ending_analysis', 'statistics',
+)
+_SECTION_TASKS = {'total_draws': None, 'hot_numbers': 'hot_cold', 'cold_numbers': 'hot_cold'}
+
+# 종합 분석 작업 그래프용 스레드 풀 (프로세스당 1개, 첫 사용 시 생성)
+# NumPy 연산 대부분이 GIL을 놓으므로 독립 분석을 동시에 돌리면 벽시계 시간이 줄어든다.
+try:
+    ANALYSIS_WORKERS = max(1, int(os.getenv('ANALYSIS_WORKERS', str(min(4, os.cpu_count() or 1)))))
+except Exception:
+    ANALYSIS_WORKERS = 1
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _analysis_executor() -> Optional[ThreadPoolExecutor]:
+    """종합 분석용 공유 스레드 풀 (ANALYSIS_WORKERS=1이면 None → 호출 스레드에서 순차 실행)"""
+    global _executor
+    if ANALYSIS_WORKERS <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='analysis')
+        return _executor
+
 class AnalysisService:
     """로또 데이터 통계 분석 서비스"""
     
@@ -22,23 +63,61 @@ class AnalysisService:
     
     def analyze_frequency(self, df: pd.DataFrame) -> Dict[int, int]:
         """번호별 출현 빈도 분석"""
-        all_numbers = []
-        for col in self.number_columns:
-            all_numbers.extend(df[col].tolist())
-        
-        # Counter는 키/값에 numpy 타입이 포함될 수 있으므로 모두 파이썬 int로 캐스팅
-        frequency = Counter(all_numbers)
-        return {int(k): int(v) for k, v in frequency.items()}
+        return self._frequency(matrix_for_frame(df))
+    
+    @staticmethod
+    def _frequency(matrix) -> Dict[int, int]:
+        counts = matrix.onehot.sum(axis=0)
+        # 키 순서는 기존 Counter와 동일(첫 등장 순), 값은 파이썬 int로 캐스팅
+        return {int(num): int(counts[num - 1]) for num in matrix.first_seen_order()}
+    
+    def analyze_frequency_range(self, df: pd.DataFrame, start_draw: int = None, end_draw: int = None,
+                                window: int = None) -> Dict[int, int]:
+        """회차 구간 [start_draw, end_draw](끝에서 최대 window회차)의 번호별 출현 빈도
+
+        빈도는 데이터셋 버전당 1회 만드는 누적합 인덱스의 45개 원소 뺄셈으로 구한다.
+        키 순서는 analyze_frequency(구간 DataFrame)와 같다.
+        """
+        return self._frequency_range(matrix_for_frame(df), start_draw, end_draw, window)
+    
+    def _frequency_range(self, matrix, start_draw: int = None, end_draw: int = None,
+                         window: int = None) -> Dict[int, int]:
+        lo, hi = self._resolve_rows(matrix, start_draw, end_draw, window)
+        counts = matrix.range_counts(lo, hi)
+        return {int(num): int(counts[num - 1]) for num in matrix.first_seen_order(rows=slice(lo, hi))}
+    
+    def resolve_draw_range(self, df: pd.DataFrame, start_draw: int = None, end_draw: int = None,
+                           window: int = None) -> Dict[str, Any]:
+        """조회 구간의 실제 시작/끝 회차와 회차 수"""
+        matrix = matrix_for_frame(df)
+        lo, hi = self._resolve_rows(matrix, start_draw, end_draw, window)
+        return {
+            'start_draw': int(matrix.draw_numbers[lo]) if hi > lo else None,
+            'end_draw': int(matrix.draw_numbers[hi - 1]) if hi > lo else None,
+            'draw_count': hi - lo
+        }
+    
+    @staticmethod
+    def _resolve_rows(matrix, start_draw: int = None, end_draw: int = None, window: int = None) -> Tuple[int, int]:
+        if window is not None and window < 0:
+            raise ValueError("window는 0 이상이어야 합니다.")
+        if start_draw is not None and end_draw is not None and start_draw > end_draw:
+            raise ValueError("start_draw는 end_draw보다 클 수 없습니다.")
+        return matrix.row_range(start_draw, end_draw, window)
+    
+    def find_hot_cold_numbers(self, df: pd.DataFrame, recent_draws: int = None, start_draw: int = None,
+                              end_draw: int = None) -> Tuple[List[int], List[int]]:
+        """최근 회차(또는 지정 회차 구간) 기준 핫/콜드 번호 분석
+
+        start_draw가 없으면 end_draw(기본: 최신)까지 최근 recent_draws(기본 HOT_COLD_WINDOW)회차를 본다.
+        """
+        return self._hot_cold(matrix_for_frame(df), recent_draws, start_draw, end_draw)
     
-    def find_hot_cold_numbers(self, df: pd.DataFrame, recent_draws: int = None) -> Tuple[List[int], List[int]]:
-        """최근 회차 기준 핫/콜드 번호 분석"""
-        if recent_draws is None:
+    def _hot_cold(self, matrix, recent_draws: int = None, start_draw: int = None,
+                  end_draw: int = None) -> Tuple[List[int], List[int]]:
+        if recent_draws is None and start_draw is None:
             recent_draws = self.hot_cold_window
-        recent_df = df.tail(recent_draws)
-        recent_frequency = self.analyze_frequency(recent_df)
-        
-        # 전체 기간 빈도
-        total_frequency = self.analyze_frequency(df)
+        recent_frequency = self._frequency_range(matrix, start_draw, end_draw, recent_draws)
         
         # 최근 출현 빈도가 높은 번호 (핫 번호)
         hot_numbers = sorted(recent_frequency.items(), key=lambda x: x[1], reverse=True)[:10]
@@ -54,14 +133,13 @@ class AnalysisService:
     
     def analyze_odd_even_ratio(self, df: pd.DataFrame) -> Dict[str, float]:
         """홀짝 비율 분석"""
-        odd_count = 0
-        even_count = 0
-        total_numbers = 0
-        
-        for col in self.number_columns:
-            odd_count += len(df[df[col] % 2 == 1])
-            even_count += len(df[df[col] % 2 == 0])
-            total_numbers += len(df)
+        return self._odd_even(matrix_for_frame(df).numbers)
+    
+    def _odd_even(self, numbers: np.ndarray) -> Dict[str, float]:
+        odd_count = int((numbers % 2 == 1).sum())
+        # 정렬 행렬의 0은 결측/이상치 자리이므로 짝수에서 제외
+        even_count = int(((numbers % 2 == 0) & (numbers > 0)).sum())
+        total_numbers = len(self.number_columns) * len(numbers)
         
         return {
             'odd_ratio': odd_count / total_numbers,
@@ -70,95 +148,236 @@ class AnalysisService:
     
     def analyze_number_ranges(self, df: pd.DataFrame) -> Dict[str, int]:
         """번호 구간별 분포 분석"""
-        range_counts = defaultdict(int)
-        
-        for col in self.number_columns:
-            for num in df[col]:
-                if 1 <= num <= 10:
-                    range_counts['1-10'] += 1
-                elif 11 <= num <= 20:
-                    range_counts['11-20'] += 1
-                elif 21 <= num <= 30:
-                    range_counts['21-30'] += 1
-                elif 31 <= num <= 40:
-                    range_counts['31-40'] += 1
-                else:
-                    range_counts['41-45'] += 1
-        
-        return dict(range_counts)
+        return self._number_ranges(matrix_for_frame(df).column_numbers)
+    
+    @staticmethod
+    def _number_ranges(column_numbers: np.ndarray) -> Dict[str, int]:
+        """구간별 칸 수 (키 순서 = number_1 컬럼부터 훑은 첫 등장 순, 1~45 밖 값은 '41-45')"""
+        ids = range_ids(column_numbers).T.ravel()
+        counts = np.bincount(ids, minlength=len(RANGE_LABELS))
+        uniq, first = np.unique(ids, return_index=True)
+        return {RANGE_LABELS[r]: int(counts[r]) for r in uniq[np.argsort(first)]}
     
     def analyze_consecutive_patterns(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """연속 번호 패턴 분석"""
-        patterns = []
-        
-        for _, row in df.iterrows():
-            numbers = sorted([row[col] for col in self.number_columns])
-            consecutive_count = 0
-            max_consecutive = 0
-            
-            for i in range(len(numbers) - 1):
-                if numbers[i+1] - numbers[i] == 1:
-                    consecutive_count += 1
-                else:
-                    max_consecutive = max(max_consecutive, consecutive_count)
-                    consecutive_count = 0
-            
-            max_consecutive = max(max_consecutive, consecutive_count)
-            
-            if max_consecutive > 0:
-                patterns.append({
-                    'draw_number': row['draw_number'],
-                    'consecutive_count': max_consecutive,
-                    'numbers': numbers
-                })
-        
-        return patterns
+        return self._consecutive_patterns(matrix_for_frame(df))
+    
+    @staticmethod
+    def _max_consecutive(numbers: np.ndarray) -> np.ndarray:
+        """행별 최장 연속(차이 1) 구간 길이 (연속 없으면 0)"""
+        is_step = np.diff(numbers.astype(np.int64), axis=1) == 1
+        # 열 방향으로 run 길이를 누적
+        run = np.zeros(len(numbers), dtype=np.int64)
+        max_consecutive = np.zeros(len(numbers), dtype=np.int64)
+        for j in range(is_step.shape[1]):
+            run = (run + 1) * is_step[:, j]
+            np.maximum(max_consecutive, run, out=max_consecutive)
+        return max_consecutive
+    
+    @classmethod
+    def _consecutive_patterns(cls, matrix, lo: int = 0, hi: int = None) -> List[Dict[str, Any]]:
+        """행 구간 [lo, hi)의 연속 번호 패턴"""
+        hi = len(matrix) if hi is None else hi
+        numbers = matrix.numbers[lo:hi]
+        max_consecutive = cls._max_consecutive(numbers)
+        rows = np.flatnonzero(max_consecutive > 0)
+        draw_numbers = matrix.draw_numbers[lo:hi][rows].tolist()
+        counts = max_consecutive[rows].tolist()
+        row_numbers = numbers[rows].astype(np.int64).tolist()
+        return [
+            {'draw_number': draw_no, 'consecutive_count': count, 'numbers': nums}
+            for draw_no, count, nums in zip(draw_numbers, counts, row_numbers)
+        ]
+    
+    def consecutive_patterns_page(self, df: pd.DataFrame, cursor: int = None, limit: int = 100) -> Dict[str, Any]:
+        """연속 번호 패턴 커서 페이지 (cursor 회차 다음부터 최대 limit개, 회차 오름차순)
+
+        next_cursor를 다음 요청의 cursor로 넘기면 이어서 조회한다(마지막 페이지면 None).
+        회차 번호 기준이라 새 회차가 추가돼도 이미 받은 페이지는 바뀌지 않는다.
+        """
+        if limit < 1:
+            raise ValueError("limit은 1 이상이어야 합니다.")
+        matrix = matrix_for_frame(df)
+        lo = 0 if cursor is None else int(np.searchsorted(matrix.draw_numbers, cursor, side='right'))
+        # 약 1/3 회차에 연속 번호가 있으므로 limit의 몇 배씩 잘라 필요한 만큼만 계산
+        chunk = max(1024, limit * 4)
+        items: List[Dict[str, Any]] = []
+        while lo < len(matrix) and len(items) <= limit:
+            hi = min(lo + chunk, len(matrix))
+            items.extend(self._consecutive_patterns(matrix, lo, hi))
+            lo = hi
+        has_more = len(items) > limit or lo < len(matrix)
+        items = items[:limit]
+        return {
+            'items': items,
+            'next_cursor': items[-1]['draw_number'] if has_more and items else None,
+            'limit': limit
+        }
+    
+    def draw_series_page(self, df: pd.DataFrame, cursor: int = None, limit: int = 100) -> Dict[str, Any]:
+        """회차별 지표 시계열 커서 페이지 (cursor 회차 다음부터 limit회차, 회차 오름차순)
+
+        항목: 회차, 날짜, 정렬 번호, 보너스, 합계, 홀수 개수, 소수 개수, 최장 연속 길이
+        """
+        if limit < 1:
+            raise ValueError("limit은 1 이상이어야 합니다.")
+        matrix = matrix_for_frame(df)
+        lo = 0 if cursor is None else int(np.searchsorted(matrix.draw_numbers, cursor, side='right'))
+        hi = min(lo + limit, len(matrix))
+        numbers = matrix.numbers[lo:hi]
+        dates = matrix.draw_dates[lo:hi]
+        items = [
+            {
+                'draw_number': draw_no,
+                'draw_date': None if np.isnat(date) else str(date),
+                'numbers': nums,
+                'bonus_number': bonus,
+                'sum': total,
+                'odd_count': odd,
+                'prime_count': prime,
+                'consecutive_count': consecutive
+            }
+            for draw_no, date, nums, bonus, total, odd, prime, consecutive in zip(
+                matrix.draw_numbers[lo:hi].tolist(),
+                dates,
+                numbers.astype(np.int64).tolist(),
+                matrix.bonus[lo:hi].astype(np.int64).tolist(),
+                numbers.sum(axis=1, dtype=np.int64).tolist(),
+                (numbers % 2 == 1).sum(axis=1).tolist(),
+                np.isin(numbers, PRIME_NUMBERS).sum(axis=1).tolist(),
+                self._max_consecutive(numbers).tolist()
+            )
+        ]
+        return {
+            'items': items,
+            'next_cursor': items[-1]['draw_number'] if hi < len(matrix) and items else None,
+            'limit': limit
+        }
     
     def analyze_missing_periods(self, df: pd.DataFrame) -> Dict[int, int]:
-        """번호별 미출현 기간 분석"""
-        missing_periods = {}
-        
-        for num in range(1, 46):
-            last_appearance = None
-            max_missing = 0
-            current_missing = 0
-            
-            for _, row in df.iterrows():
-                numbers = [row[col] for col in self.number_columns]
-                if num in numbers:
-                    if last_appearance is not None:
-                        max_missing = max(max_missing, current_missing)
-                    current_missing = 0
-                    last_appearance = row['draw_number']
-                else:
-                    current_missing += 1
+        """번호별 미출현 기간 분석 (출현 사이 최대 간격, 첫 출현 전/마지막 출현 후 구간은 제외)"""
+        details = self.analyze_missing_period_details(df)
+        return {num: detail['max_gap'] for num, detail in details.items()}
+    
+    def analyze_missing_period_details(self, df: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
+        """번호별 미출현 기간 상세 (원-핫 행렬 한 번 순회로 45개 번호 동시 계산)
+
+        - max_gap: 연속 출현 사이 최대 미출현 회차 수 (analyze_missing_periods 값)
+        - mean_gap: 연속 출현 사이 평균 미출현 회차 수 (출현 2회 미만이면 0.0)
+        - current_gap: 마지막 출현 이후 회차 수 (미출현 번호는 전체 회차 수)
+        - last_seen_draw: 마지막 출현 회차 (미출현이면 None)
+        """
+        return self._missing_period_details(matrix_for_frame(df))
+    
+    @staticmethod
+    def _missing_period_details(matrix) -> Dict[int, Dict[str, Any]]:
+        total = len(matrix)
+        # 번호 우선으로 펼친 출현 위치: nums는 오름차순, 같은 번호 안에서 rows도 오름차순
+        nums, rows = np.nonzero(matrix.onehot.T)
+        
+        same_number = nums[1:] == nums[:-1]
+        gaps = (rows[1:] - rows[:-1] - 1)[same_number]
+        gap_nums = nums[1:][same_number]
+        max_gap = np.zeros(45, dtype=np.int64)
+        np.maximum.at(max_gap, gap_nums, gaps)
+        gap_sum = np.bincount(gap_nums, weights=gaps, minlength=45)
+        gap_count = np.bincount(gap_nums, minlength=45)
+        
+        appearances = np.bincount(nums, minlength=45)
+        last_row = np.full(45, -1, dtype=np.int64)
+        seen = appearances > 0
+        last_row[seen] = rows[np.cumsum(appearances)[seen] - 1]
+        
+        details = {}
+        for k in range(45):
+            last = int(last_row[k])
+            details[k + 1] = {
+                'max_gap': int(max_gap[k]),
+                'mean_gap': float(gap_sum[k] / gap_count[k]) if gap_count[k] else 0.0,
+                'current_gap': total - 1 - last if last >= 0 else total,
+                'last_seen_draw': int(matrix.draw_numbers[last]) if last >= 0 else None,
+            }
+        return details
+    
+    def _analyze_groups(self, matrix, group_ids: np.ndarray, labels: List[Any],
+                        top_n: int, include_ranges: bool = True) -> Dict[Any, Dict[str, Any]]:
+        """그룹(계절/월/요일/날짜 등)별 빈도·핫/콜드·홀짝·구간 분석을 한 번에 계산
+
+        group_ids[i]는 i번째 회차의 그룹 인덱스(labels 위치), 음수면 어느 그룹에도 속하지 않는다.
+        결과는 그룹별로 DataFrame을 잘라 analyze_frequency 등을 호출한 것과 같다(빈 그룹 제외).
+        """
+        n_groups = len(labels)
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        draw_counts = np.bincount(group_ids[group_ids >= 0], minlength=n_groups)
+        counts = matrix.group_counts(group_ids, n_groups)
+        first_seen = matrix.group_first_seen(group_ids, n_groups)
+        # 열 k = 번호 k+1 → 짝수 열이 홀수 번호
+        odd_counts = counts[:, 0::2].sum(axis=1)
+        even_counts = counts[:, 1::2].sum(axis=1)
+        if include_ranges:
+            range_counts, range_first = self._group_number_ranges(matrix.column_numbers, group_ids, n_groups)
+        
+        result = {}
+        for g, label in enumerate(labels):
+            draw_count = int(draw_counts[g])
+            if draw_count == 0:
+                continue
+            present = np.flatnonzero(first_seen[g] >= 0)
+            order = present[np.argsort(first_seen[g][present], kind='stable')]
+            frequency = {int(k) + 1: int(counts[g, k]) for k in order}
+            total_numbers = len(self.number_columns) * draw_count
             
-            missing_periods[num] = max_missing
+            group_result = {
+                'draw_count': draw_count,
+                'frequency': frequency,
+                'hot_numbers': [num for num, _ in sorted(frequency.items(), key=lambda x: x[1], reverse=True)[:top_n]],
+                'cold_numbers': [num for num, _ in sorted(frequency.items(), key=lambda x: x[1])[:top_n]],
+                'odd_even_ratio': {
+                    'odd_ratio': int(odd_counts[g]) / total_numbers,
+                    'even_ratio': int(even_counts[g]) / total_numbers
+                }
+            }
+            if include_ranges:
+                seen = np.flatnonzero(range_first[g] >= 0)
+                group_result['range_distribution'] = {
+                    RANGE_LABELS[r]: int(range_counts[g, r])
+                    for r in seen[np.argsort(range_first[g][seen], kind='stable')]
+                }
+            result[label] = group_result
         
-        return missing_periods
+        return result
+    
+    @staticmethod
+    def _group_number_ranges(column_numbers: np.ndarray, group_ids: np.ndarray,
+                             n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+        """그룹별 구간 칸 수와 첫 등장 위치 (G×5, 미등장 -1)
+
+        위치는 _number_ranges와 같이 number_1 컬럼부터 훑은 순서라, 첫 등장 순으로 정렬하면
+        그룹별로 잘라 analyze_number_ranges를 호출한 것과 키 순서까지 같다.
+        """
+        n_ranges = len(RANGE_LABELS)
+        ids = range_ids(column_numbers).T.ravel()
+        gids = np.tile(group_ids, column_numbers.shape[1])
+        member = gids >= 0
+        keys = gids[member] * n_ranges + ids[member]
+        positions = np.flatnonzero(member)
+        counts = np.bincount(keys, minlength=n_groups * n_ranges).reshape(n_groups, n_ranges)
+        first = np.full(n_groups * n_ranges, -1, dtype=np.int64)
+        uniq, idx = np.unique(keys, return_index=True)
+        first[uniq] = positions[idx]
+        return counts, first.reshape(n_groups, n_ranges)
     
     def analyze_seasonal_patterns(self, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
         """계절별 패턴 분석"""
-        # 날짜 컬럼을 datetime으로 변환
-        df['draw_date'] = pd.to_datetime(df['draw_date'], format='mixed', errors='coerce')
-        df['month'] = df['draw_date'].dt.month
-        df['season'] = df['month'].apply(self._get_season)
-        
-        seasonal_analysis = {}
-        
-        for season in ['봄', '여름', '가을', '겨울']:
-            season_df = df[df['season'] == season]
-            if len(season_df) > 0:
-                seasonal_analysis[season] = {
-                    'draw_count': len(season_df),
-                    'frequency': self.analyze_frequency(season_df),
-                    'hot_numbers': self._get_top_numbers(season_df, 5),
-                    'cold_numbers': self._get_cold_numbers(season_df, 5),
-                    'odd_even_ratio': self.analyze_odd_even_ratio(season_df),
-                    'range_distribution': self.analyze_number_ranges(season_df)
-                }
-        
-        return seasonal_analysis
+        matrix = matrix_for_frame(df)
+        return self._seasonal_patterns(matrix, matrix.date_parts())
+    
+    def _seasonal_patterns(self, matrix, date_parts) -> Dict[str, Dict[str, Any]]:
+        seasons = ['봄', '여름', '가을', '겨울']
+        month, _, _ = date_parts
+        # 월 → 계절 인덱스 (인덱스 0은 날짜 없는 회차: 기존과 같이 겨울로 분류)
+        season_of_month = np.array([seasons.index(self._get_season(m)) for m in range(0, 13)])
+        return self._analyze_groups(matrix, season_of_month[np.maximum(month, 0)], seasons, 5)
     
     def _get_season(self, month: int) -> str:
         """월을 계절로 변환"""
@@ -173,133 +392,110 @@ class AnalysisService:
     
     def analyze_monthly_patterns(self, df: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
         """월별 패턴 분석"""
-        df['draw_date'] = pd.to_datetime(df['draw_date'], format='mixed', errors='coerce')
-        df['month'] = df['draw_date'].dt.month
-        
-        monthly_analysis = {}
-        
-        for month in range(1, 13):
-            month_df = df[df['month'] == month]
-            if len(month_df) > 0:
-                monthly_analysis[month] = {
-                    'draw_count': len(month_df),
-                    'frequency': self.analyze_frequency(month_df),
-                    'hot_numbers': self._get_top_numbers(month_df, 5),
-                    'cold_numbers': self._get_cold_numbers(month_df, 5),
-                    'odd_even_ratio': self.analyze_odd_even_ratio(month_df),
-                    'range_distribution': self.analyze_number_ranges(month_df)
-                }
-        
-        return monthly_analysis
+        matrix = matrix_for_frame(df)
+        return self._monthly_patterns(matrix, matrix.date_parts())
+    
+    def _monthly_patterns(self, matrix, date_parts) -> Dict[int, Dict[str, Any]]:
+        month, _, _ = date_parts
+        return self._analyze_groups(matrix, np.where(month > 0, month - 1, -1), list(range(1, 13)), 5)
     
     def analyze_weekly_patterns(self, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
         """요일별 패턴 분석"""
-        df['draw_date'] = pd.to_datetime(df['draw_date'], format='mixed', errors='coerce')
-        df['weekday'] = df['draw_date'].dt.day_name()
-        
-        weekly_analysis = {}
+        matrix = matrix_for_frame(df)
+        return self._weekly_patterns(matrix, matrix.date_parts())
+    
+    def _weekly_patterns(self, matrix, date_parts) -> Dict[str, Dict[str, Any]]:
         weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        for weekday in weekday_names:
-            weekday_df = df[df['weekday'] == weekday]
-            if len(weekday_df) > 0:
-                weekly_analysis[weekday] = {
-                    'draw_count': len(weekday_df),
-                    'frequency': self.analyze_frequency(weekday_df),
-                    'hot_numbers': self._get_top_numbers(weekday_df, 5),
-                    'cold_numbers': self._get_cold_numbers(weekday_df, 5),
-                    'odd_even_ratio': self.analyze_odd_even_ratio(weekday_df),
-                    'range_distribution': self.analyze_number_ranges(weekday_df)
-                }
-        
-        return weekly_analysis
+        _, _, weekday = date_parts
+        return self._analyze_groups(matrix, weekday, weekday_names, 5)
     
     def analyze_date_patterns(self, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
         """날짜별 패턴 분석 (1일~31일)"""
-        df['draw_date'] = pd.to_datetime(df['draw_date'], format='mixed', errors='coerce')
-        df['day'] = df['draw_date'].dt.day
-        
-        date_analysis = {}
-        
-        for day in range(1, 32):
-            day_df = df[df['day'] == day]
-            if len(day_df) > 0:
-                date_analysis[day] = {
-                    'draw_count': len(day_df),
-                    'frequency': self.analyze_frequency(day_df),
-                    'hot_numbers': self._get_top_numbers(day_df, 3),
-                    'cold_numbers': self._get_cold_numbers(day_df, 3),
-                    'odd_even_ratio': self.analyze_odd_even_ratio(day_df)
-                }
-        
-        return date_analysis
+        matrix = matrix_for_frame(df)
+        return self._date_patterns(matrix, matrix.date_parts())
+    
+    def _date_patterns(self, matrix, date_parts) -> Dict[str, Dict[str, Any]]:
+        _, day, _ = date_parts
+        return self._analyze_groups(matrix, np.where(day > 0, day - 1, -1), list(range(1, 32)), 3,
+                                    include_ranges=False)
+    
+    @staticmethod
+    def _counter_items(values: np.ndarray) -> List[Tuple[int, int]]:
+        """Counter(values.ravel()) 와 같은 (값, 개수) 목록 (키 순서 = 첫 등장 순)"""
+        uniq, first_idx, counts = np.unique(values.ravel(), return_index=True, return_counts=True)
+        order = np.argsort(first_idx, kind='stable')
+        return list(zip(uniq[order].tolist(), counts[order].tolist()))
+    
+    @staticmethod
+    def _most_common(items: List[Tuple[int, int]], n: int = None) -> List[Tuple[int, int]]:
+        """Counter.most_common과 같은 순서 (개수 내림차순, 동률은 첫 등장 순)"""
+        ranked = sorted(items, key=lambda x: x[1], reverse=True)
+        return ranked if n is None else ranked[:n]
     
     def analyze_sum_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """번호 합계 패턴 분석"""
-        sums = []
-        for _, row in df.iterrows():
-            numbers = [row[col] for col in self.number_columns]
-            sums.append(sum(numbers))
+        return self._sum_patterns(matrix_for_frame(df).numbers)
+    
+    def _sum_patterns(self, numbers: np.ndarray) -> Dict[str, Any]:
+        sums = numbers.sum(axis=1, dtype=np.int64)
         
-        sum_counter = Counter(sums)
+        sum_items = self._counter_items(sums)
         return {
-            'min_sum': int(min(sums)),
-            'max_sum': int(max(sums)),
+            'min_sum': int(sums.min()),
+            'max_sum': int(sums.max()),
             'avg_sum': float(np.mean(sums)),
             'std_sum': float(np.std(sums)),
-            'sum_distribution': {int(k): int(v) for k, v in sum_counter.items()},
-            'most_common_sums': [(int(s), int(c)) for s, c in sum_counter.most_common(10)]
+            'sum_distribution': dict(sum_items),
+            'most_common_sums': self._most_common(sum_items, 10)
         }
     
     def analyze_gap_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """번호 간격 패턴 분석"""
-        all_gaps = []
-        
-        for _, row in df.iterrows():
-            numbers = sorted([row[col] for col in self.number_columns])
-            gaps = [numbers[i+1] - numbers[i] for i in range(len(numbers)-1)]
-            all_gaps.extend(gaps)
+        return self._gap_patterns(matrix_for_frame(df).numbers)
+    
+    def _gap_patterns(self, numbers: np.ndarray) -> Dict[str, Any]:
+        # 행 우선으로 펼치면 기존 회차별 extend 순서와 같다
+        all_gaps = np.diff(numbers.astype(np.int64), axis=1).ravel()
         
-        gap_counter = Counter(all_gaps)
+        gap_items = self._counter_items(all_gaps)
         return {
-            'min_gap': int(min(all_gaps)),
-            'max_gap': int(max(all_gaps)),
+            'min_gap': int(all_gaps.min()),
+            'max_gap': int(all_gaps.max()),
             'avg_gap': float(np.mean(all_gaps)),
             'std_gap': float(np.std(all_gaps)),
-            'gap_distribution': {int(k): int(v) for k, v in gap_counter.items()},
-            'most_common_gaps': [(int(g), int(c)) for g, c in gap_counter.most_common(10)]
+            'gap_distribution': dict(gap_items),
+            'most_common_gaps': self._most_common(gap_items, 10)
         }
     
     def analyze_prime_number_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """소수 번호 패턴 분석"""
-        prime_numbers = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43]
+        return self._prime_number_patterns(matrix_for_frame(df).numbers)
+    
+    def _prime_number_patterns(self, numbers: np.ndarray) -> Dict[str, Any]:
+        prime_numbers = PRIME_NUMBERS
         
-        prime_counts = []
-        for _, row in df.iterrows():
-            numbers = [row[col] for col in self.number_columns]
-            prime_count = len([n for n in numbers if n in prime_numbers])
-            prime_counts.append(prime_count)
+        prime_counts = np.isin(numbers, prime_numbers).sum(axis=1)
         
-        prime_counter = Counter(prime_counts)
+        prime_items = self._counter_items(prime_counts)
         return {
             'prime_numbers': [int(n) for n in prime_numbers],
             'avg_prime_count': float(np.mean(prime_counts)),
-            'prime_count_distribution': {int(k): int(v) for k, v in prime_counter.items()},
-            'most_common_prime_count': [(int(k), int(v)) for k, v in prime_counter.most_common()]
+            'prime_count_distribution': dict(prime_items),
+            'most_common_prime_count': self._most_common(prime_items)
         }
     
     def analyze_ending_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """끝자리 패턴 분석"""
-        ending_counts = Counter()
-        
-        for _, row in df.iterrows():
-            numbers = [row[col] for col in self.number_columns]
-            endings = [n % 10 for n in numbers]
-            ending_counts.update(endings)
+        return self._ending_patterns(matrix_for_frame(df).column_numbers)
+    
+    def _ending_patterns(self, column_numbers: np.ndarray) -> Dict[str, Any]:
+        # 원본 컬럼 순서 기준 행 우선 순회 = 기존 Counter.update 순서
+        endings = column_numbers[column_numbers > 0] % 10
         
+        ending_items = self._counter_items(endings)
         return {
-            'ending_distribution': dict(ending_counts),
-            'most_common_endings': sorted(ending_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+            'ending_distribution': dict(ending_items),
+            'most_common_endings': self._most_common(ending_items, 5)
         }
     
     def _get_top_numbers(self, df: pd.DataFrame, top_n: int = 5) -> List[int]:
@@ -312,69 +508,161 @@ class AnalysisService:
         frequency = self.analyze_frequency(df)
         return [num for num, _ in sorted(frequency.items(), key=lambda x: x[1])[:top_n]]
     
+    def analyze_co_occurrence(self, df: pd.DataFrame, top_n: int = 20, number: int = None,
+                              state: AnalysisState = None) -> Dict[str, Any]:
+        """번호 쌍/3개 조합 동시 출현 상위 top_n (number: 해당 번호를 포함하는 조합만)
+
+        state(같은 데이터셋의 누적 분석 상태)가 있으면 누적 카운터를, 없으면 원-핫 행렬에서 계산한다.
+        """
+        if top_n < 1:
+            raise ValueError("top_n은 1 이상이어야 합니다.")
+        if number is not None and not 1 <= number <= 45:
+            raise ValueError("number는 1~45 사이여야 합니다.")
+        matrix = matrix_for_frame(df)
+        if state is not None and state.matches(matrix):
+            return state.co_occurrence(top_n, number)
+        return top_co_occurrences(pair_counts_from_matrix(matrix), triple_counts_from_matrix(matrix),
+                                  len(matrix), top_n, number)
+    
     def get_recent_trends(self, df: pd.DataFrame, recent_draws: int = 20) -> Dict[str, Any]:
         """최근 트렌드 분석"""
+        return self._recent_trends(df, matrix_for_frame(df), recent_draws)
+    
+    def _recent_trends(self, df: pd.DataFrame, matrix, recent_draws: int = 20) -> Dict[str, Any]:
         recent_df = df.tail(recent_draws)
+        # 정렬 행렬도 DataFrame과 같은 행 순서이므로 끝 recent_draws행이 recent_df에 대응
+        recent_numbers = matrix.numbers[len(matrix) - len(recent_df):]
         
         trends = {
-            'recent_frequency': self.analyze_frequency(recent_df),
-            'recent_odd_even': self.analyze_odd_even_ratio(recent_df),
-            'recent_ranges': self.analyze_number_ranges(recent_df),
+            'recent_frequency': self._frequency_range(matrix, window=recent_draws),
+            'recent_odd_even': self._odd_even(recent_numbers),
+            'recent_ranges': self._number_ranges(matrix.column_numbers[len(matrix) - len(recent_df):]),
             'avg_numbers_per_draw': recent_df[self.number_columns].mean().to_dict()
         }
         
         return trends
     
-    def comprehensive_analysis(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """종합 분석 수행"""
+    @staticmethod
+    def resolve_sections(fields: List[str] = None, exclude: List[str] = None) -> List[str]:
+        """fields(포함)/exclude(제외) 섹션 목록을 응답 순서의 섹션 목록으로 변환 (알 수 없는 이름은 ValueError)"""
+        unknown = [name for name in (fields or []) + (exclude or []) if name not in COMPREHENSIVE_SECTIONS]
+        if unknown:
+            raise ValueError(f"알 수 없는 섹션: {', '.join(unknown)} (사용 가능: {', '.join(COMPREHENSIVE_SECTIONS)})")
+        selected = set(fields) if fields else set(COMPREHENSIVE_SECTIONS)
+        selected -= set(exclude or [])
+        return [name for name in COMPREHENSIVE_SECTIONS if name in selected]
+    
+    def _comprehensive_graph(self, df: pd.DataFrame, state: AnalysisState = None) -> TaskGraph:
+        """종합 분석 작업 그래프
+
+        공유 입력(matrix: 원-핫/정렬 행렬, date_parts: 월/일/요일)은 한 번만 만들고,
+        각 분석 작업은 필요한 입력만 의존성으로 받는다. state가 있으면 전체 기간 통계는 상태에서 읽는다.
+        """
+        graph = TaskGraph()
+        graph.add('matrix', lambda: matrix_for_frame(df))
+        graph.add('date_parts', lambda m: m.date_parts(), ['matrix'])
+
+        def from_state_or(name, state_fn, matrix_fn):
+            if state is not None:
+                graph.add(name, state_fn)
+            else:
+                graph.add(name, matrix_fn, ['matrix'])
+
+        from_state_or('number_frequency', lambda: state.frequency_dict(), self._frequency)
+        graph.add('hot_cold', self._hot_cold, ['matrix'])
+        from_state_or('odd_even_ratio', lambda: state.odd_even_ratio(), lambda m: self._odd_even(m.numbers))
+        from_state_or('number_range_distribution', lambda: state.number_ranges(),
+                      lambda m: self._number_ranges(m.column_numbers))
+        graph.add('consecutive_patterns', self._consecutive_patterns, ['matrix'])
+        from_state_or('missing_period_details', lambda: state.missing_period_details(),
+                      self._missing_period_details)
+        graph.add('missing_periods',
+                  lambda details: {num: detail['max_gap'] for num, detail in details.items()},
+                  ['missing_period_details'])
+        graph.add('recent_trends', lambda m: self._recent_trends(df, m), ['matrix'])
+        
+        # 새로운 세밀한 분석
+        graph.add('seasonal_analysis', self._seasonal_patterns, ['matrix', 'date_parts'])
+        graph.add('monthly_analysis', self._monthly_patterns, ['matrix', 'date_parts'])
+        graph.add('weekly_analysis', self._weekly_patterns, ['matrix', 'date_parts'])
+        graph.add('date_analysis', self._date_patterns, ['matrix', 'date_parts'])
+        from_state_or('sum_analysis', lambda: state.sum_patterns(), lambda m: self._sum_patterns(m.numbers))
+        from_state_or('gap_analysis', lambda: state.gap_patterns(), lambda m: self._gap_patterns(m.numbers))
+        from_state_or('prime_analysis', lambda: state.prime_patterns(),
+                      lambda m: self._prime_number_patterns(m.numbers))
+        from_state_or('ending_analysis', lambda: state.ending_patterns(),
+                      lambda m: self._ending_patterns(m.column_numbers))
+        graph.add('statistics', self._frequency_statistics, ['number_frequency'])
+        return graph
+    
+    @staticmethod
+    def _frequency_statistics(frequency: Dict[int, int]) -> Dict[str, Any]:
+        return {
+            'most_frequent': list(max(frequency.items(), key=lambda x: x[1])),
+            'least_frequent': list(min(frequency.items(), key=lambda x: x[1])),
+            'avg_frequency': float(np.mean(list(frequency.values()))),
+            'std_frequency': float(np.std(list(frequency.values())))
+        }
+    
+    @staticmethod
+    def _usable_state(df: pd.DataFrame, state: Optional[AnalysisState]) -> Optional[AnalysisState]:
+        if state is not None and (len(df) == 0 or not state.matches(matrix_for_frame(df))):
+            logger.warning("분석 상태가 데이터셋과 일치하지 않아 사용하지 않습니다.")
+            return None
+        return state
+    
+    def iter_comprehensive_sections(self, df: pd.DataFrame, state: AnalysisState = None,
+                                    sections: List[str] = None) -> Iterator[Tuple[str, Any]]:
+        """종합 분석 섹션을 계산이 끝나는 순서대로 (섹션 이름, 값)으로 내보낸다
+
+        마지막 항목은 ('debug', 작업별 소요 시간)이다. 인자는 comprehensive_analysis와 같다.
+        """
+        state = self._usable_state(df, state)
+        if sections is None:
+            sections = list(COMPREHENSIVE_SECTIONS)
+        wanted = set(sections)
+        targets = {_SECTION_TASKS.get(name, name) for name in sections} - {None}
+        
+        if 'total_draws' in wanted:
+            yield 'total_draws', len(df)
+        
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        for name, result, seconds in self._comprehensive_graph(df, state).iter_run(_analysis_executor(), targets):
+            timings[name] = seconds
+            metrics.observe(f'analysis.comprehensive.{name}', seconds)
+            if name == 'hot_cold':
+                hot_numbers, cold_numbers = result
+                if 'hot_numbers' in wanted:
+                    yield 'hot_numbers', hot_numbers
+                if 'cold_numbers' in wanted:
+                    yield 'cold_numbers', cold_numbers
+            elif name in wanted:
+                yield name, result
+        total_seconds = time.perf_counter() - started
+        metrics.observe('analysis.comprehensive.total', total_seconds)
+        
+        yield 'debug', {
+            'task_timings_ms': {name: round(seconds * 1000, 3) for name, seconds in timings.items()},
+            'total_ms': round(total_seconds * 1000, 3),
+            'workers': ANALYSIS_WORKERS,
+            'used_state': state is not None
+        }
+    
+    def comprehensive_analysis(self, df: pd.DataFrame, state: AnalysisState = None,
+                               sections: List[str] = None) -> Dict[str, Any]:
+        """종합 분석 수행
+
+        state(같은 데이터셋의 누적 분석 상태)가 주어지면 전체 기간 통계는 상태에서 바로 읽는다.
+        sections(resolve_sections 결과)가 주어지면 그 섹션과 필요한 공유 입력만 계산한다.
+        독립 분석은 작업 그래프로 스레드 풀에서 동시에 실행하며, 작업별 소요 시간은
+        결과의 'debug' 필드와 메트릭(analysis.comprehensive.<작업>)에 기록한다.
+        """
         try:
-            # 기본 분석
-            frequency = self.analyze_frequency(df)
-            hot_numbers, cold_numbers = self.find_hot_cold_numbers(df)
-            odd_even_ratio = self.analyze_odd_even_ratio(df)
-            range_distribution = self.analyze_number_ranges(df)
-            consecutive_patterns = self.analyze_consecutive_patterns(df)
-            missing_periods = self.analyze_missing_periods(df)
-            recent_trends = self.get_recent_trends(df)
-            
-            # 새로운 세밀한 분석
-            seasonal_patterns = self.analyze_seasonal_patterns(df)
-            monthly_patterns = self.analyze_monthly_patterns(df)
-            weekly_patterns = self.analyze_weekly_patterns(df)
-            date_patterns = self.analyze_date_patterns(df)
-            sum_patterns = self.analyze_sum_patterns(df)
-            gap_patterns = self.analyze_gap_patterns(df)
-            prime_patterns = self.analyze_prime_number_patterns(df)
-            ending_patterns = self.analyze_ending_patterns(df)
-            
-            analysis_result = {
-                'total_draws': len(df),
-                'number_frequency': frequency,
-                'hot_numbers': hot_numbers,
-                'cold_numbers': cold_numbers,
-                'odd_even_ratio': odd_even_ratio,
-                'number_range_distribution': range_distribution,
-                'consecutive_patterns': consecutive_patterns,
-                'missing_periods': missing_periods,
-            'recent_trends': recent_trends,
-                
-                # 새로운 세밀한 분석 결과
-                'seasonal_analysis': seasonal_patterns,
-                'monthly_analysis': monthly_patterns,
-                'weekly_analysis': weekly_patterns,
-                'date_analysis': date_patterns,
-                'sum_analysis': sum_patterns,
-                'gap_analysis': gap_patterns,
-                'prime_analysis': prime_patterns,
-                'ending_analysis': ending_patterns,
-                
-                'statistics': {
-                    'most_frequent': list(max(frequency.items(), key=lambda x: x[1])),
-                    'least_frequent': list(min(frequency.items(), key=lambda x: x[1])),
-                    'avg_frequency': float(np.mean(list(frequency.values()))),
-                    'std_frequency': float(np.std(list(frequency.values())))
-                }
-            }
+            results = dict(self.iter_comprehensive_sections(df, state, sections))
+            # 응답 키 순서는 섹션 정의 순서 (계산 완료 순서와 무관)
+            analysis_result = {name: results[name] for name in COMPREHENSIVE_SECTIONS if name in results}
+            analysis_result['debug'] = results['debug']
             
             logger.info("강화된 종합 분석이 완료되었습니다.")
             return analysis_result
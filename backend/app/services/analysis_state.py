@@ -0,0 +1,457 @@
+"""
+회차 단위 누적 분석 상태 (AnalysisState)
+
+AnalysisService의 전체 기간 통계(빈도, 홀짝, 구간, 합계/간격/소수/끝자리 분포, 번호별
+미출현 기간, 번호 쌍/3개 조합 동시 출현)를 고정 크기 카운터로 유지한다. 새 회차는 fold()로 O(1)에 반영하고,
+JSON 체크포인트(`<csv 이름>.analysis_state.json`)로 저장해 재시작 후 이어서 갱신한다.
+반영한 회차(번호/회차 번호)의 다이제스트를 함께 저장해, 과거 회차가 수정된 데이터에는 이어 쓰지 않는다.
+
+분포 dict의 키 순서는 기존 Counter(첫 등장 순)와 같도록 값별 첫 등장 위치를 함께 저장한다.
+표준편차는 히스토그램에서 계산하므로 np.std와 마지막 자리 부동소수 오차가 있을 수 있다.
+"""
+import os
+import json
+import hashlib
+import logging
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .draw_matrix import DrawMatrix, NUM_BALLS
+
+logger = logging.getLogger(__name__)
+
+STATE_FORMAT_VERSION = 4
+PRIME_NUMBERS = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43]
+RANGE_LABELS = ['1-10', '11-20', '21-30', '31-40', '41-45']
+
+_PRIME_MASK = np.zeros(NUM_BALLS + 1, dtype=bool)
+_PRIME_MASK[PRIME_NUMBERS] = True
+_MAX_SUM = 6 * NUM_BALLS
+_UNSEEN_COLUMN = 6
+_OTHER_RANGE = len(RANGE_LABELS) - 1
+
+# 3개 조합 인덱스: TRIPLES[i] = (a, b, c) 0-기반 번호(a<b<c), _TRIPLE_INDEX[a, b, c] = i
+TRIPLES = np.array(list(combinations(range(NUM_BALLS), 3)), dtype=np.int64)
+_TRIPLE_INDEX = np.full((NUM_BALLS, NUM_BALLS, NUM_BALLS), -1, dtype=np.int64)
+_TRIPLE_INDEX[TRIPLES[:, 0], TRIPLES[:, 1], TRIPLES[:, 2]] = np.arange(len(TRIPLES))
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# 체크포인트에 저장하는 배열 필드
+_ARRAY_FIELDS = [
+    'frequency', 'first_col', 'first_row', 'last_row', 'last_seen_draw', 'max_gap', 'gap_sum', 'gap_count',
+    'sum_counts', 'sum_first', 'gap_counts', 'gap_first', 'prime_counts', 'prime_first',
+    'ending_counts', 'ending_first', 'pair_counts', 'triple_counts',
+    'range_counts', 'range_first_col', 'range_first_row',
+]
+
+
+def range_ids(column_numbers: np.ndarray) -> np.ndarray:
+    """칸별 구간 번호: 1-10 → 0, …, 41-45 → 4, 범위 밖/결측(0) → 4 (기존 if/else 분기와 동일)"""
+    cols = np.asarray(column_numbers).astype(np.intp)
+    return np.where(cols > 0, np.minimum((cols - 1) // 10, _OTHER_RANGE), _OTHER_RANGE)
+
+
+def _first_positions(values: np.ndarray, positions: np.ndarray, size: int) -> np.ndarray:
+    """값별 첫 등장 위치 (미등장 -1). values는 위치 오름차순."""
+    first = np.full(size, -1, dtype=np.int64)
+    uniq, idx = np.unique(values, return_index=True)
+    first[uniq] = positions[idx]
+    return first
+
+
+def _ordered_items(counts: np.ndarray, first: np.ndarray) -> List[Tuple[int, int]]:
+    """(값, 개수) 목록, 키 순서 = 첫 등장 순"""
+    seen = np.flatnonzero(first >= 0)
+    order = seen[np.argsort(first[seen], kind='stable')]
+    return [(int(v), int(counts[v])) for v in order]
+
+
+def _most_common(items: List[Tuple[int, int]], n: int = None) -> List[Tuple[int, int]]:
+    ranked = sorted(items, key=lambda x: x[1], reverse=True)
+    return ranked if n is None else ranked[:n]
+
+
+def pair_counts_from_matrix(matrix: DrawMatrix) -> np.ndarray:
+    """45×45 동시 출현 행렬 Xᵀ·X (X: N×45 원-핫, 대각선 = 번호별 출현 수)"""
+    # 정수 행렬곱은 BLAS를 쓰지 않아 느리므로 float64(2^53까지 정확)로 청크 단위 누적
+    counts = np.zeros((NUM_BALLS, NUM_BALLS), dtype=np.float64)
+    chunk = 1 << 16
+    for start in range(0, len(matrix), chunk):
+        block = matrix.onehot[start:start + chunk].astype(np.float64)
+        counts += block.T @ block
+    return np.rint(counts).astype(np.int64)
+
+
+def triple_counts_from_matrix(matrix: DrawMatrix) -> np.ndarray:
+    """TRIPLES 순서의 3개 번호 동시 출현 수
+
+    번호별 회차 비트셋(45×ceil(N/8) 바이트)을 만들고, 쌍 (a, b)마다 교집합을 한 번 구한 뒤
+    나머지 번호 c>b 전체와의 교집합 비트 수를 한 번에 센다.
+    """
+    bitsets = np.packbits(matrix.onehot.T, axis=1)
+    counts = np.zeros(len(TRIPLES), dtype=np.int64)
+    for a in range(NUM_BALLS - 2):
+        for b in range(a + 1, NUM_BALLS - 1):
+            both = bitsets[a] & bitsets[b]
+            if not both.any():
+                continue
+            c_counts = _POPCOUNT8[bitsets[b + 1:] & both].sum(axis=1, dtype=np.int64)
+            counts[_TRIPLE_INDEX[a, b, b + 1:]] = c_counts
+    return counts
+
+
+def prefix_digest(matrix: DrawMatrix, n: Optional[int] = None) -> str:
+    """matrix 앞 n회차(원본 컬럼 순서 번호 + 회차 번호)의 다이제스트"""
+    n = len(matrix) if n is None else n
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(matrix.column_numbers[:n]).tobytes())
+    digest.update(np.ascontiguousarray(matrix.draw_numbers[:n], dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def _histogram_stats(counts: np.ndarray) -> Tuple[float, float]:
+    values = np.arange(len(counts), dtype=np.float64)
+    total = counts.sum()
+    mean = float((values * counts).sum() / total)
+    std = float(np.sqrt((counts * (values - mean) ** 2).sum() / total))
+    return mean, std
+
+
+class AnalysisState:
+    """전체 기간 분석 통계의 누적 상태"""
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.last_draw = 0
+        self.total_draws = 0
+        # 반영한 회차 전체의 prefix_digest (fold 단건 반영 후에는 None → 이어 쓰기 불가)
+        self.digest: Optional[str] = None
+        # 번호별 (열 k = 번호 k+1)
+        self.frequency = np.zeros(NUM_BALLS, dtype=np.int64)
+        # Counter 키 순서 재현: 처음 등장한 컬럼(number_1=0 …)과 그 컬럼에서의 첫 회차 위치
+        self.first_col = np.full(NUM_BALLS, _UNSEEN_COLUMN, dtype=np.int64)
+        self.first_row = np.full(NUM_BALLS, -1, dtype=np.int64)
+        self.last_row = np.full(NUM_BALLS, -1, dtype=np.int64)
+        self.last_seen_draw = np.zeros(NUM_BALLS, dtype=np.int64)
+        self.max_gap = np.zeros(NUM_BALLS, dtype=np.int64)
+        self.gap_sum = np.zeros(NUM_BALLS, dtype=np.int64)
+        self.gap_count = np.zeros(NUM_BALLS, dtype=np.int64)
+        # 분포 (값 = 인덱스) 와 첫 등장 위치
+        self.sum_counts = np.zeros(_MAX_SUM + 1, dtype=np.int64)
+        self.sum_first = np.full(_MAX_SUM + 1, -1, dtype=np.int64)
+        self.gap_counts = np.zeros(NUM_BALLS + 1, dtype=np.int64)
+        self.gap_first = np.full(NUM_BALLS + 1, -1, dtype=np.int64)
+        self.prime_counts = np.zeros(7, dtype=np.int64)
+        self.prime_first = np.full(7, -1, dtype=np.int64)
+        self.ending_counts = np.zeros(10, dtype=np.int64)
+        self.ending_first = np.full(10, -1, dtype=np.int64)
+        # 번호 쌍/3개 조합 동시 출현 수
+        self.pair_counts = np.zeros((NUM_BALLS, NUM_BALLS), dtype=np.int64)
+        self.triple_counts = np.zeros(len(TRIPLES), dtype=np.int64)
+        # 구간별 칸 수(범위 밖 값은 '41-45')와 컬럼 순서 기준 첫 등장 (컬럼, 회차 위치)
+        self.range_counts = np.zeros(len(RANGE_LABELS), dtype=np.int64)
+        self.range_first_col = np.full(len(RANGE_LABELS), _UNSEEN_COLUMN, dtype=np.int64)
+        self.range_first_row = np.full(len(RANGE_LABELS), -1, dtype=np.int64)
+
+    def copy(self) -> "AnalysisState":
+        other = AnalysisState()
+        other.version, other.last_draw, other.total_draws = self.version, self.last_draw, self.total_draws
+        other.digest = self.digest
+        for name in _ARRAY_FIELDS:
+            setattr(other, name, getattr(self, name).copy())
+        return other
+
+    # ------------------------------------------------------------------ 갱신
+    def fold(self, column_numbers: Sequence[int], draw_number: int) -> None:
+        """회차 1개 반영 (number_1~6 원본 순서 번호, 회차)"""
+        row = self.total_draws
+        raw = [int(n) for n in column_numbers]
+        valid = [n if 1 <= n <= NUM_BALLS else 0 for n in raw]
+        numbers = sorted(valid)
+
+        for col, n in enumerate(valid):
+            if n and col < self.first_col[n - 1]:
+                self.first_col[n - 1] = col
+                self.first_row[n - 1] = row
+        for col, r in enumerate(range_ids(valid).tolist()):
+            self.range_counts[r] += 1
+            if col < self.range_first_col[r]:
+                self.range_first_col[r] = col
+                self.range_first_row[r] = row
+        present = np.array(sorted(set(v - 1 for v in valid if v)), dtype=np.int64)
+        self.pair_counts[np.ix_(present, present)] += 1
+        if len(present) >= 3:
+            a, b, c = np.array(list(combinations(present, 3))).T
+            self.triple_counts[_TRIPLE_INDEX[a, b, c]] += 1
+        for n in set(v for v in valid if v):
+            k = n - 1
+            self.frequency[k] += 1
+            if self.last_row[k] >= 0:
+                gap = row - self.last_row[k] - 1
+                self.max_gap[k] = max(self.max_gap[k], gap)
+                self.gap_sum[k] += gap
+                self.gap_count[k] += 1
+            self.last_row[k] = row
+            self.last_seen_draw[k] = draw_number
+
+        total = sum(numbers)
+        self.sum_counts[total] += 1
+        if self.sum_first[total] < 0:
+            self.sum_first[total] = row
+        for j in range(len(numbers) - 1):
+            gap = numbers[j + 1] - numbers[j]
+            self.gap_counts[gap] += 1
+            if self.gap_first[gap] < 0:
+                self.gap_first[gap] = row * 5 + j
+        primes = int(_PRIME_MASK[numbers].sum())
+        self.prime_counts[primes] += 1
+        if self.prime_first[primes] < 0:
+            self.prime_first[primes] = row
+        for col, n in enumerate(valid):
+            if n:
+                ending = n % 10
+                self.ending_counts[ending] += 1
+                if self.ending_first[ending] < 0:
+                    self.ending_first[ending] = row * 6 + col
+
+        self.total_draws += 1
+        self.last_draw = int(draw_number)
+        self.digest = None
+
+    def fold_matrix(self, matrix: DrawMatrix, start: int = 0) -> int:
+        """matrix[start:]의 회차를 순서대로 반영하고 반영한 회차 수 반환"""
+        rows = matrix.column_numbers[start:].tolist()
+        draws = matrix.draw_numbers[start:].tolist()
+        for numbers, draw_number in zip(rows, draws):
+            self.fold(numbers, draw_number)
+        self.digest = prefix_digest(matrix, self.total_draws)
+        return len(rows)
+
+    @classmethod
+    def from_matrix(cls, matrix: DrawMatrix) -> "AnalysisState":
+        """전체 이력에서 한 번에 생성 (fold를 모든 회차에 적용한 것과 같은 결과)"""
+        state = cls()
+        n = len(matrix)
+        state.total_draws = n
+        state.digest = prefix_digest(matrix)
+        if n == 0:
+            return state
+        state.last_draw = int(matrix.draw_numbers[-1])
+        columns = matrix.column_numbers.astype(np.int64)
+        numbers = matrix.numbers.astype(np.int64)
+        row_index = np.arange(n, dtype=np.int64)
+
+        state.frequency = matrix.onehot.sum(axis=0).astype(np.int64)
+        # 뒤 컬럼부터 덮어써서 가장 앞 컬럼의 첫 등장이 남도록
+        for col in range(columns.shape[1] - 1, -1, -1):
+            present = columns[:, col] > 0
+            first = _first_positions(columns[present, col] - 1, row_index[present], NUM_BALLS)
+            seen = first >= 0
+            state.first_col[seen] = col
+            state.first_row[seen] = first[seen]
+        ranges = range_ids(columns)
+        state.range_counts = np.bincount(ranges.ravel(), minlength=len(RANGE_LABELS)).astype(np.int64)
+        for col in range(ranges.shape[1] - 1, -1, -1):
+            first = _first_positions(ranges[:, col], row_index, len(RANGE_LABELS))
+            seen = first >= 0
+            state.range_first_col[seen] = col
+            state.range_first_row[seen] = first[seen]
+
+        nums, rows = np.nonzero(matrix.onehot.T)
+        same_number = nums[1:] == nums[:-1]
+        gaps = (rows[1:] - rows[:-1] - 1)[same_number]
+        gap_nums = nums[1:][same_number]
+        np.maximum.at(state.max_gap, gap_nums, gaps)
+        state.gap_sum = np.bincount(gap_nums, weights=gaps, minlength=NUM_BALLS).astype(np.int64)
+        state.gap_count = np.bincount(gap_nums, minlength=NUM_BALLS).astype(np.int64)
+        appearances = np.bincount(nums, minlength=NUM_BALLS)
+        seen = appearances > 0
+        state.last_row[seen] = rows[np.cumsum(appearances)[seen] - 1]
+        state.last_seen_draw[seen] = matrix.draw_numbers[state.last_row[seen]]
+
+        sums = numbers.sum(axis=1)
+        state.sum_counts = np.bincount(sums, minlength=_MAX_SUM + 1).astype(np.int64)
+        state.sum_first = _first_positions(sums, row_index, _MAX_SUM + 1)
+        row_gaps = np.diff(numbers, axis=1).ravel()
+        state.gap_counts = np.bincount(row_gaps, minlength=NUM_BALLS + 1).astype(np.int64)
+        state.gap_first = _first_positions(row_gaps, np.arange(row_gaps.size, dtype=np.int64), NUM_BALLS + 1)
+        primes = _PRIME_MASK[numbers].sum(axis=1)
+        state.prime_counts = np.bincount(primes, minlength=7).astype(np.int64)
+        state.prime_first = _first_positions(primes, row_index, 7)
+        flat = columns.ravel()
+        positions = np.flatnonzero(flat > 0)
+        endings = flat[positions] % 10
+        state.ending_counts = np.bincount(endings, minlength=10).astype(np.int64)
+        state.ending_first = _first_positions(endings, positions, 10)
+        state.pair_counts = pair_counts_from_matrix(matrix)
+        state.triple_counts = triple_counts_from_matrix(matrix)
+        return state
+
+    def covers_prefix_of(self, matrix: DrawMatrix) -> bool:
+        """상태가 matrix 앞 total_draws회차와 같은 이력인지 (회차 수/마지막 회차 확인 후 다이제스트 비교)"""
+        if self.total_draws == 0:
+            return True
+        if self.digest is None or self.total_draws > len(matrix):
+            return False
+        if self.total_draws and int(matrix.draw_numbers[self.total_draws - 1]) != self.last_draw:
+            return False
+        return prefix_digest(matrix, self.total_draws) == self.digest
+
+    def matches(self, matrix: DrawMatrix) -> bool:
+        """상태가 matrix 전체와 같은 이력인지"""
+        return self.total_draws == len(matrix) and self.covers_prefix_of(matrix)
+
+    # ------------------------------------------------------------------ 결과 (AnalysisService와 같은 형태)
+    def frequency_dict(self) -> Dict[int, int]:
+        seen = np.flatnonzero(self.first_col < _UNSEEN_COLUMN)
+        order = seen[np.lexsort((self.first_row[seen], self.first_col[seen]))]
+        return {int(k) + 1: int(self.frequency[k]) for k in order}
+
+    def odd_even_ratio(self) -> Dict[str, float]:
+        total_numbers = 6 * self.total_draws
+        return {
+            'odd_ratio': int(self.frequency[0::2].sum()) / total_numbers,
+            'even_ratio': int(self.frequency[1::2].sum()) / total_numbers
+        }
+
+    def number_ranges(self) -> Dict[str, int]:
+        seen = np.flatnonzero(self.range_first_col < _UNSEEN_COLUMN)
+        order = seen[np.lexsort((self.range_first_row[seen], self.range_first_col[seen]))]
+        return {RANGE_LABELS[r]: int(self.range_counts[r]) for r in order}
+
+    def missing_period_details(self) -> Dict[int, Dict[str, Any]]:
+        details = {}
+        for k in range(NUM_BALLS):
+            last = int(self.last_row[k])
+            details[k + 1] = {
+                'max_gap': int(self.max_gap[k]),
+                'mean_gap': float(self.gap_sum[k] / self.gap_count[k]) if self.gap_count[k] else 0.0,
+                'current_gap': self.total_draws - 1 - last if last >= 0 else self.total_draws,
+                'last_seen_draw': int(self.last_seen_draw[k]) if last >= 0 else None,
+            }
+        return details
+
+    def sum_patterns(self) -> Dict[str, Any]:
+        items = _ordered_items(self.sum_counts, self.sum_first)
+        present = np.flatnonzero(self.sum_counts)
+        avg, std = _histogram_stats(self.sum_counts)
+        return {
+            'min_sum': int(present.min()),
+            'max_sum': int(present.max()),
+            'avg_sum': avg,
+            'std_sum': std,
+            'sum_distribution': dict(items),
+            'most_common_sums': _most_common(items, 10)
+        }
+
+    def gap_patterns(self) -> Dict[str, Any]:
+        items = _ordered_items(self.gap_counts, self.gap_first)
+        present = np.flatnonzero(self.gap_counts)
+        avg, std = _histogram_stats(self.gap_counts)
+        return {
+            'min_gap': int(present.min()),
+            'max_gap': int(present.max()),
+            'avg_gap': avg,
+            'std_gap': std,
+            'gap_distribution': dict(items),
+            'most_common_gaps': _most_common(items, 10)
+        }
+
+    def prime_patterns(self) -> Dict[str, Any]:
+        items = _ordered_items(self.prime_counts, self.prime_first)
+        return {
+            'prime_numbers': list(PRIME_NUMBERS),
+            'avg_prime_count': float((np.arange(7) * self.prime_counts).sum() / self.total_draws),
+            'prime_count_distribution': dict(items),
+            'most_common_prime_count': _most_common(items)
+        }
+
+    def ending_patterns(self) -> Dict[str, Any]:
+        items = _ordered_items(self.ending_counts, self.ending_first)
+        return {
+            'ending_distribution': dict(items),
+            'most_common_endings': _most_common(items, 5)
+        }
+
+    def co_occurrence(self, top_n: int = 20, number: Optional[int] = None) -> Dict[str, Any]:
+        """동시 출현 상위 쌍/3개 조합 (number가 주어지면 그 번호를 포함하는 조합만)"""
+        return top_co_occurrences(self.pair_counts, self.triple_counts, self.total_draws, top_n, number)
+
+    # ------------------------------------------------------------------ 체크포인트
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'format_version': STATE_FORMAT_VERSION,
+            'version': self.version,
+            'last_draw': self.last_draw,
+            'total_draws': self.total_draws,
+            'digest': self.digest,
+        }
+        for name in _ARRAY_FIELDS:
+            data[name] = getattr(self, name).tolist()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["AnalysisState"]:
+        if data.get('format_version') != STATE_FORMAT_VERSION:
+            return None
+        state = cls()
+        state.version = data.get('version')
+        state.last_draw = int(data['last_draw'])
+        state.total_draws = int(data['total_draws'])
+        state.digest = data.get('digest')
+        for name in _ARRAY_FIELDS:
+            arr = np.asarray(data[name], dtype=np.int64)
+            if arr.shape != getattr(state, name).shape:
+                return None
+            setattr(state, name, arr)
+        return state
+
+    def save(self, path: str) -> None:
+        """체크포인트 기록 (임시 파일 + rename)"""
+        tmp = f"{path}.tmp.{os.getpid()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["AnalysisState"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_dict(json.load(f))
+        except Exception as e:
+            logger.warning(f"분석 상태 체크포인트 로드 실패(재생성): {e}")
+            return None
+
+
+def top_co_occurrences(pair_counts: np.ndarray, triple_counts: np.ndarray, total_draws: int,
+                       top_n: int = 20, number: Optional[int] = None) -> Dict[str, Any]:
+    """동시 출현 수 상위 top_n 쌍/3개 조합 (개수 내림차순, 동률은 번호 오름차순)"""
+    pairs_a, pairs_b = np.triu_indices(NUM_BALLS, k=1)
+    pair_values = pair_counts[pairs_a, pairs_b]
+    triples = TRIPLES
+    triple_values = triple_counts
+    if number is not None:
+        k = number - 1
+        pair_keep = (pairs_a == k) | (pairs_b == k)
+        pairs_a, pairs_b, pair_values = pairs_a[pair_keep], pairs_b[pair_keep], pair_values[pair_keep]
+        triple_keep = (triples == k).any(axis=1)
+        triples, triple_values = triples[triple_keep], triple_values[triple_keep]
+
+    # 조합 인덱스가 번호 사전순이므로 안정 정렬로 동률 순서가 정해진다
+    pair_order = np.argsort(-pair_values, kind='stable')[:top_n]
+    triple_order = np.argsort(-triple_values, kind='stable')[:top_n]
+    return {
+        'total_draws': int(total_draws),
+        'top_pairs': [
+            {'numbers': [int(pairs_a[i]) + 1, int(pairs_b[i]) + 1], 'count': int(pair_values[i])}
+            for i in pair_order if pair_values[i] > 0
+        ],
+        'top_triples': [
+            {'numbers': [int(x) + 1 for x in triples[i]], 'count': int(triple_values[i])}
+            for i in triple_order if triple_values[i] > 0
+        ]
+    }
@@ -1,48 +1,126 @@
 import pandas as pd
-import requests
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Callable, List, Dict, Optional, Tuple
+from datetime import datetime, timezone, timedelta
 import os
-import time
+import io
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl  # POSIX 전용: 워커 프로세스 간 쓰기 잠금
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .draw_collector import DrawCollector, ProgressCallback
+from .raw_archive import RawDrawArchive
+from .draw_matrix import DrawMatrix, matrix_for_frame, register_matrix
+from .analysis_state import AnalysisState
+from .draw_store import store_dir_for, write_draw_store, load_draw_arrays, frame_from_arrays
 
 logger = logging.getLogger(__name__)
 
+# 프로세스 공유 데이터셋 캐시: {파일 경로: ((mtime_ns, size), DataFrame)}
+# DataService 인스턴스가 여러 개(라우트/백그라운드 워커)여도 CSV 파싱은 버전당 1회만 수행
+_dataset_cache: Dict[str, Tuple[Tuple[int, ...], pd.DataFrame]] = {}
+_dataset_cache_lock = threading.Lock()
+
+# 추첨 일정: 1회차 2002-12-07(토) 20:45 KST, 이후 매주 토요일
+KST = timezone(timedelta(hours=9))
+FIRST_DRAW_AT = datetime(2002, 12, 7, 20, 45, tzinfo=KST)
+DRAW_INTERVAL = timedelta(days=7)
+
+# 최신 회차 캐시: {base_url: (회차, 만료 시각)} - 다음 예정 추첨 시각까지 유효
+_latest_draw_cache: Dict[str, Tuple[int, datetime]] = {}
+_latest_draw_lock = threading.Lock()
+
+_write_thread_lock = threading.Lock()
+# 증분 갱신(최신 회차 확인 → 수집 → 추가) 직렬화: 갱신기/라우트가 같은 회차를 동시에 수집하지 않도록
+_ingest_thread_lock = threading.Lock()
+
+# 누적 분석 상태: {파일 경로: AnalysisState} (체크포인트: <csv 이름>.analysis_state.json)
+_analysis_states: Dict[str, AnalysisState] = {}
+_analysis_state_lock = threading.Lock()
+
+# 데이터 파일 변경 시 호출할 파생 캐시(분석 결과 등) 무효화 콜백
+_invalidation_listeners: List[Callable[[str], None]] = []
+
+@contextmanager
+def _file_lock(lock_path: str, thread_lock: threading.Lock):
+    """스레드 잠금 + fcntl 파일 잠금 (fcntl 미지원 플랫폼은 스레드 잠금만)"""
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
 class DataService:
     """로또 데이터 수집 및 전처리 서비스"""
     
     def __init__(self):
-        self.base_url = "https://www.dhlottery.co.kr/common.do"
+        # 로컬 대역 서버로 교체 가능 (테스트/스테이징)
+        self.base_url = os.getenv("LOTTO_API_BASE_URL", "https://www.dhlottery.co.kr/common.do")
+        self._collector: Optional[DrawCollector] = None
         # backend 디렉토리 기준 절대 경로로 고정 (배포/로컬 모두 일관)
         backend_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.data_file = os.path.join(backend_root, "data", "lotto_data.csv")
+        # 회차별 원본 응답 아카이브 (재수집 시 네트워크보다 우선)
+        self.raw_archive_dir = os.path.join(backend_root, "data", "raw_archive")
         
-    def collect_lotto_data(self, start_draw: int = 1, end_draw: int = None) -> pd.DataFrame:
-        """동행복권 API에서 로또 데이터 수집"""
+    def collect_lotto_data(self, start_draw: int = 1, end_draw: int = None, resume: bool = False,
+                           progress_callback: Optional[ProgressCallback] = None) -> pd.DataFrame:
+        """동행복권 API에서 로또 데이터 수집 (커넥션 재사용 + 동시 수집)
+
+        resume=True면 이미 저장된 회차는 건너뛰고, 주기적으로 기존 데이터와 병합해 저장하여
+        중단되더라도 다음 호출이 마지막으로 저장된 지점부터 이어서 수집한다.
+        이 경우 반환값은 기존 데이터와 병합된 전체 데이터이다.
+        """
         try:
             if end_draw is None:
                 # 최신 회차 확인
                 end_draw = self._get_latest_draw_number()
-            
-            data = []
-            logger.info(f"로또 데이터 수집 시작: {start_draw}회차 ~ {end_draw}회차")
-            
-            for draw_no in range(start_draw, end_draw + 1):
-                try:
-                    draw_data = self._fetch_draw_data(draw_no)
-                    if draw_data:
-                        data.append(draw_data)
-                        logger.info(f"{draw_no}회차 데이터 수집 완료")
-                    else:
-                        logger.warning(f"{draw_no}회차 데이터 없음")
-                    
-                    # API 호출 간격 조절 (서버 부하 방지)
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"{draw_no}회차 데이터 수집 실패: {e}")
-                    continue
-            
+
+            existing_df = None
+            target_draws = list(range(start_draw, end_draw + 1))
+            if resume and os.path.exists(self.data_file):
+                existing_df = self.load_data()
+                persisted = set(int(x) for x in existing_df['draw_number'].dropna())
+                target_draws = [d for d in target_draws if d not in persisted]
+
+            logger.info(f"로또 데이터 수집 시작: {start_draw}회차 ~ {end_draw}회차 (대상 {len(target_draws)}회차)")
+
+            collected: Dict[int, Dict] = {}
+            checkpoint_every = self._get_checkpoint_every()
+            last_checkpoint = [0]
+
+            def parse(raw: Dict) -> Optional[Dict]:
+                row = self._parse_draw_response(raw)
+                if row:
+                    collected[int(row['draw_number'])] = row
+                return row
+
+            def on_progress(done: int, total: int, draw_no: int, ok: bool) -> None:
+                if resume and checkpoint_every > 0 and len(collected) - last_checkpoint[0] >= checkpoint_every:
+                    self.save_data(self._merge_draws(existing_df, list(collected.values())))
+                    last_checkpoint[0] = len(collected)
+                if progress_callback is not None:
+                    progress_callback(done, total, draw_no, ok)
+
+            self.collector.collect(target_draws, parse, progress_callback=on_progress)
+            data = [collected[d] for d in sorted(collected)]
+
+            if resume and existing_df is not None:
+                logger.info(f"이어받기 수집 완료: {len(data)}회차 추가")
+                return self._merge_draws(existing_df, data)
+
             if not data:
                 logger.warning("수집된 데이터가 없습니다. 샘플 데이터를 생성합니다.")
                 return self._generate_sample_data()
@@ -55,90 +133,179 @@ class DataService:
             logger.error(f"데이터 수집 중 오류 발생: {e}")
             logger.info("샘플 데이터로 대체합니다.")
             return self._generate_sample_data()
+
+    @property
+    def collector(self) -> DrawCollector:
+        """커넥션 풀을 공유하는 회차 수집기 (지연 생성)"""
+        if self._collector is None:
+            archive = RawDrawArchive(self.raw_archive_dir) if self._raw_archive_enabled() else None
+            self._collector = DrawCollector(self.base_url, archive=archive)
+        return self._collector
+
+    @staticmethod
+    def _raw_archive_enabled() -> bool:
+        return os.getenv('RAW_ARCHIVE_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes', 'y', 'on')
+
+    def rebuild_from_archive(self, save: bool = True) -> pd.DataFrame:
+        """원본 아카이브만으로 데이터셋 재구성 (네트워크 호출 없음)"""
+        archive = RawDrawArchive(self.raw_archive_dir)
+        rows = [row for _, payload in archive.iter_payloads()
+                if (row := self._parse_draw_response(payload))]
+        if not rows:
+            logger.warning("원본 아카이브가 비어 있습니다.")
+            return pd.DataFrame()
+        df = self._merge_draws(None, rows)
+        if save:
+            self.save_data(df)
+        logger.info(f"원본 아카이브에서 {len(df)}회차 재구성 완료")
+        return df
+
+    @staticmethod
+    def _get_checkpoint_every() -> int:
+        try:
+            return int(os.getenv('COLLECT_CHECKPOINT_EVERY', '100'))
+        except Exception:
+            return 100
+
+    @staticmethod
+    def _merge_draws(existing_df: Optional[pd.DataFrame], rows: List[Dict]) -> pd.DataFrame:
+        """기존 데이터와 새 회차 병합 (회차 기준 정렬/중복 제거)"""
+        new_df = pd.DataFrame(rows)
+        if existing_df is None or existing_df.empty:
+            merged = new_df
+        elif new_df.empty:
+            return existing_df
+        else:
+            merged = pd.concat([existing_df, new_df], ignore_index=True)
+        merged = merged.drop_duplicates(subset='draw_number', keep='last')
+        merged = merged.sort_values('draw_number').reset_index(drop=True)
+        merged['draw_date'] = pd.to_datetime(merged['draw_date'], format='mixed', errors='coerce')
+        return merged
     
     def _fetch_draw_data(self, draw_no: int) -> Optional[Dict]:
         """특정 회차의 로또 데이터 가져오기"""
         try:
-            url = f"{self.base_url}?method=getLottoNumber&drwNo={draw_no}"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get('returnValue') == 'success':
-                return {
-                    'draw_number': data['drwNo'],
-                    'draw_date': data['drwNoDate'],
-                    'number_1': data['drwtNo1'],
-                    'number_2': data['drwtNo2'],
-                    'number_3': data['drwtNo3'],
-                    'number_4': data['drwtNo4'],
-                    'number_5': data['drwtNo5'],
-                    'number_6': data['drwtNo6'],
-                    'bonus_number': data['bnusNo'],
-                    'total_sales': data.get('totSellamnt', 0),
-                    'first_prize_amount': data.get('firstWinamnt', 0),
-                    'first_prize_winners': data.get('firstPrzwnerCo', 0)
-                }
-            else:
-                logger.warning(f"{draw_no}회차: 유효하지 않은 응답")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"{draw_no}회차 API 호출 실패: {e}")
-            return None
+            raw = self.collector.fetch_raw(draw_no)
+            return self._parse_draw_response(raw) if raw else None
         except Exception as e:
             logger.error(f"{draw_no}회차 데이터 파싱 실패: {e}")
             return None
+
+    @staticmethod
+    def _parse_draw_response(data: Dict) -> Optional[Dict]:
+        """getLottoNumber 응답을 CSV 행 형식으로 변환"""
+        if data.get('returnValue') != 'success':
+            return None
+        return {
+            'draw_number': data['drwNo'],
+            'draw_date': data['drwNoDate'],
+            'number_1': data['drwtNo1'],
+            'number_2': data['drwtNo2'],
+            'number_3': data['drwtNo3'],
+            'number_4': data['drwtNo4'],
+            'number_5': data['drwtNo5'],
+            'number_6': data['drwtNo6'],
+            'bonus_number': data['bnusNo'],
+            'total_sales': data.get('totSellamnt', 0),
+            'first_prize_amount': data.get('firstWinamnt', 0),
+            'first_prize_winners': data.get('firstPrzwnerCo', 0)
+        }
     
-    def _get_latest_draw_number(self) -> int:
-        """최신 회차 번호 확인"""
+    def _get_latest_draw_number(self, now: Optional[datetime] = None) -> int:
+        """최신 회차 번호 확인 (추첨 일정 기반 추정 + 하향 갤로핑/이진 탐색 검증)
+
+        1회차(2002-12-07 20:45 KST) 이후 매주 토요일 추첨이므로 현재 시각으로 회차를 추정하고,
+        추정 회차가 아직 공개 전이거나 휴무로 밀린 경우에만 아래로 넓혀가며 확인한다.
+        보통 1~2회 호출로 끝나며, 결과는 다음 예정 추첨 시각까지 프로세스 내에 캐시한다.
+        """
+        now = now or datetime.now(KST)
+        with _latest_draw_lock:
+            cached = _latest_draw_cache.get(self.base_url)
+            if cached is not None and now < cached[1]:
+                return cached[0]
+
+            estimate = self._estimate_draw_number(now)
+            try:
+                latest = self._search_latest_draw(estimate)
+            except Exception as e:
+                logger.error(f"최신 회차 확인 중 오류: {e}")
+                latest = None
+
+            if latest is None:
+                if cached is not None:
+                    logger.warning(f"최신 회차 확인 실패, 이전 값 {cached[0]}회차 사용")
+                    return cached[0]
+                logger.warning(f"최신 회차 확인 실패, 일정 기반 추정치 {estimate}회차 사용")
+                return estimate
+
+            # 다음 회차 예정 시각까지 캐시. 예정 시각이 이미 지났다면(결과 공개 지연) 짧게 재확인
+            valid_until = self._draw_scheduled_at(latest + 1)
+            if valid_until <= now:
+                valid_until = now + timedelta(seconds=self._get_latest_retry_seconds())
+            _latest_draw_cache[self.base_url] = (latest, valid_until)
+            logger.info(f"최신 회차: {latest}회차 (추정 {estimate}회차, 캐시 만료 {valid_until.isoformat()})")
+            return latest
+
+    def _search_latest_draw(self, estimate: int, max_gallop_steps: int = 8) -> Optional[int]:
+        """estimate 이하에서 존재하는 가장 큰 회차 탐색"""
+        if self._fetch_draw_data(estimate):
+            return estimate
+        # 하향 갤로핑: estimate-1, -2, -4, ... 로 존재하는 하한을 찾는다
+        hi = estimate  # 존재하지 않음이 확인된 회차
+        lo = None
+        step = 1
+        for _ in range(max_gallop_steps):
+            probe = estimate - step
+            if probe < 1:
+                probe = 1
+            if self._fetch_draw_data(probe):
+                lo = probe
+                break
+            hi = probe
+            if probe == 1:
+                return None
+            step *= 2
+        if lo is None:
+            return None
+        # 이진 탐색: lo는 존재, hi는 미존재
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self._fetch_draw_data(mid):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    @staticmethod
+    def _draw_scheduled_at(draw_no: int) -> datetime:
+        """회차의 예정 추첨 시각(KST)"""
+        return FIRST_DRAW_AT + DRAW_INTERVAL * (draw_no - 1)
+
+    @staticmethod
+    def _estimate_draw_number(now: datetime) -> int:
+        """현재 시각 기준 이미 추첨되었어야 하는 마지막 회차"""
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=KST)
+        if now < FIRST_DRAW_AT:
+            return 1
+        return (now - FIRST_DRAW_AT) // DRAW_INTERVAL + 1
+
+    @staticmethod
+    def _get_latest_retry_seconds() -> int:
         try:
-            # 최근 회차부터 역순으로 확인
-            for draw_no in range(1200, 1100, -1):  # 1200회차부터 역순 확인
-                data = self._fetch_draw_data(draw_no)
-                if data:
-                    logger.info(f"최신 회차: {draw_no}회차")
-                    return draw_no
-            
-            # 기본값 반환
-            logger.warning("최신 회차 확인 실패, 기본값 1000 사용")
-            return 1000
-            
-        except Exception as e:
-            logger.error(f"최신 회차 확인 중 오류: {e}")
-            return 1000
+            return int(os.getenv('LATEST_DRAW_RETRY_SECONDS', '300'))
+        except Exception:
+            return 300
     
-    def _generate_sample_data(self) -> pd.DataFrame:
+    def _generate_sample_data(self, n_draws: int = 1000, seed: Optional[int] = None) -> pd.DataFrame:
         """샘플 로또 데이터 생성 (API 실패 시 사용)"""
-        import random
-        from datetime import datetime, timedelta
-        
+        from .synthetic_data import generate_synthetic_draws
+
         logger.info("샘플 데이터 생성 중...")
-        data = []
-        start_date = datetime(2002, 12, 7)  # 로또 시작일
-        
-        for i in range(1, 1001):  # 1000회차 샘플 데이터
-            draw_date = start_date + timedelta(days=i*7)
-            numbers = sorted(random.sample(range(1, 46), 6))
-            bonus = random.randint(1, 45)
-            
-            data.append({
-                'draw_number': i,
-                'draw_date': draw_date.strftime('%Y-%m-%d'),
-                'number_1': numbers[0],
-                'number_2': numbers[1],
-                'number_3': numbers[2],
-                'number_4': numbers[3],
-                'number_5': numbers[4],
-                'number_6': numbers[5],
-                'bonus_number': bonus,
-                'total_sales': random.randint(100000000000, 200000000000),
-                'first_prize_amount': random.randint(1000000000, 3000000000),
-                'first_prize_winners': random.randint(1, 20)
-            })
-        
-        return pd.DataFrame(data)
+        df = generate_synthetic_draws(n_draws, seed=seed)
+        # 기존 샘플과 같이 날짜는 문자열로 반환
+        df['draw_date'] = df['draw_date'].dt.strftime('%Y-%m-%d')
+        return df
     
     def preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """데이터 전처리"""
@@ -168,30 +335,387 @@ class DataService:
             raise
     
     def save_data(self, df: pd.DataFrame, filename: str = None) -> str:
-        """데이터를 CSV 파일로 저장"""
+        """데이터를 CSV 파일로 저장 (전체 재작성: 임시 파일 + rename으로 원자적 교체)"""
         if filename is None:
             filename = self.data_file
         
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        df.to_csv(filename, index=False, encoding='utf-8')
+        with self._write_lock(filename):
+            self._save_locked(df, filename)
+        # mtime 해상도가 낮은 파일시스템 대비: 버전 비교에 기대지 않고 즉시 무효화
+        self.invalidate_cache(filename)
         logger.info(f"데이터가 {filename}에 저장되었습니다.")
         return filename
+
+    def _save_locked(self, df: pd.DataFrame, filename: str) -> None:
+        """전체 재작성 본체 (호출자가 쓰기 잠금을 잡고 있어야 함)"""
+        tmp = f"{filename}.tmp"
+        df.to_csv(tmp, index=False, encoding='utf-8')
+        with open(tmp, 'rb') as f:
+            os.fsync(f.fileno())
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        os.replace(tmp, filename)
+        self._write_manifest(filename, df, checksum)
+        # CSV는 교환 포맷, 로드는 컬럼형 저장소 우선
+        write_draw_store(df, store_dir_for(filename), self._file_stat_key(filename))
+
+    def append_data(self, existing_df: pd.DataFrame, new_df: pd.DataFrame, filename: str = None) -> pd.DataFrame:
+        """새 회차 행만 CSV 끝에 추가 (O(새 회차) 쓰기)
+
+        추가 전 파일 크기를 manifest와 대조해 이전 추가가 중간에 끊긴 흔적(꼬리 바이트)을
+        잘라내고, 추가/fsync 후 manifest(마지막 회차, 크기, 체크섬)를 원자적으로 교체한다.
+        manifest 갱신 전에는 로더가 manifest 크기까지만 읽으므로 반쯤 쓰인 행이 노출되지 않는다.
+        쓰기 전에 manifest에 예정 크기(pending_size)를 기록해 두고, 꼬리 제거는 그 범위 안이면서
+        커밋된 앞부분이 manifest 체크섬과 같을 때만 한다. 파일이 외부에서 교체/추가되었으면
+        manifest를 버리고 파일 전체를 기준으로 삼는다.
+
+        existing_df는 호출자가 잠금 밖에서 읽은 사본일 수 있으므로 기준으로 쓰지 않는다.
+        잠금 안에서 파일에 커밋된 내용을 다시 읽어 그 마지막 회차 이하인 행은 버리고
+        (동시 갱신으로 이미 추가된 회차), manifest/저장소도 파일 내용 기준으로 기록한다.
+        반환값은 파일에 커밋된 전체 데이터이다.
+        """
+        if filename is None:
+            filename = self.data_file
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        with self._write_lock(filename):
+            if not os.path.exists(filename):
+                merged = self._merge_draws(existing_df, new_df.to_dict('records'))
+                self._save_locked(merged, filename)
+                appended = len(new_df)
+            else:
+                merged, appended = self._append_locked(new_df, filename)
+        if appended:
+            self.invalidate_cache(filename)
+            logger.info(f"{filename}에 {appended}회차 추가 저장")
+        else:
+            logger.info(f"{filename}: 추가할 새 회차 없음(이미 저장됨)")
+        return merged
+
+    def _append_locked(self, new_df: pd.DataFrame, filename: str) -> Tuple[pd.DataFrame, int]:
+        """append_data 본체 (쓰기 잠금 안) → (커밋된 전체 데이터, 추가한 회차 수)"""
+        with open(filename, 'rb') as f:
+            header = f.readline().decode('utf-8').strip()
+        columns = header.split(',')
+
+        manifest = self._committed_manifest(filename)
+        size = os.path.getsize(filename)
+        if manifest is not None and size > manifest['size']:
+            logger.warning(f"{filename}: 이전 추가가 완료되지 않은 꼬리 {size - manifest['size']}바이트 제거")
+            with open(filename, 'r+b') as f:
+                f.truncate(manifest['size'])
+            size = manifest['size']
+
+        # 파일에 실제로 커밋된 내용 (버전이 같으면 캐시/저장소에서, 아니면 CSV에서)
+        committed_df = self.load_data(filename)
+        try:
+            committed_last = int(committed_df['draw_number'].max()) if len(committed_df) else 0
+        except Exception:
+            committed_last = 0
+        rows = new_df[new_df['draw_number'] > committed_last]
+        rows = rows.drop_duplicates(subset='draw_number', keep='last').sort_values('draw_number')
+        if rows.empty:
+            return committed_df, 0
+
+        rows = rows.reindex(columns=columns)
+        if 'draw_date' in rows.columns:
+            rows['draw_date'] = pd.to_datetime(rows['draw_date'], format='mixed', errors='coerce').dt.strftime('%Y-%m-%d')
+        payload = rows.to_csv(index=False, header=False, encoding='utf-8', lineterminator='\n').encode('utf-8')
+
+        digest = self._hash_prefix(filename, size)
+        # 추가 의도 기록: 이 크기를 넘지 않는 꼬리만 '중단된 추가'로 간주
+        self._write_manifest(filename, committed_df, digest.hexdigest(), pending_size=size + len(payload) + 1)
+
+        with open(filename, 'ab') as f:
+            if size > 0:
+                with open(filename, 'rb') as r:
+                    r.seek(size - 1)
+                    if r.read(1) != b'\n':
+                        payload = b'\n' + payload
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 파일과 같은 순서/내용: 커밋된 행 + 방금 추가한 행
+        merged = pd.concat([committed_df, rows], ignore_index=True)
+        merged['draw_date'] = pd.to_datetime(merged['draw_date'], format='mixed', errors='coerce')
+        digest.update(payload)
+        self._write_manifest(filename, merged, digest.hexdigest())
+        # 컬럼형 저장소는 수 KB 수준이라 파일 내용으로 통째로 재기록
+        write_draw_store(merged, store_dir_for(filename), self._file_stat_key(filename))
+        return merged, len(rows)
+
+    @staticmethod
+    def _manifest_path(filename: str) -> str:
+        return os.path.splitext(filename)[0] + '.manifest.json'
+
+    def _read_manifest(self, filename: str) -> Optional[Dict]:
+        path = self._manifest_path(filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest if 'size' in manifest and 'checksum' in manifest else None
+        except Exception as e:
+            logger.warning(f"manifest 로드 실패(무시): {e}")
+            return None
+
+    def _write_manifest(self, filename: str, df: pd.DataFrame, checksum: str,
+                        pending_size: Optional[int] = None) -> None:
+        """manifest 기록: 마지막 회차, 행 수, 유효 크기, 체크섬, 파일 mtime/inode (임시 파일 + rename)
+
+        checksum은 커밋된 바이트(앞 size바이트)의 SHA-256이다. 추가로 만든 파일과 같은 내용을
+        통째로 다시 쓴 파일은 같은 값을 가진다. pending_size는 진행 중인 추가가 끝났을 때의 최대 크기.
+        """
+        try:
+            last_draw = int(df['draw_number'].max()) if len(df) else 0
+        except Exception:
+            last_draw = 0
+        st = os.stat(filename)
+        manifest = {
+            'last_draw': last_draw,
+            'rows': int(len(df)),
+            'size': st.st_size,
+            'checksum': checksum,
+            'csv_mtime_ns': st.st_mtime_ns,
+            'csv_ino': st.st_ino,
+            'pending_size': pending_size,
+            'updated_at': datetime.now(KST).isoformat(),
+        }
+        path = self._manifest_path(filename)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @contextmanager
+    def _write_lock(self, filename: str):
+        """데이터 파일 쓰기 잠금 (스레드 + 프로세스 간)"""
+        with _file_lock(f"{filename}.lock", _write_thread_lock):
+            yield
+
+    @contextmanager
+    def _ingest_lock(self, filename: str):
+        """증분 갱신 잠금 (스레드 + 프로세스 간)
+
+        네트워크 수집 동안 잡고 있으므로 쓰기 잠금과 분리한다(수집 중에도 save_data/로드는 진행).
+        """
+        with _file_lock(f"{filename}.ingest.lock", _ingest_thread_lock):
+            yield
     
     def load_data(self, filename: str = None) -> pd.DataFrame:
-        """CSV 파일에서 데이터 로드"""
+        """CSV 파일에서 데이터 로드 (파일 버전 기준 프로세스 공유 캐시 사용)
+
+        반환되는 DataFrame은 캐시 원본의 얕은 사본입니다. 컬럼 추가/교체는 사본에만
+        반영되지만, 값의 제자리 수정(df.loc[...] = ...)은 금지합니다.
+        """
         if filename is None:
             filename = self.data_file
         
         if os.path.exists(filename):
-            df = pd.read_csv(filename, encoding='utf-8')
-            # 다양한 포맷 혼재 대비
-            df['draw_date'] = pd.to_datetime(df['draw_date'], format='mixed', errors='coerce')
-            return df
+            stat_key = self._file_stat_key(filename)
+            with _dataset_cache_lock:
+                cached = _dataset_cache.get(filename)
+            if cached is not None and cached[0] == stat_key:
+                return self._readonly_view(cached[1])
+
+            arrays = load_draw_arrays(store_dir_for(filename), csv_stat=stat_key)
+            df = self._frame_from_store(arrays)
+            from_store = df is not None
+            if df is None:
+                df = self._read_csv_committed(filename)
+                # 다양한 포맷 혼재 대비
+                df['draw_date'] = pd.to_datetime(df['draw_date'], format='mixed', errors='coerce')
+                # CSV가 외부에서 갱신된 경우 저장소를 다시 만들어 다음 로드(다른 워커 포함)부터 사용
+                # (저장소 잠금 안에서 기록하고, 다른 워커가 먼저 같은 버전으로 만들었으면 건너뜀)
+                write_draw_store(df, store_dir_for(filename), stat_key)
+            df.attrs['dataset_version'] = self._format_version(df, self._content_hash(filename))
+            if from_store:
+                # 저장소의 메모리 매핑 배열로 만든 DrawMatrix를 등록해 워커 간 페이지 공유
+                try:
+                    register_matrix(df, DrawMatrix.from_arrays(arrays))
+                except Exception as e:
+                    logger.warning(f"저장소 DrawMatrix 등록 실패(무시): {e}")
+
+            # 읽는 도중 파일이 교체되었다면 캐시하지 않음(다음 호출에서 재적재)
+            if self._file_stat_key(filename) == stat_key:
+                with _dataset_cache_lock:
+                    _dataset_cache[filename] = (stat_key, df)
+                logger.info(f"데이터셋 캐시 갱신: {df.attrs['dataset_version']}")
+            return self._readonly_view(df)
         else:
             # 초기 배포 등 첫 실행에서는 수집이 매우 오래 걸릴 수 있으므로, 우선 샘플 데이터로 즉시 응답
             logger.warning(f"파일 {filename}이 존재하지 않습니다. 우선 샘플 데이터로 대체합니다.")
             return self._generate_sample_data()
     
+    def get_dataset_version(self, filename: str = None) -> Optional[str]:
+        """현재 데이터셋 버전 문자열 반환 (최신 회차:내용 해시 16자리)
+
+        파생 캐시(분석/예측 결과)의 키로 사용합니다. 내용 기준이라 재시작/재배포 후에도
+        같은 데이터면 같은 값이며, 샘플 데이터(파일 없음)는 None입니다.
+        """
+        return self.load_data(filename).attrs.get('dataset_version')
+
+    def get_draw_matrix(self, df: pd.DataFrame = None) -> DrawMatrix:
+        """현재 데이터셋(또는 주어진 프레임)의 DrawMatrix (데이터셋 버전당 1회 생성)"""
+        if df is None:
+            df = self.load_data()
+        return matrix_for_frame(df)
+
+    def get_analysis_state(self, df: pd.DataFrame = None) -> Optional[AnalysisState]:
+        """현재 데이터셋 버전의 누적 분석 상태 (샘플 데이터면 None)
+
+        메모리/체크포인트의 상태가 이전 버전이면 새 회차만 fold로 반영하고,
+        반영한 앞부분이 달라졌으면(재수집, 과거 회차 수정 등) 전체 이력에서 다시 만든다. 갱신 후 체크포인트를 기록한다.
+        """
+        if df is None:
+            df = self.load_data()
+        version = df.attrs.get('dataset_version')
+        if not version:
+            return None
+        filename = self.data_file
+        with _analysis_state_lock:
+            state = _analysis_states.get(filename)
+            if state is None:
+                state = AnalysisState.load(self._analysis_state_path(filename))
+            if state is not None and state.version == version:
+                _analysis_states[filename] = state
+                return state
+
+            matrix = matrix_for_frame(df)
+            if state is not None and state.covers_prefix_of(matrix):
+                # 읽는 쪽이 보고 있을 수 있으므로 사본에 반영
+                state = state.copy()
+                folded = state.fold_matrix(matrix, start=state.total_draws)
+                logger.info(f"분석 상태 갱신: {folded}회차 반영 (마지막 {state.last_draw}회차)")
+            else:
+                state = AnalysisState.from_matrix(matrix)
+                logger.info(f"분석 상태 생성: {state.total_draws}회차")
+            state.version = version
+            try:
+                state.save(self._analysis_state_path(filename))
+            except Exception as e:
+                logger.error(f"분석 상태 체크포인트 저장 실패(무시): {e}")
+            _analysis_states[filename] = state
+            return state
+
+    @staticmethod
+    def _analysis_state_path(filename: str) -> str:
+        return os.path.splitext(filename)[0] + '.analysis_state.json'
+
+    def invalidate_cache(self, filename: str = None) -> None:
+        """데이터셋 캐시 무효화 (등록된 파생 캐시 무효화 콜백도 호출)"""
+        if filename is None:
+            filename = self.data_file
+        with _dataset_cache_lock:
+            _dataset_cache.pop(filename, None)
+        for listener in list(_invalidation_listeners):
+            try:
+                listener(filename)
+            except Exception as e:
+                logger.error(f"캐시 무효화 콜백 오류(무시): {e}")
+
+    @staticmethod
+    def add_invalidation_listener(listener: Callable[[str], None]) -> None:
+        """데이터 파일 저장/추가 시 호출될 콜백 등록 (인자: 데이터 파일 경로)"""
+        if listener not in _invalidation_listeners:
+            _invalidation_listeners.append(listener)
+
+    def _committed_manifest(self, filename: str) -> Optional[Dict]:
+        """파일의 커밋된 앞부분과 일치하는 manifest만 반환
+
+        파일 크기/mtime/inode가 기록과 같으면 그대로 믿고, 다르면 앞 size바이트를 다시 해시해
+        체크섬과 비교한다. size를 넘는 꼬리는 같은 파일(inode)에 기록된 추가 의도(pending_size)
+        범위 안일 때만 중단된 추가로 본다. 파일이 외부에서 교체/수정되었으면(git pull, 수동 편집 등)
+        None을 반환해 파일 전체를 커밋된 데이터로 취급한다.
+        """
+        manifest = self._read_manifest(filename)
+        if manifest is None:
+            return None
+        st = os.stat(filename)
+        if st.st_size < manifest['size']:
+            logger.warning(f"{filename}: 파일이 manifest 크기보다 작음 - manifest 무시")
+            return None
+        if st.st_size > manifest['size']:
+            pending_size = manifest.get('pending_size')
+            if pending_size is None or st.st_size > pending_size or manifest.get('csv_ino') != st.st_ino:
+                logger.warning(f"{filename}: manifest 이후 외부에서 변경된 파일 - manifest 무시")
+                return None
+        elif manifest.get('csv_mtime_ns') == st.st_mtime_ns and manifest.get('csv_ino') == st.st_ino:
+            return manifest
+        if self._hash_prefix(filename, manifest['size']).hexdigest() != manifest['checksum']:
+            logger.warning(f"{filename}: 커밋된 내용이 manifest와 다름(외부 교체/수정) - manifest 무시")
+            return None
+        return manifest
+
+    @staticmethod
+    def _hash_prefix(filename: str, size: int):
+        """파일 앞 size바이트의 SHA-256 해시 객체 (이어서 update 가능)"""
+        digest = hashlib.sha256()
+        remaining = size
+        with open(filename, 'rb') as f:
+            while remaining > 0:
+                block = f.read(min(1 << 20, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return digest
+
+    def _read_csv_committed(self, filename: str) -> pd.DataFrame:
+        """manifest에 기록된 크기까지만 CSV 파싱 (진행 중/중단된 추가분 제외)"""
+        manifest = self._committed_manifest(filename)
+        if manifest is not None and os.path.getsize(filename) > manifest['size']:
+            with open(filename, 'rb') as f:
+                committed = f.read(manifest['size'])
+            return pd.read_csv(io.BytesIO(committed), encoding='utf-8')
+        return pd.read_csv(filename, encoding='utf-8')
+
+    @staticmethod
+    def _frame_from_store(arrays: Optional[Dict]) -> Optional[pd.DataFrame]:
+        """원본 CSV와 버전이 일치하는 컬럼형 저장소 배열을 DataFrame으로 변환 (없거나 실패하면 None)"""
+        if arrays is None:
+            return None
+        try:
+            return frame_from_arrays(arrays)
+        except Exception as e:
+            logger.warning(f"컬럼형 저장소 변환 실패, CSV로 대체: {e}")
+            return None
+
+    def _file_stat_key(self, filename: str) -> Tuple[int, ...]:
+        """(CSV mtime_ns, CSV size, manifest mtime_ns) - 추가 커밋(manifest 교체)도 버전 변경으로 인식"""
+        st = os.stat(filename)
+        try:
+            manifest_mtime = os.stat(self._manifest_path(filename)).st_mtime_ns
+        except OSError:
+            manifest_mtime = 0
+        return (st.st_mtime_ns, st.st_size, manifest_mtime)
+
+    def _content_hash(self, filename: str) -> str:
+        """커밋된 데이터 내용의 SHA-256: 유효한 manifest의 체크섬, 없으면 파일 전체 해시"""
+        manifest = self._committed_manifest(filename)
+        if manifest is not None:
+            return manifest['checksum']
+        return self._hash_prefix(filename, os.path.getsize(filename)).hexdigest()
+
+    @staticmethod
+    def _format_version(df: pd.DataFrame, content_hash: str) -> str:
+        try:
+            latest = int(df['draw_number'].max()) if len(df) else 0
+        except Exception:
+            latest = 0
+        return f"{latest}:{content_hash[:16]}"
+
+    @staticmethod
+    def _readonly_view(df: pd.DataFrame) -> pd.DataFrame:
+        """캐시 원본을 보호하기 위한 얕은 사본 (데이터 버퍼는 공유)"""
+        view = df.copy(deep=False)
+        view.attrs = dict(df.attrs)
+        return view
+
     def get_data_summary(self, df: pd.DataFrame) -> Dict:
         """데이터 요약 정보 반환"""
         try:
@@ -240,40 +764,51 @@ class DataService:
             }
     
     def update_latest_data(self) -> pd.DataFrame:
-        """최신 데이터만 업데이트"""
+        """최신 데이터만 업데이트
+
+        갱신기(DrawRefresher)와 /data/update, /data/match-latest가 동시에 호출할 수 있으므로
+        최신 회차 확인부터 추가까지 증분 갱신 잠금으로 직렬화한다. 잠금을 얻은 뒤 저장된 데이터를
+        다시 읽으므로, 앞선 호출이 이미 반영한 회차는 다시 수집하지 않는다.
+        """
         try:
-            # 기존 데이터 로드
-            existing_df = self.load_data()
-            latest_draw = existing_df['draw_number'].max()
+            with self._ingest_lock(self.data_file):
+                return self._update_latest_locked()
+        except Exception as e:
+            logger.error(f"데이터 업데이트 중 오류: {e}")
+            return self.load_data()
+
+    def _update_latest_locked(self) -> pd.DataFrame:
+        """update_latest_data 본체 (증분 갱신 잠금 안)"""
+        # 기존 데이터 로드 (잠금 대기 중 다른 호출이 추가했다면 그 결과)
+        existing_df = self.load_data()
+        latest_draw = existing_df['draw_number'].max()
+
+        # 최신 회차 확인
+        current_latest = self._get_latest_draw_number()
+        
+        if current_latest > latest_draw:
+            logger.info(f"새로운 데이터 발견: {latest_draw + 1}회차 ~ {current_latest}회차")
+            new_data = self.collect_lotto_data(latest_draw + 1, current_latest)
             
-            # 최신 회차 확인
-            current_latest = self._get_latest_draw_number()
+            # 수집 실패 시 반환되는 샘플 데이터가 섞이지 않도록 새 회차만 남김
+            if not new_data.empty:
+                new_data = new_data[new_data['draw_number'] > latest_draw]
             
-            if current_latest > latest_draw:
-                logger.info(f"새로운 데이터 발견: {latest_draw + 1}회차 ~ {current_latest}회차")
-                new_data = self.collect_lotto_data(latest_draw + 1, current_latest)
-                
-                if not new_data.empty:
-                    # 기존 데이터와 병합
-                    updated_df = pd.concat([existing_df, new_data], ignore_index=True)
-                    updated_df = updated_df.sort_values('draw_number').reset_index(drop=True)
-                    # 날짜 컬럼 일괄 보정
-                    try:
-                        updated_df['draw_date'] = pd.to_datetime(updated_df['draw_date'], format='mixed', errors='coerce')
-                    except Exception:
-                        updated_df['draw_date'] = pd.to_datetime(updated_df['draw_date'], errors='coerce')
-                    
-                    # 저장
-                    self.save_data(updated_df)
-                    logger.info(f"데이터 업데이트 완료: {len(new_data)}회차 추가")
-                    return updated_df
-                else:
-                    logger.info("새로운 데이터가 없습니다.")
-                    return existing_df
+            if not new_data.empty:
+                # 새 회차만 CSV 끝에 추가 (전체 재작성 없음)
+                self.append_data(existing_df, new_data)
+                # 버전 정보(dataset_version)가 붙은 캐시 프레임으로 반환
+                updated_df = self.load_data()
+                # 누적 분석 상태에 새 회차만 반영 (전체 재계산 없음)
+                try:
+                    self.get_analysis_state(updated_df)
+                except Exception as e:
+                    logger.error(f"분석 상태 갱신 실패(무시): {e}")
+                logger.info(f"데이터 업데이트 완료: {len(new_data)}회차 추가")
+                return updated_df
             else:
-                logger.info("이미 최신 데이터입니다.")
+                logger.info("새로운 데이터가 없습니다.")
                 return existing_df
-                
-        except Exception as e:
-            logger.error(f"데이터 업데이트 중 오류: {e}")
-            return self.load_data()
+        else:
+            logger.info("이미 최신 데이터입니다.")
+            return existing_df
@@ -0,0 +1,152 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .raw_archive import RawDrawArchive
+
+logger = logging.getLogger(__name__)
+
+# 진행 콜백: (완료 수, 전체 수, 회차, 성공 여부)
+ProgressCallback = Callable[[int, int, int, bool], None]
+
+
+def _env_number(name: str, default_value, cast):
+    try:
+        return cast(os.getenv(name, default_value))
+    except Exception:
+        return cast(default_value)
+
+
+class RateLimiter:
+    """스레드 안전 최소 간격 기반 호출 제한기 (초당 rate회)"""
+
+    def __init__(self, rate_per_sec: float):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec and rate_per_sec > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class DrawCollector:
+    """동행복권 getLottoNumber 회차 수집기
+
+    - 세션/커넥션 풀 재사용(requests.Session + HTTPAdapter)
+    - 스레드 풀 기반 동시 수집(최대 max_workers)
+    - 회차별 지수 백오프 재시도, 전역 호출 속도 제한
+    - archive가 주어지면 원본 응답을 먼저 아카이브에서 찾고, 새로 받은 응답은 아카이브에 기록
+    base_url을 로컬 대역 서버로 바꾸면 외부 호출 없이 테스트할 수 있다.
+    """
+
+    def __init__(self, base_url: str, max_workers: int = None, rate_limit_per_sec: float = None,
+                 max_retries: int = None, backoff_base: float = 0.5, timeout: float = 10.0,
+                 session: Optional[requests.Session] = None, archive: Optional[RawDrawArchive] = None):
+        self.base_url = base_url
+        self.archive = archive
+        self.max_workers = max_workers or _env_number('COLLECT_MAX_WORKERS', 4, int)
+        self.max_retries = max_retries if max_retries is not None else _env_number('COLLECT_MAX_RETRIES', 3, int)
+        rate = rate_limit_per_sec if rate_limit_per_sec is not None else _env_number('COLLECT_RATE_LIMIT', 10.0, float)
+        self.rate_limiter = RateLimiter(rate)
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.session = session or self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, self.max_workers))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def fetch_raw(self, draw_no: int) -> Optional[Dict]:
+        """회차 원본 JSON 반환. 존재하지 않는 회차(returnValue != success)는 None.
+
+        아카이브에 있으면 네트워크를 호출하지 않는다.
+        네트워크 오류/5xx/429는 지수 백오프로 재시도하고, 모두 실패하면 None.
+        """
+        if self.archive is not None:
+            try:
+                archived = self.archive.get(draw_no)
+            except Exception as e:
+                # 아카이브를 읽을 수 없으면 캐시 미스로 보고 네트워크에서 다시 받는다
+                logger.error(f"{draw_no}회차 아카이브 읽기 실패(네트워크로 대체): {e}")
+                archived = None
+            if archived is not None:
+                return archived
+        data = self._fetch_remote(draw_no)
+        if data is not None and self.archive is not None:
+            try:
+                self.archive.put(draw_no, data)
+            except Exception as e:
+                logger.error(f"{draw_no}회차 원본 아카이브 기록 실패(무시): {e}")
+        return data
+
+    def _fetch_remote(self, draw_no: int) -> Optional[Dict]:
+        params = {'method': 'getLottoNumber', 'drwNo': draw_no}
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise requests.exceptions.HTTPError(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                data = response.json()
+                if data.get('returnValue') == 'success':
+                    return data
+                logger.warning(f"{draw_no}회차: 유효하지 않은 응답")
+                return None
+            except (requests.exceptions.RequestException, ValueError) as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"{draw_no}회차 API 호출 실패({attempt + 1}회 시도): {e}")
+                    return None
+                delay = self.backoff_base * (2 ** attempt) * (1 + random.random() * 0.25)
+                logger.info(f"{draw_no}회차 재시도 대기 {delay:.2f}s: {e}")
+                time.sleep(delay)
+        return None
+
+    def collect(self, draw_numbers: Iterable[int], parse: Callable[[Dict], Optional[Dict]],
+                progress_callback: Optional[ProgressCallback] = None) -> Dict[int, Dict]:
+        """여러 회차를 동시 수집하여 {회차: parse(원본)} 반환 (실패 회차는 제외)"""
+        draw_list = list(draw_numbers)
+        total = len(draw_list)
+        results: Dict[int, Dict] = {}
+        if total == 0:
+            return results
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_raw, draw_no): draw_no for draw_no in draw_list}
+            for future in as_completed(futures):
+                draw_no = futures[future]
+                row = None
+                try:
+                    raw = future.result()
+                    row = parse(raw) if raw else None
+                except Exception as e:
+                    logger.error(f"{draw_no}회차 데이터 파싱 실패: {e}")
+                if row:
+                    results[draw_no] = row
+                done += 1
+                if progress_callback is not None:
+                    try:
+                        progress_callback(done, total, draw_no, row is not None)
+                    except Exception as e:
+                        logger.error(f"수집 진행 콜백 오류(무시): {e}")
+                if done % 50 == 0 or done == total:
+                    logger.info(f"로또 데이터 수집 진행: {done}/{total} (성공 {len(results)})")
+        return results
@@ -0,0 +1,279 @@
+"""
+DrawMatrix: 회차 데이터의 연속 배열 표현
+
+분석/예측 루틴이 DataFrame 행(iterrows) 대신 연속 NumPy 배열을 사용하도록,
+데이터셋 버전당 한 번 만들어 공유한다. 회차당 약 80바이트:
+- numbers  : N×6 uint8 오름차순 정렬 번호
+- column_numbers : N×6 uint8 원본 컬럼(number_1~6) 순서 번호 (기존 Counter 순서 재현용)
+- onehot   : N×45 bool 출현 행렬 (열 k-1 = 번호 k)
+- bitmask  : N uint64 비트마스크 (비트 k-1 = 번호 k)
+- bonus    : N uint8 보너스 번호
+- draw_numbers : N int32 회차, draw_dates : N datetime64[D]
+모든 배열은 읽기 전용이다. 컬럼형 저장소(draw_store)에서 만들면 배열이 메모리 매핑이라
+같은 저장소를 연 워커 프로세스들이 물리 페이지를 공유한다.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NUMBER_COLUMNS = ['number_1', 'number_2', 'number_3', 'number_4', 'number_5', 'number_6']
+NUM_BALLS = 45
+
+_MATRIX_CACHE_SIZE = 8
+# 감쇠 빈도 계산 시 float64로 변환하는 원-핫 행 수 (약 23MB)
+_DECAY_CHUNK_ROWS = 1 << 16
+_matrix_cache: "OrderedDict[Tuple[str, str], DrawMatrix]" = OrderedDict()
+_matrix_cache_lock = threading.Lock()
+
+
+def _readonly(arr: np.ndarray) -> np.ndarray:
+    arr.flags.writeable = False
+    return arr
+
+
+# 저장소에 그대로 기록/매핑하는 파생 배열 (속성 이름)
+MATRIX_ARRAYS = ('numbers', 'column_numbers', 'onehot', 'bitmask', 'valid_counts')
+
+
+class DrawMatrix:
+    """정렬 번호/원-핫/비트마스크 기반 회차 행렬"""
+
+    def __init__(self, numbers: np.ndarray, bonus: np.ndarray, draw_numbers: np.ndarray,
+                 draw_dates: Optional[np.ndarray] = None, version: Optional[str] = None):
+        raw = np.asarray(numbers)
+        n = raw.shape[0]
+        # 범위 밖/결측(0 등)은 원-핫/비트마스크에서 제외
+        valid = (raw >= 1) & (raw <= NUM_BALLS)
+        sorted_numbers = np.sort(np.where(valid, raw, 0), axis=1).astype(np.uint8)
+
+        onehot = np.zeros((n, NUM_BALLS), dtype=bool)
+        rows, cols = np.nonzero(valid)
+        onehot[rows, raw[rows, cols].astype(np.intp) - 1] = True
+
+        # 비트 k-1 = 번호 k → 원-핫 행을 2의 거듭제곱 가중합으로 압축
+        weights = np.left_shift(np.uint64(1), np.arange(NUM_BALLS, dtype=np.uint64))
+        bitmask = (onehot.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+        self.numbers = _readonly(sorted_numbers)
+        self.column_numbers = _readonly(np.where(valid, raw, 0).astype(np.uint8))
+        self.onehot = _readonly(onehot)
+        self.bitmask = _readonly(bitmask)
+        self.bonus = _readonly(np.asarray(bonus).astype(np.uint8))
+        self.draw_numbers = _readonly(np.asarray(draw_numbers).astype(np.int32))
+        if draw_dates is None:
+            draw_dates = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+        self.draw_dates = _readonly(np.asarray(draw_dates).astype('datetime64[D]'))
+        self.valid_counts = _readonly(valid.sum(axis=1).astype(np.uint8))
+        self.version = version
+        self._prefix_counts: Optional[np.ndarray] = None
+        self._decayed_counts: Dict[float, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return int(self.numbers.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.numbers, self.column_numbers, self.onehot, self.bitmask, self.bonus,
+                  self.draw_numbers, self.draw_dates, self.valid_counts]
+        if self._prefix_counts is not None:
+            arrays.append(self._prefix_counts)
+        return int(sum(a.nbytes for a in arrays))
+
+    @property
+    def prefix_counts(self) -> np.ndarray:
+        """(N+1)×45 int32 누적 출현 수 (처음 접근 시 1회 생성)
+
+        prefix_counts[hi] - prefix_counts[lo] = lo~hi-1행 구간의 번호별 출현 수.
+        """
+        if self._prefix_counts is None:
+            prefix = np.zeros((len(self) + 1, NUM_BALLS), dtype=np.int32)
+            np.cumsum(self.onehot, axis=0, dtype=np.int32, out=prefix[1:])
+            self._prefix_counts = _readonly(prefix)
+        return self._prefix_counts
+
+    def row_range(self, start_draw: Optional[int] = None, end_draw: Optional[int] = None,
+                  window: Optional[int] = None) -> Tuple[int, int]:
+        """회차 범위 → 행 구간 [lo, hi) (draw_numbers 오름차순 가정)
+
+        start_draw/end_draw는 포함 경계, window가 주어지면 구간 끝에서 최대 window개 회차로 제한.
+        """
+        lo = 0 if start_draw is None else int(np.searchsorted(self.draw_numbers, start_draw, side='left'))
+        hi = len(self) if end_draw is None else int(np.searchsorted(self.draw_numbers, end_draw, side='right'))
+        if window is not None:
+            lo = max(lo, hi - window)
+        return lo, max(lo, hi)
+
+    def range_counts(self, lo: int, hi: int) -> np.ndarray:
+        """행 구간 [lo, hi)의 번호별 출현 수 (45개 원소 뺄셈)"""
+        prefix = self.prefix_counts
+        return prefix[hi] - prefix[lo]
+
+    def decayed_counts(self, half_life: float) -> np.ndarray:
+        """반감기 half_life(회차) 지수감쇠 가중 번호별 출현 수 (45 float64, 반감기별 1회 계산)
+
+        가중치 w[i] = exp(-ln2/half_life × (N-1-i)) (최신 회차 1.0) 벡터와 원-핫 행렬의 곱 w·onehot.
+        """
+        counts = self._decayed_counts.get(half_life)
+        if counts is None:
+            n = len(self)
+            lam = np.log(2) / float(half_life)
+            weights = np.exp(-lam * np.arange(n - 1, -1, -1, dtype=np.float64))
+            counts = np.zeros(NUM_BALLS, dtype=np.float64)
+            # float 변환 원-핫을 한 번에 만들지 않도록 행 청크 단위 BLAS 곱
+            for start in range(0, n, _DECAY_CHUNK_ROWS):
+                stop = min(start + _DECAY_CHUNK_ROWS, n)
+                counts += weights[start:stop] @ self.onehot[start:stop].astype(np.float64)
+            counts = _readonly(counts)
+            self._decayed_counts[half_life] = counts
+        return counts
+
+    def first_seen_order(self, rows: Optional[np.ndarray] = None, row_major: bool = False) -> np.ndarray:
+        """번호를 '컬럼 우선(number_1 전체 → number_2 전체 ...)' 순회 시 처음 등장한 순서로 반환
+
+        기존 구현의 Counter(컬럼별 tolist 연결) 키 순서와 같아, 동률 정렬 결과가 그대로 유지된다.
+        rows(불리언 마스크/인덱스)가 주어지면 해당 회차만 대상으로 한다.
+        row_major=True면 '행 우선(회차별 number_1~6)' 순회 기준 순서를 반환한다.
+        """
+        cols = self.column_numbers if rows is None else self.column_numbers[rows]
+        flat = cols.ravel() if row_major else cols.T.ravel()
+        flat = flat[flat > 0]
+        if flat.size == 0:
+            return np.empty(0, dtype=np.intp)
+        uniq, first_idx = np.unique(flat, return_index=True)
+        return uniq[np.argsort(first_idx, kind='stable')].astype(np.intp)
+
+    def date_parts(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(월 1~12, 일 1~31, 요일 0=월~6=일) int 배열. 날짜가 없는(NaT) 회차는 -1."""
+        dates = self.draw_dates
+        missing = np.isnat(dates)
+        months_since_epoch = dates.astype('datetime64[M]')
+        month = months_since_epoch.astype(np.int64) % 12 + 1
+        day = (dates - months_since_epoch.astype('datetime64[D]')).astype(np.int64) + 1
+        # 1970-01-01은 목요일(3)
+        weekday = (dates.astype(np.int64) + 3) % 7
+        for part in (month, day, weekday):
+            part[missing] = -1
+        return month, day, weekday
+
+    def group_counts(self, group_ids: np.ndarray, n_groups: int) -> np.ndarray:
+        """그룹별 45개 번호 출현 수 (n_groups×45). group_ids < 0 인 회차는 제외.
+
+        원-핫 행렬의 출현 위치를 (그룹, 번호) 칸으로 한 번에 scatter-add 한다.
+        """
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        rows, cols = np.nonzero(self.onehot)
+        gids = group_ids[rows]
+        keep = gids >= 0
+        keys = gids[keep] * NUM_BALLS + cols[keep]
+        return np.bincount(keys, minlength=n_groups * NUM_BALLS).reshape(n_groups, NUM_BALLS)
+
+    def group_first_seen(self, group_ids: np.ndarray, n_groups: int) -> np.ndarray:
+        """그룹별 first_seen_order 위치 (n_groups×45, 미출현 번호는 -1)
+
+        위치는 '컬럼 우선' 순회 인덱스라서, 그룹 안에서 이 값의 오름차순이
+        first_seen_order(rows=그룹 마스크)와 같다.
+        """
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        # 컬럼 우선(전치) 순회 순서대로 펼침
+        flat = self.column_numbers.T.ravel().astype(np.int64)
+        gids = np.tile(group_ids, self.column_numbers.shape[1])
+        keep = (flat > 0) & (gids >= 0)
+        positions = np.flatnonzero(keep)
+        keys = gids[keep] * NUM_BALLS + (flat[keep] - 1)
+        first = np.full(n_groups * NUM_BALLS, -1, dtype=np.int64)
+        # 첫 등장은 대개 앞부분에 몰려 있으므로 앞에서부터 청크 단위로 찾고, 모두 찾으면 중단
+        remaining = int(np.count_nonzero(np.bincount(keys, minlength=n_groups * NUM_BALLS)))
+        chunk = max(4096, n_groups * NUM_BALLS * 8)
+        for start in range(0, len(keys), chunk):
+            if remaining == 0:
+                break
+            uniq, first_idx = np.unique(keys[start:start + chunk], return_index=True)
+            new = first[uniq] < 0
+            first[uniq[new]] = positions[start + first_idx[new]]
+            remaining -= int(new.sum())
+        return first.reshape(n_groups, NUM_BALLS)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: Optional[str] = None) -> "DrawMatrix":
+        """DataFrame(number_1~6, bonus_number, draw_number, draw_date)에서 생성"""
+        numbers = df[NUMBER_COLUMNS].fillna(0).to_numpy()
+        bonus = df['bonus_number'].fillna(0).to_numpy() if 'bonus_number' in df.columns else np.zeros(len(df))
+        draw_numbers = df['draw_number'].fillna(0).to_numpy() if 'draw_number' in df.columns else np.arange(1, len(df) + 1)
+        draw_dates = None
+        if 'draw_date' in df.columns:
+            dates = df['draw_date']
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, format='mixed', errors='coerce')
+            draw_dates = dates.to_numpy().astype('datetime64[D]')
+        return cls(numbers, bonus, draw_numbers, draw_dates, version=version or df.attrs.get('dataset_version'))
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, version: Optional[str] = None) -> "DrawMatrix":
+        """컬럼형 저장소 배열(draw_store.load_draw_arrays)에서 생성
+
+        저장소에 파생 배열(matrix_<이름>)이 있으면 복사/재계산 없이 그 배열(메모리 매핑)을 그대로 쓴다.
+        """
+        draw_dates = np.asarray(arrays['draw_date']).view('datetime64[D]')
+        if not all(f'matrix_{name}' in arrays for name in MATRIX_ARRAYS):
+            return cls(arrays['numbers'], arrays['bonus'], arrays['draw_number'], draw_dates, version=version)
+        matrix = cls.__new__(cls)
+        for name in MATRIX_ARRAYS:
+            setattr(matrix, name, _readonly(arrays[f'matrix_{name}']))
+        matrix.bonus = _readonly(arrays['bonus'])
+        matrix.draw_numbers = _readonly(arrays['draw_number'])
+        matrix.draw_dates = _readonly(draw_dates)
+        matrix.version = version
+        matrix._prefix_counts = None
+        matrix._decayed_counts = {}
+        return matrix
+
+
+def _matrix_key(df: pd.DataFrame, version: str) -> Tuple[str, str]:
+    # 같은 버전에서 나온 부분 프레임(tail/필터)도 구분되도록 회차 목록 해시를 키에 포함
+    draws = np.ascontiguousarray(df['draw_number'].to_numpy())
+    return (version, hashlib.blake2b(draws.tobytes(), digest_size=16).hexdigest())
+
+
+def _remember_matrix(key: Tuple[str, str], matrix: DrawMatrix) -> None:
+    with _matrix_cache_lock:
+        _matrix_cache[key] = matrix
+        _matrix_cache.move_to_end(key)
+        while len(_matrix_cache) > _MATRIX_CACHE_SIZE:
+            _matrix_cache.popitem(last=False)
+
+
+def register_matrix(df: pd.DataFrame, matrix: DrawMatrix) -> None:
+    """df(load_data 결과)에 대응하는 DrawMatrix를 미리 등록 (저장소의 메모리 매핑 행렬 공유용)"""
+    version = df.attrs.get('dataset_version')
+    if version and 'draw_number' in df.columns:
+        matrix.version = version
+        _remember_matrix(_matrix_key(df, version), matrix)
+
+
+def matrix_for_frame(df: pd.DataFrame) -> DrawMatrix:
+    """DataFrame에 대응하는 DrawMatrix (데이터셋 버전 + 회차 구성 기준 캐시)
+
+    load_data()가 붙인 dataset_version이 있으면 같은 버전/같은 회차 집합에 대해 재사용한다.
+    버전 정보가 없는 임의 프레임은 매번 새로 만든다(수 ms 이하).
+    """
+    version = df.attrs.get('dataset_version') if hasattr(df, 'attrs') else None
+    if not version or 'draw_number' not in df.columns:
+        return DrawMatrix.from_frame(df)
+
+    key = _matrix_key(df, version)
+    with _matrix_cache_lock:
+        cached = _matrix_cache.get(key)
+        if cached is not None:
+            _matrix_cache.move_to_end(key)
+            return cached
+
+    matrix = DrawMatrix.from_frame(df, version=version)
+    _remember_matrix(key, matrix)
+    return matrix
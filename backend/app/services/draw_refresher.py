@@ -0,0 +1,159 @@
+"""
+추첨 일정 기반 인앱 데이터 갱신기
+
+토요일 20:45 KST 추첨 직후부터 새 회차가 공개될 때까지 백오프로 폴링하여
+`update_latest_data`로 반영하고, 등록된 워밍업 콜백(분석/예측 캐시)을 실행한다.
+gunicorn 워커 중 파일 잠금(fcntl)을 잡은 하나만 리더로 동작하며, 나머지 워커는
+주기적으로 잠금 획득을 재시도해 리더 워커가 재시작되어도 갱신이 이어진다.
+리더 잠금은 갱신기끼리만 막으므로, /data/update 등 라우트와의 동시 반영은
+`update_latest_data`의 증분 갱신 잠금이 직렬화한다.
+"""
+import os
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+from .data_service import DataService, KST
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+WarmupCallback = Callable[[pd.DataFrame], None]
+
+
+def _env_int(name: str, default_value: int) -> int:
+    try:
+        return int(os.getenv(name, default_value))
+    except Exception:
+        return int(default_value)
+
+
+class DrawRefresher:
+    """새 회차 폴링/반영 + 캐시 워밍업 (단일 리더)"""
+
+    def __init__(self, data_service: DataService, lock_path: Optional[str] = None,
+                 delay_minutes: int = None, initial_backoff: int = None, max_backoff: int = None,
+                 leader_retry_seconds: int = None):
+        self.data_service = data_service
+        self.lock_path = lock_path or os.path.join(os.path.dirname(data_service.data_file), '.draw_refresher.lock')
+        # 추첨 후 결과 공개까지 여유를 두고 첫 폴링
+        self.delay = timedelta(minutes=delay_minutes if delay_minutes is not None else _env_int('REFRESHER_DELAY_MINUTES', 10))
+        self.initial_backoff = initial_backoff or _env_int('REFRESHER_INITIAL_BACKOFF_SECONDS', 60)
+        self.max_backoff = max_backoff or _env_int('REFRESHER_MAX_BACKOFF_SECONDS', 1800)
+        self.leader_retry_seconds = leader_retry_seconds or _env_int('REFRESHER_LEADER_RETRY_SECONDS', 300)
+        self._callbacks: List[WarmupCallback] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+
+    def add_warmup(self, callback: WarmupCallback) -> None:
+        """새 회차 반영 후 실행할 워밍업 콜백 등록 (인자: 갱신된 DataFrame)"""
+        self._callbacks.append(callback)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='draw-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._release_leadership()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def _try_acquire_leadership(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            # 잠금 미지원 플랫폼(단일 프로세스 개발 환경)은 항상 리더
+            self._lock_file = True
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+            f = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._lock_file = f
+            logger.info(f"데이터 갱신기 리더 획득 (pid={os.getpid()})")
+            return True
+        except Exception as e:
+            logger.error(f"데이터 갱신기 리더 잠금 실패: {e}")
+            return False
+
+    def _release_leadership(self) -> None:
+        f = self._lock_file
+        self._lock_file = None
+        if f is None or f is True:
+            return
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+        except Exception:
+            pass
+
+    def _latest_local_draw(self) -> int:
+        df = self.data_service.load_data()
+        try:
+            return int(df['draw_number'].max())
+        except Exception:
+            return 0
+
+    def next_poll_at(self, latest_local: int) -> datetime:
+        """보유한 다음 회차의 예정 추첨 시각 + 공개 지연"""
+        return self.data_service._draw_scheduled_at(latest_local + 1) + self.delay
+
+    def _run(self) -> None:
+        backoff = self.initial_backoff
+        while not self._stop.is_set():
+            if not self._try_acquire_leadership():
+                self._stop.wait(self.leader_retry_seconds)
+                continue
+            try:
+                if not os.path.exists(self.data_service.data_file):
+                    # 초기 수집 전(샘플 데이터 응답 중)에는 증분 갱신을 하지 않음
+                    self._stop.wait(self.leader_retry_seconds)
+                    continue
+                latest_local = self._latest_local_draw()
+                wait = (self.next_poll_at(latest_local) - datetime.now(KST)).total_seconds()
+                if wait > 0:
+                    # 다음 추첨까지 대기 (최대 1시간 단위로 깨어나 외부 갱신 반영 여부 재확인)
+                    backoff = self.initial_backoff
+                    self._stop.wait(min(wait, 3600))
+                    continue
+
+                df = self.data_service.update_latest_data()
+                refreshed = int(df['draw_number'].max()) if df is not None and not df.empty else latest_local
+                if refreshed > latest_local:
+                    logger.info(f"새 회차 반영: {latest_local}회차 → {refreshed}회차, 캐시 워밍업 시작")
+                    self._run_warmups(df)
+                    backoff = self.initial_backoff
+                    continue
+
+                logger.info(f"{latest_local + 1}회차 미공개, {backoff}s 후 재시도")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            except Exception as e:
+                logger.error(f"데이터 갱신기 오류: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def _run_warmups(self, df: pd.DataFrame) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(df)
+            except Exception as e:
+                logger.error(f"캐시 워밍업 실패(비치명적): {e}")
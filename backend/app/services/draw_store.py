@@ -0,0 +1,199 @@
+"""
+컬럼형 바이너리 회차 저장소
+
+CSV(`lotto_data.csv`)는 교환 포맷으로 유지하고, 같은 내용을 NumPy `.npy` 배열로도
+저장해 로드 시 CSV 파싱/혼합 포맷 날짜 파싱을 건너뛴다.
+
+디렉터리 구성 (`<csv 이름>_store/`):
+- numbers.npy      : N×6 uint8 당첨 번호 행렬 (메모리 매핑 가능, 워커 간 페이지 공유)
+- bonus.npy        : N uint8 보너스 번호
+- draw_number.npy  : N int32 회차
+- draw_date.npy    : N int64 (datetime64[D] 일 단위 정수, NaT 허용)
+- <extra>.npy      : N int64 판매액/당첨금/당첨자 수 (CSV에 있을 때만)
+- matrix_<이름>.npy : DrawMatrix 파생 배열(정렬 번호, 원본 순서 번호, N×45 원-핫, 비트마스크, 유효 개수).
+                     DrawMatrix.from_arrays가 메모리 매핑으로 그대로 써서 워커 간 페이지를 공유한다.
+- meta.json        : 행 수, 컬럼 순서, 원본 CSV의 파일 버전(mtime_ns, size, manifest mtime_ns)
+"""
+import os
+import json
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl  # POSIX 전용: 워커 프로세스 간 저장소 기록 잠금
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from .draw_matrix import DrawMatrix, MATRIX_ARRAYS
+
+logger = logging.getLogger(__name__)
+
+NUMBER_COLUMNS = ['number_1', 'number_2', 'number_3', 'number_4', 'number_5', 'number_6']
+EXTRA_COLUMNS = ['total_sales', 'first_prize_amount', 'first_prize_winners']
+KNOWN_COLUMNS = ['draw_number', 'draw_date'] + NUMBER_COLUMNS + ['bonus_number'] + EXTRA_COLUMNS
+
+STORE_FORMAT_VERSION = 2
+
+# CSV 경로(pd.to_datetime 문자열 파싱)가 만드는 날짜 dtype과 동일하게 맞춤 (pandas 버전별 해상도 차이 대비)
+_CSV_DATE_DTYPE = pd.to_datetime(pd.Series(['2002-12-07']), format='mixed', errors='coerce').dtype
+
+_store_thread_lock = threading.Lock()
+
+
+def store_dir_for(csv_path: str) -> str:
+    """CSV 경로에 대응하는 저장소 디렉터리"""
+    return os.path.splitext(csv_path)[0] + '_store'
+
+
+@contextmanager
+def _store_lock(store_dir: str):
+    """저장소 기록 잠금 (스레드 + 프로세스 간). 로드 중 재생성이 여러 워커에서 겹치지 않게 한다."""
+    with _store_thread_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(store_dir) or '.', exist_ok=True)
+        with open(f"{store_dir}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _atomic_write(path: str, write) -> None:
+    """고유한 임시 파일에 기록 후 rename (동시 기록자끼리 임시 파일을 공유하지 않음)"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _atomic_save_npy(path: str, arr: np.ndarray) -> None:
+    _atomic_write(path, lambda f: np.save(f, arr))
+
+
+def write_draw_store(df: pd.DataFrame, store_dir: str, csv_stat: Tuple[int, ...]) -> bool:
+    """DataFrame을 컬럼형 저장소로 기록. 저장 불가 스키마면 False 반환.
+
+    저장소 잠금 안에서 기록하며, 다른 기록자가 이미 같은 CSV 버전(csv_stat)으로 기록했으면 건너뛴다.
+    """
+    unknown = [c for c in df.columns if c not in KNOWN_COLUMNS]
+    missing = [c for c in ['draw_number', 'draw_date'] + NUMBER_COLUMNS + ['bonus_number'] if c not in df.columns]
+    if unknown or missing:
+        logger.info(f"컬럼형 저장소 생략(스키마 불일치): unknown={unknown}, missing={missing}")
+        return False
+    if df[NUMBER_COLUMNS + ['bonus_number', 'draw_number']].isnull().any().any():
+        logger.info("컬럼형 저장소 생략: 번호/회차 결측치 존재")
+        return False
+
+    try:
+        with _store_lock(store_dir):
+            meta = read_store_meta(store_dir)
+            if meta is not None and tuple(meta.get('csv_stat', [])) == tuple(csv_stat):
+                return True
+            _write_arrays(df, store_dir, csv_stat)
+        return True
+    except Exception as e:
+        logger.error(f"컬럼형 저장소 기록 실패(비치명적): {e}")
+        return False
+
+
+def _write_arrays(df: pd.DataFrame, store_dir: str, csv_stat: Tuple[int, ...]) -> None:
+    """배열 파일과 meta.json 기록 (저장소 잠금 안)"""
+    os.makedirs(store_dir, exist_ok=True)
+    dates = pd.to_datetime(df['draw_date'], format='mixed', errors='coerce')
+    arrays = {
+        'numbers': df[NUMBER_COLUMNS].to_numpy().astype(np.uint8),
+        'bonus': df['bonus_number'].to_numpy().astype(np.uint8),
+        'draw_number': df['draw_number'].to_numpy().astype(np.int32),
+        'draw_date': dates.to_numpy().astype('datetime64[D]').view(np.int64),
+    }
+    extras = [c for c in EXTRA_COLUMNS if c in df.columns]
+    for col in extras:
+        arrays[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy().astype(np.int64)
+    matrix = DrawMatrix(arrays['numbers'], arrays['bonus'], arrays['draw_number'])
+    for name in MATRIX_ARRAYS:
+        arrays[f'matrix_{name}'] = getattr(matrix, name)
+
+    for name, arr in arrays.items():
+        _atomic_save_npy(os.path.join(store_dir, f'{name}.npy'), np.ascontiguousarray(arr))
+
+    # meta.json은 마지막에 기록: 중간 실패 시 이전 meta의 csv_stat 불일치로 CSV 경로로 폴백
+    meta = {
+        'format_version': STORE_FORMAT_VERSION,
+        'rows': int(len(df)),
+        'columns': [c for c in df.columns],
+        'extras': extras,
+        'csv_stat': [int(x) for x in csv_stat],
+    }
+    _atomic_write(os.path.join(store_dir, 'meta.json'), lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+
+def read_store_meta(store_dir: str) -> Optional[Dict]:
+    meta_path = os.path.join(store_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != STORE_FORMAT_VERSION:
+            return None
+        return meta
+    except Exception:
+        return None
+
+
+def load_draw_arrays(store_dir: str, csv_stat: Optional[Tuple[int, ...]] = None,
+                     mmap: bool = True) -> Optional[Dict[str, np.ndarray]]:
+    """저장소 배열 로드. csv_stat이 주어지면 원본 CSV와 일치할 때만 반환."""
+    meta = read_store_meta(store_dir)
+    if meta is None:
+        return None
+    if csv_stat is not None and tuple(meta.get('csv_stat', [])) != tuple(csv_stat):
+        return None
+    try:
+        mode = 'r' if mmap else None
+        names = (['numbers', 'bonus', 'draw_number', 'draw_date'] + list(meta.get('extras', []))
+                 + [f'matrix_{name}' for name in MATRIX_ARRAYS])
+        arrays = {name: np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode=mode) for name in names}
+        rows = int(meta['rows'])
+        if any(len(a) != rows for a in arrays.values()):
+            return None
+        arrays['_meta'] = meta
+        return arrays
+    except Exception as e:
+        logger.warning(f"컬럼형 저장소 로드 실패, CSV로 대체: {e}")
+        return None
+
+
+def frame_from_arrays(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """저장소 배열 → CSV 로드 결과와 동일한 컬럼/dtype의 DataFrame"""
+    meta = arrays['_meta']
+    numbers = np.asarray(arrays['numbers'])
+    data = {
+        'draw_number': np.asarray(arrays['draw_number']).astype(np.int64),
+        # 일 단위 정수 → CSV 경로의 pd.to_datetime 결과와 동일 dtype
+        'draw_date': pd.Series(np.asarray(arrays['draw_date']).view('datetime64[D]')).astype(_CSV_DATE_DTYPE),
+    }
+    for i, col in enumerate(NUMBER_COLUMNS):
+        # 분석 코드의 합계 연산이 uint8에서 넘치지 않도록 DataFrame은 int64 유지
+        data[col] = numbers[:, i].astype(np.int64)
+    data['bonus_number'] = np.asarray(arrays['bonus']).astype(np.int64)
+    for col in meta.get('extras', []):
+        data[col] = np.asarray(arrays[col])
+    columns = [c for c in meta.get('columns', []) if c in data] or list(data.keys())
+    return pd.DataFrame(data, columns=columns)
@@ -1,16 +1,23 @@
 import os
+import sys
+import hashlib
 import joblib
 import json
-import threading
-import queue
 import time
-import math
 import random
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any, Tuple
 from datetime import datetime, timezone, timedelta
 import logging
+
+from .draw_matrix import matrix_for_frame
+from .set_sampler import sample_weighted_sets, count_matches
+from .proba_table import (
+    TABLE_FILENAME, load_proba_table, position_probabilities, save_proba_table, table_matches, top_k_numbers,
+)
+from ..utils.lru_cache import SizedLRUCache
+from .refine_executor import RefineExecutor
 """
 무거운 ML 라이브러리(sklearn)는 지연 임포트로 전환하여
 비-ML 경로(statistical, test)가 빠르게 응답하도록 최적화합니다.
@@ -38,15 +45,43 @@ def _get_env_bool(name: str, default_value: bool) -> bool:
 
 logger = logging.getLogger(__name__)
 
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _estimate_nbytes(value: Any) -> int:
+    """캐시 항목 메모리 추정치 (DataFrame, 트리 앙상블 모델, 그 리스트)"""
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_nbytes(v) for v in value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    estimators = getattr(value, 'estimators_', None)
+    if estimators is not None:
+        # sklearn 트리 노드 구조체(약 64바이트) + 노드별 클래스/값 배열
+        total = 0
+        for est in np.ravel(estimators):
+            tree = getattr(est, 'tree_', None)
+            if tree is not None:
+                total += int(tree.node_count) * 64 + int(tree.value.nbytes)
+        return total
+    return sys.getsizeof(value)
+
+
 class PredictionService:
     """로또 번호 예측 서비스"""
     
     def __init__(self):
-        # date(YYYYMMDD)별로 포지션 모델/피처 캐시
-        self._models_cache_by_date: Dict[str, List[Any]] = {}
-        self._features_cache_by_date: Dict[str, pd.DataFrame] = {}
+        # 피처/학습 모델(데이터셋 키), 디스크 모델(모델 파일 지문)을 한 LRU에 바이트 예산으로 보관
+        self._cache = SizedLRUCache('prediction', _get_env_int('PREDICTION_CACHE_MAX_MB', 1024) * 1024 * 1024,
+                                    sizeof=_estimate_nbytes)
         self.number_columns = ['number_1', 'number_2', 'number_3', 'number_4', 'number_5', 'number_6']
-        self._last_warmup_date: str | None = None
         # 균형형 기본 파라미터 (환경변수로 오버라이드)
         self.conf_base = _get_env_float('CONF_BASE', 0.40)
         self.conf_min = _get_env_float('CONF_MIN', 0.40)
@@ -61,134 +96,120 @@ class PredictionService:
         self.hot_top_k = _get_env_int('HOT_TOP_K', 8)
         self.cold_top_k = _get_env_int('COLD_TOP_K', 8)
         self.freq_decay_half_life = _get_env_int('FREQ_DECAY_HALF_LIFE_DRAWS', 80)
+        # true면 감쇠 빈도를 정수 반올림 없이 float 가중치로 사용 (오래된 회차 해상도 유지)
+        self.freq_float_weights = _get_env_bool('FREQ_FLOAT_WEIGHTS', False)
         self.deterministic_seed = _get_env_bool('DETERMINISTIC_SEED', True)
         self.enable_ml = _get_env_bool('ENABLE_ML', True)
-        # cache for models loaded from disk keyed by date
-        self._loaded_models_by_date: Dict[str, List[Any]] = {}
-        # background prediction job queue and tracking
-        # (job_key, user_key, num_sets)
-        self._job_queue: "queue.Queue[Tuple[str,str,int]]" = queue.Queue()
-        self._pending_jobs: set = set()
-        self._job_lock = threading.Lock()
-        self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self._worker_thread.start()
+        # ML 보정 작업은 별도 프로세스 풀에서 실행 (풀은 첫 제출 시 생성)
+        self._refiner = RefineExecutor()
     
     def statistical_prediction(self, df: pd.DataFrame, num_sets: int = 5) -> List[List[int]]:
         """통계 기반 번호 예측"""
         try:
             # 번호별 출현 빈도 계산(시간 감쇠 가중 포함)
-            frequency = self._calculate_frequency(df, decay_half_life=self.freq_decay_half_life)
+            frequency = self._calculate_frequency(df, decay_half_life=self.freq_decay_half_life,
+                                                  as_float=self.freq_float_weights)
             
-            # 가중치 기반 선택 (빈도가 높을수록 선택 확률 증가)
+            # 가중치 기반 선택 (빈도가 높을수록 선택 확률 증가, 미출현 번호는 1)
             weights = [frequency.get(i, 1) for i in range(1, 46)]
             
-            predictions = []
-            for _ in range(num_sets):
-                # 가중치 기반으로 6개 번호 선택
-                selected = random.choices(range(1, 46), weights=weights, k=6)
-                # 중복 제거 및 정렬
-                selected = sorted(list(set(selected)))
-                # 6개가 되지 않으면 추가 선택
-                while len(selected) < 6:
-                    additional = random.choices(range(1, 46), weights=weights, k=1)[0]
-                    if additional not in selected:
-                        selected.append(additional)
-                selected.sort()
-                predictions.append(selected)
-            
-            return predictions
+            # 6개 서로 다른 번호를 가중 비복원 추출 (전 세트 일괄)
+            return self._sample_sets(weights, num_sets).tolist()
             
         except Exception as e:
             logger.error(f"통계 예측 중 오류 발생: {e}")
             raise
     
-    def ml_prediction(self, df: pd.DataFrame, num_sets: int = 5) -> List[List[int]]:
-        """머신러닝 기반 번호 예측"""
-        try:
-            # 지연 임포트 (초기 콜드 스타트 지연 최소화)
-            from sklearn.model_selection import train_test_split  # type: ignore
-            # KST 기준 날짜 키로 캐시 활용
-            today_key = self._get_kst_today().strftime('%Y%m%d')
+    @staticmethod
+    def _sample_sets(weights, num_sets: int, seed: int | None = None) -> np.ndarray:
+        """가중치로 num_sets개 세트 일괄 추출 (num_sets×6 uint8)
 
-            # 피처를 일자 기준으로 1회만 생성
-            if today_key in self._features_cache_by_date:
-                features = self._features_cache_by_date[today_key]
-            else:
-                features = self._create_features(df)
-                self._features_cache_by_date[today_key] = features
+        seed가 없으면 파이썬 random에서 시드를 받아, random.seed 기반 일일 고정 추천이 그대로 재현된다.
+        """
+        rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        return sample_weighted_sets(weights, num_sets, rng)
+    
+    def bulk_statistical_sets(self, df: pd.DataFrame, num_sets: int, seed: int | None = None) -> np.ndarray:
+        """통계 예측 대량 모드: statistical_prediction과 같은 가중치로 num_sets×6 uint8 배열 반환"""
+        frequency = self._calculate_frequency(df, decay_half_life=self.freq_decay_half_life,
+                                              as_float=self.freq_float_weights)
+        return self._sample_sets([frequency.get(i, 1) for i in range(1, 46)], num_sets, seed)
+    
+    def backtest_statistical(self, df: pd.DataFrame, num_sets: int = 10000, recent_draws: int = 52,
+                             seed: int | None = None) -> Dict[str, Any]:
+        """통계 예측 백테스트: 최근 recent_draws회차 각각에 대해 직전까지의 이력으로 num_sets세트를 뽑아 일치 개수 집계
 
-            # 시도 1: 디스크에 저장된 분류기(models/position_{i}_clf.pkl)를 로드(캐시 우선)
-            today_key = self._get_kst_today().strftime('%Y%m%d')
-            models_for_today = [None] * 6
+        회차별 감쇠 빈도는 D(t+1) = D(t)·r + onehot[t] (r = 2^(-1/반감기)) 점화식으로 이어서 갱신한다.
+        """
+        if num_sets < 1 or recent_draws < 1:
+            raise ValueError("num_sets와 recent_draws는 1 이상이어야 합니다.")
+        matrix = matrix_for_frame(df)
+        n = len(matrix)
+        lo = max(1, n - recent_draws)
+        half_life = self.freq_decay_half_life
+        r = 0.5 ** (1.0 / float(half_life)) if half_life and half_life > 0 else 1.0
+        # 첫 평가 회차 직전까지의 (감쇠) 빈도: 행 청크 단위 가중치·원-핫 곱
+        counts = np.zeros(45, dtype=np.float64)
+        for start in range(0, lo, 1 << 16):
+            stop = min(start + (1 << 16), lo)
+            w = r ** np.arange(lo - 1 - start, lo - 1 - stop, -1, dtype=np.float64)
+            counts += w @ matrix.onehot[start:stop].astype(np.float64)
+        onehot = matrix.onehot[lo:n].astype(np.float64)
+        seen = matrix.prefix_counts[lo] > 0
+        rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+        total = np.zeros(7, dtype=np.int64)
+        per_draw = []
+        for t in range(lo, n):
+            # statistical_prediction과 같은 가중치 규칙 (미출현 1, 기본은 정수 반올림)
+            values = counts if self.freq_float_weights else np.round(counts)
+            weights = np.where(seen, values, 1.0)
+            if not np.any(weights > 0):
+                weights = np.ones(45)
+            sets = sample_weighted_sets(weights, num_sets, rng)
+            dist = np.bincount(count_matches(sets, matrix.numbers[t][matrix.numbers[t] > 0]), minlength=7)
+            total += dist
+            per_draw.append({
+                'draw_number': int(matrix.draw_numbers[t]),
+                'match_distribution': {k: int(c) for k, c in enumerate(dist)},
+                'avg_matches': float(np.dot(np.arange(7), dist) / num_sets)
+            })
+            counts = counts * r + onehot[t - lo]
+            seen |= matrix.onehot[t]
+
+        evaluated = len(per_draw)
+        return {
+            'num_sets': num_sets,
+            'evaluated_draws': evaluated,
+            'match_distribution': {k: int(c) for k, c in enumerate(total)},
+            'avg_matches': float(np.dot(np.arange(7), total) / (num_sets * evaluated)) if evaluated else 0.0,
+            'draws': per_draw
+        }
+    
+    def ml_prediction(self, df: pd.DataFrame, num_sets: int = 5) -> List[List[int]]:
+        """머신러닝 기반 번호 예측
 
-            if today_key in self._loaded_models_by_date:
-                models_for_today = self._loaded_models_by_date[today_key]
-            else:
-                models_dir = os.path.join(os.getcwd(), 'models')
-                if os.path.isdir(models_dir):
-                    load_start = __import__('time').perf_counter()
-                    for i in range(6):
-                        tuned_path = os.path.join(models_dir, f'position_{i}_clf_tuned.pkl')
-                        default_path = os.path.join(models_dir, f'position_{i}_clf.pkl')
-                        path = tuned_path if os.path.exists(tuned_path) else default_path
-                        if os.path.exists(path):
-                            try:
-                                # Avoid memmap to prevent too many open files; load fully in memory
-                                models_for_today[i] = joblib.load(path)
-                            except Exception as ex:
-                                logger.exception(f"Failed to load model {path}: {ex}")
-                                models_for_today[i] = None
-                    load_end = __import__('time').perf_counter()
-                    logger.info(f"Loaded models from disk in {load_end-load_start:.3f}s")
-                # cache loaded models even if some are None
-                self._loaded_models_by_date[today_key] = models_for_today
-
-            # If no models available or ML disabled, fallback to statistical
-            if not any(models_for_today) or not self.enable_ml:
+        위치별 확률은 사전 계산된 확률표(build_proba_table)를 우선 사용한다. 표가 없거나
+        데이터셋/모델 파일이 바뀌었으면 모델로 직접 계산한 뒤 표를 다시 저장한다.
+        """
+        try:
+            if not self.enable_ml:
                 return self.statistical_prediction(df, num_sets)
 
-            # 최근 피처 1행으로 예측 확률 획득 및 숫자형 컬럼만 사용
-            recent_features = features.tail(1)
-            # drop non-feature columns and numeric-cast
-            drop_cols = ['draw_number', 'draw_date', 'bonus_number'] + self.number_columns
-            recent_X = recent_features.drop(columns=[c for c in drop_cols if c in recent_features.columns], errors='ignore')
-            recent_X = recent_X.fillna(0)
-            # ensure numpy float array for sklearn
-            try:
-                recent_vals = recent_X.astype(float).values
-            except Exception:
-                # fallback: coerce via to_numeric
-                recent_vals = recent_X.apply(pd.to_numeric, errors='coerce').fillna(0).values
-
-            # For each position, get probability vector for numbers 1..45
-            prob_vectors = []
-            for position in range(6):
-                m = models_for_today[position]
-                if m is None:
-                    # uniform if missing
-                    prob_vectors.append([1.0/45.0] * 45)
-                else:
-                    try:
-                        pred_start = __import__('time').perf_counter()
-                        # use numeric array to avoid dtype issues
-                        proba = m.predict_proba(recent_vals)[0]
-                        pred_end = __import__('time').perf_counter()
-                        logger.debug(f"predict_proba pos={position} took {pred_end-pred_start:.4f}s")
-                        # sklearn gives classes_ array
-                        classes = m.classes_
-                        vec = [0.0] * 45
-                        for idx, cls in enumerate(classes):
-                            if 1 <= int(cls) <= 45:
-                                vec[int(cls) - 1] = float(proba[idx])
-                        # normalize
-                        s = sum(vec)
-                        if s <= 0:
-                            vec = [1.0/45.0] * 45
-                        else:
-                            vec = [v / s for v in vec]
-                        prob_vectors.append(vec)
-                    except Exception:
-                        prob_vectors.append([1.0/45.0] * 45)
+            table = self._get_proba_table(df)
+            if table is not None:
+                # 빠른 경로: sklearn 임포트/피처 생성/모델 언피클 없음
+                if not table['has_model'].any():
+                    return self.statistical_prediction(df, num_sets)
+                prob_vectors = table['probs'].tolist()
+                top_numbers = table['top_k'].tolist()
+            else:
+                probs, has_model = self._compute_position_probabilities(df)
+                # If no models available, fallback to statistical
+                if not has_model.any():
+                    return self.statistical_prediction(df, num_sets)
+                prob_vectors = probs.tolist()
+                top_numbers = top_k_numbers(probs).tolist()
 
             # 샘플링 전략: 각 세트마다 각 포지션에서 확률분포로 샘플링하되 중복 제거
             predictions: List[List[int]] = []
@@ -197,10 +218,8 @@ class PredictionService:
                 chosen = []
                 for pos in range(6):
                     vec = prob_vectors[pos]
-                    # restrict to top_k candidates to avoid tiny-prob noise
-                    top_k = 8
-                    top_idx = sorted(range(45), key=lambda x: vec[x], reverse=True)[:top_k]
-                    candidates = [i+1 for i in top_idx]
+                    # restrict to top_k candidates to avoid tiny-prob noise (확률표의 위치별 상위 8개)
+                    candidates = top_numbers[pos]
                     weights = [vec[i-1] for i in candidates]
                     # normalize weights
                     total = sum(weights)
@@ -243,6 +262,164 @@ class PredictionService:
             # ML 실패 시 통계 예측으로 대체
             return self.statistical_prediction(df, num_sets)
     
+    def _dataset_key(self, df: pd.DataFrame) -> Tuple[str, str]:
+        """(최신 회차, 회차/번호 내용 해시) — 피처 입력(번호 컬럼)만으로 정하는 내용 기준 키
+
+        CSV 바이트나 manifest 체크섬이 아니라 값 기준이라, 추가로 만든 파일과 통째로 다시 쓴 파일,
+        오프라인에서 확률표를 만든 환경과 운영 환경이 같은 데이터면 같은 키가 된다.
+        같은 버전의 부분 프레임(tail 등)은 회차 목록이 달라 다른 키가 된다.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        if 'draw_number' in df.columns:
+            draws = df['draw_number'].fillna(0).to_numpy(dtype=np.int64)
+            digest.update(np.ascontiguousarray(draws).tobytes())
+        else:
+            draws = np.zeros(0, dtype=np.int64)
+        cols = [c for c in self.number_columns if c in df.columns]
+        digest.update(np.ascontiguousarray(df[cols].fillna(0).to_numpy(dtype=np.int64)).tobytes())
+        latest = int(draws.max()) if draws.size else 0
+        return (str(latest), digest.hexdigest())
+
+    def _model_paths(self) -> List[str | None]:
+        """위치별 분류기 파일 경로 (tuned 우선, 없으면 None)"""
+        models_dir = os.path.join(os.getcwd(), 'models')
+        paths: List[str | None] = [None] * 6
+        if os.path.isdir(models_dir):
+            for i in range(6):
+                tuned_path = os.path.join(models_dir, f'position_{i}_clf_tuned.pkl')
+                default_path = os.path.join(models_dir, f'position_{i}_clf.pkl')
+                path = tuned_path if os.path.exists(tuned_path) else default_path
+                paths[i] = path if os.path.exists(path) else None
+        return paths
+
+    @staticmethod
+    def _model_fingerprint(paths: List[str | None]) -> Tuple[Any, ...]:
+        """모델 파일 지문: (경로, 크기, 수정 시각) 튜플 — 파일이 바뀌어야만 다시 로드"""
+        fingerprint = []
+        for path in paths:
+            try:
+                st = os.stat(path) if path else None
+                fingerprint.append((path, st.st_size, st.st_mtime_ns) if st else None)
+            except OSError:
+                fingerprint.append(None)
+        return tuple(fingerprint)
+
+    def _model_content_fingerprint(self, paths: List[str | None]) -> Tuple[Any, ...]:
+        """확률표 비교용 모델 지문: (파일 이름, 내용 SHA-256) 튜플
+
+        경로/수정 시각이 다른 환경(오프라인 생성 → 운영 배포)에서도 같은 모델 파일이면 같은 값이다.
+        해시는 파일 (경로, 크기, 수정 시각)별로 한 번만 계산한다.
+        """
+        fingerprint = []
+        for path, stat_key in zip(paths, self._model_fingerprint(paths)):
+            if stat_key is None:
+                fingerprint.append(None)
+                continue
+            sha = self._cache.get_or_compute(('model_sha256',) + stat_key, lambda p=path: _file_sha256(p))
+            fingerprint.append((os.path.basename(path), sha))
+        return tuple(fingerprint)
+
+    def _get_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """데이터셋 키 기준으로 피처를 1회만 생성해 재사용"""
+        return self._cache.get_or_compute(('features', self._dataset_key(df)), lambda: self._create_features(df))
+
+    def _get_position_models(self) -> List[Any]:
+        """디스크에 저장된 분류기(models/position_{i}_clf.pkl)를 로드(모델 파일 지문 키 캐시 우선)"""
+        paths = self._model_paths()
+        return self._cache.get_or_compute(('disk_models', self._model_fingerprint(paths)),
+                                          lambda: self._load_position_models(paths))
+
+    def _load_position_models(self, paths: List[str | None]) -> List[Any]:
+        models_for_today = [None] * 6
+        if any(paths):
+            load_start = time.perf_counter()
+            for i, path in enumerate(paths):
+                if path:
+                    try:
+                        # Avoid memmap to prevent too many open files; load fully in memory
+                        models_for_today[i] = joblib.load(path)
+                    except Exception as ex:
+                        logger.exception(f"Failed to load model {path}: {ex}")
+                        models_for_today[i] = None
+            load_end = time.perf_counter()
+            logger.info(f"Loaded models from disk in {load_end-load_start:.3f}s")
+        # cache loaded models even if some are None
+        return models_for_today
+
+    def _recent_feature_values(self, features: pd.DataFrame) -> np.ndarray:
+        """최근 피처 1행을 모델 입력(숫자형 float 배열)으로 변환"""
+        recent_features = features.tail(1)
+        # drop non-feature columns and numeric-cast
+        drop_cols = ['draw_number', 'draw_date', 'bonus_number'] + self.number_columns
+        recent_X = recent_features.drop(columns=[c for c in drop_cols if c in recent_features.columns], errors='ignore')
+        recent_X = recent_X.fillna(0)
+        # ensure numpy float array for sklearn
+        try:
+            return recent_X.astype(float).values
+        except Exception:
+            # fallback: coerce via to_numeric
+            return recent_X.apply(pd.to_numeric, errors='coerce').fillna(0).values
+
+    def _compute_position_probabilities(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """디스크 모델로 위치별 확률(6×45)을 계산하고 확률표로 저장 (모델이 있을 때만)"""
+        paths = self._model_paths()
+        models = self._get_position_models()
+        if not any(m is not None for m in models):
+            return np.full((6, 45), 1.0 / 45.0), np.zeros(6, dtype=bool)
+        pred_start = time.perf_counter()
+        probs, has_model = position_probabilities(models, self._recent_feature_values(self._get_features(df)))
+        logger.debug(f"predict_proba 6개 위치 {time.perf_counter() - pred_start:.4f}s")
+        try:
+            save_proba_table(self._proba_table_path(), probs, has_model, self._dataset_key(df),
+                             self._model_content_fingerprint(paths))
+        except Exception as e:
+            logger.error(f"확률표 저장 실패(비치명적): {e}")
+        return probs, has_model
+
+    def _proba_table_path(self) -> str:
+        return os.path.join(os.getcwd(), 'models', TABLE_FILENAME)
+
+    def _get_proba_table(self, df: pd.DataFrame) -> Dict[str, Any] | None:
+        """현재 데이터셋/모델 파일과 일치하는 저장 확률표 (없거나 오래됐으면 None)"""
+        path = self._proba_table_path()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        table = self._cache.get_or_compute(('proba_table', path, st.st_size, st.st_mtime_ns),
+                                           lambda: load_proba_table(path))
+        if table is None or not table_matches(table, self._dataset_key(df),
+                                                    self._model_content_fingerprint(self._model_paths())):
+            return None
+        return table
+
+    def build_proba_table(self, df: pd.DataFrame) -> str | None:
+        """현재 데이터셋/모델로 확률표를 만들어 models/에 저장하고 경로 반환 (모델이 없으면 None)
+
+        새 회차 수집 후 워밍업이나 scripts/build_proba_table.py에서 호출한다.
+        """
+        _, has_model = self._compute_position_probabilities(df)
+        if not has_model.any():
+            return None
+        path = self._proba_table_path()
+        logger.info(f"위치별 확률표 저장: {path}")
+        return path
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """피처/모델 캐시 적중·미스·축출 현황"""
+        return self._cache.stats()
+
+    def prewarm(self, df: pd.DataFrame) -> None:
+        """새 회차 반영 직후 피처 캐시와 위치별 확률표를 미리 채운다 (학습은 하지 않음)."""
+        try:
+            # 새 데이터는 데이터셋 버전이 달라 새 키로 생성된다 (이전 버전 항목은 LRU로 밀려남)
+            self._get_features(df)
+            if self.enable_ml and self._get_proba_table(df) is None:
+                # 요청 경로가 모델 없이 응답하도록 확률표를 미리 만든다
+                self.build_proba_table(df)
+        except Exception as e:
+            logger.error(f"예측 캐시 워밍업 실패(비치명적): {e}")
+
     def unified_prediction(self, df: pd.DataFrame, num_sets: int = 5) -> Dict[str, Any]:
         """통계+ML+휴리스틱을 결합한 단일 통합 예측
 
@@ -266,9 +443,8 @@ class PredictionService:
                 ml_sets = stat_sets
 
             # 3) 빈도 상위/하위(핫/콜드) 계산
-            frequency = self._calculate_frequency(df, decay_half_life=self.freq_decay_half_life)
-            # 파이썬 int로 보정
-            frequency = {int(k): int(v) for k, v in frequency.items()}
+            frequency = self._calculate_frequency(df, decay_half_life=self.freq_decay_half_life,
+                                                  as_float=self.freq_float_weights)
             sorted_by_freq = sorted(frequency.items(), key=lambda x: x[1], reverse=True)
             hot_simple = [int(n) for n, _ in sorted_by_freq[: self.hot_top_k]]
             cold_simple = [int(n) for n, _ in sorted(frequency.items(), key=lambda x: x[1])[: self.cold_top_k]]
@@ -399,12 +575,9 @@ class PredictionService:
                 'confidence_scores': [0.45] * num_sets,
                 'reasoning': []
             }
-            # enqueue background ML job for this user/date
+            # enqueue background ML job for this user/date (대기열이 차면 거절, 통계 결과 유지)
             job_key = f"{date_str}:{user_key}:{num_sets}"
-            with self._job_lock:
-                if job_key not in self._pending_jobs:
-                    self._pending_jobs.add(job_key)
-                    self._job_queue.put((job_key, user_key, num_sets))
+            self._refiner.submit(job_key, user_key, num_sets, date_str)
         except Exception:
             unified = self.unified_prediction(df, num_sets)
         result: Dict[str, Any] = {
@@ -448,30 +621,28 @@ class PredictionService:
             logger.error(f"하이브리드 예측 중 오류 발생: {e}")
             return self.statistical_prediction(df, num_sets)
     
-    def _calculate_frequency(self, df: pd.DataFrame, decay_half_life: int | None = None) -> Dict[int, int]:
-        """번호별 출현 빈도 계산"""
-        frequency: Dict[int, float] = {}
+    def _calculate_frequency(self, df: pd.DataFrame, decay_half_life: int | None = None,
+                             as_float: bool = False) -> Dict[int, Any]:
+        """번호별 출현 빈도 계산
+
+        decay_half_life가 있으면 최근 회차일수록 큰 가중치(지수감쇠, 최신 행 1.0)를 준다.
+        감쇠 빈도는 가중치 벡터와 원-핫 행렬의 곱으로 구하며 DrawMatrix(데이터셋 버전별 캐시)에
+        반감기별로 보관된다. 기본은 기존과 같이 int 반올림, as_float=True면 float 그대로 반환.
+        """
+        if len(df) == 0:
+            return {}
+        matrix = matrix_for_frame(df)
         if decay_half_life and decay_half_life > 0:
-            # 최근 회차일수록 더 큰 가중치(지수감쇠) 적용
-            n = len(df)
-            if n == 0:
-                return {}
-            # 반감기 기준 감쇠 상수
-            lam = math.log(2) / float(decay_half_life)
-            # 최신 행이 tail(1)이라는 가정 하에, 각 행의 시점 가중치 계산
-            for idx, (_, row) in enumerate(df.iterrows()):
-                # 과거일수 d: 0(가장 오래됨) ~ n-1(가장 최신)
-                d = idx
-                w = math.exp(-lam * (n - 1 - d))
-                for col in self.number_columns:
-                    num = int(row[col])
-                    frequency[num] = float(frequency.get(num, 0.0)) + float(w)
+            counts = matrix.decayed_counts(float(decay_half_life))
+            # 키 순서는 기존 회차별(행 우선) 순회의 첫 등장 순
+            order = matrix.first_seen_order(row_major=True)
         else:
-            for col in self.number_columns:
-                for num in df[col]:
-                    frequency[int(num)] = float(frequency.get(int(num), 0.0)) + 1.0
-        # int로 반올림
-        return {int(k): int(round(v)) for k, v in frequency.items()}
+            counts = matrix.onehot.sum(axis=0).astype(np.float64)
+            # 키 순서는 기존 컬럼별(컬럼 우선) 순회의 첫 등장 순
+            order = matrix.first_seen_order()
+        if as_float:
+            return {int(k): float(counts[k - 1]) for k in order}
+        return {int(k): int(round(counts[k - 1])) for k in order}
 
     def _apply_diversity_constraints(self, chosen: List[int]) -> List[int]:
         """홀짝/구간/연속 제약을 완만히 적용하여 구성 품질을 높인다."""
@@ -531,76 +702,76 @@ class PredictionService:
         return nums
     
     def _create_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """ML 모델을 위한 특성 생성"""
-        features = df.copy()
-        
-        # 이동평균 추가
-        for col in self.number_columns:
-            features[f'{col}_ma5'] = features[col].rolling(window=5).mean()
-            features[f'{col}_ma10'] = features[col].rolling(window=10).mean()
+        """ML 모델을 위한 특성 생성
+
+        원본 컬럼 뒤에 {col}_ma5/{col}_ma10(컬럼별 교대), freq_1~freq_45(해당 회차 출현 여부),
+        odd_count 순으로 붙인다(기존 모델 피처 이름/순서 유지). 추가 특성은 float32 블록 하나로 만든다.
+        """
+        values = df[self.number_columns].to_numpy(dtype=np.float64)
+        n = len(values)
+        names: List[str] = []
+        block = np.zeros((n, 2 * len(self.number_columns) + 45 + 1), dtype=np.float32)
         
-        # 번호별 출현 빈도 추가
-        for num in range(1, 46):
-            features[f'freq_{num}'] = 0
-            for col in self.number_columns:
-                features[f'freq_{num}'] += (features[col] == num).astype(int)
+        # 이동평균: 누적합 차이 (창 안에 결측이 있거나 창이 덜 찬 행은 0, 기존 rolling + fillna와 동일)
+        present = ~np.isnan(values)
+        csum = np.zeros((n + 1, values.shape[1]), dtype=np.float64)
+        np.cumsum(np.where(present, values, 0.0), axis=0, out=csum[1:])
+        cnt = np.zeros((n + 1, values.shape[1]), dtype=np.int64)
+        np.cumsum(present, axis=0, out=cnt[1:])
+        for j, col in enumerate(self.number_columns):
+            for k, window in enumerate((5, 10)):
+                if n >= window:
+                    win_sum = csum[window:, j] - csum[:-window, j]
+                    full = (cnt[window:, j] - cnt[:-window, j]) == window
+                    block[window - 1:, 2 * j + k] = np.where(full, win_sum / window, 0.0)
+                names.append(f'{col}_ma{window}')
         
-        # 홀짝 비율 추가
-        features['odd_count'] = 0
-        for col in self.number_columns:
-            features['odd_count'] += (features[col] % 2 == 1).astype(int)
+        # 번호별 출현 빈도: (행, 번호) 위치에 fancy indexing으로 누적
+        offset = 2 * len(self.number_columns)
+        valid = present & (values >= 1) & (values <= 45) & (values == np.floor(values))
+        rows, cols = np.nonzero(valid)
+        np.add.at(block, (rows, offset + values[rows, cols].astype(np.intp) - 1), 1.0)
+        names.extend(f'freq_{num}' for num in range(1, 46))
         
-        # 결측치 처리
-        features = features.fillna(0)
+        # 홀짝 비율: 홀수 마스크 합
+        block[:, -1] = (np.mod(values, 2) == 1).sum(axis=1)
+        names.append('odd_count')
         
-        return features
+        # 결측치 처리 (원본 컬럼)
+        base = df.drop(columns=[c for c in names if c in df.columns]).fillna(0)
+        return pd.concat([base, pd.DataFrame(block, columns=names, index=df.index)], axis=1)
 
     # ----------------------------
-    # Background worker for ML refinement
+    # ML refinement (refine_executor 작업 프로세스에서 실행)
     # ----------------------------
-    def _worker_loop(self):
-        """Background loop that processes queued ML refine jobs."""
-        while True:
-            try:
-                job = self._job_queue.get()
-                if not job:
-                    time.sleep(0.5)
-                    continue
-                job_key, user_key, num_sets = job
-                logger.info(f"ML worker processing job {job_key}")
-                try:
-                    # load latest data and compute unified prediction (may be heavy)
-                    from backend.app.services.data_service import DataService
-                    ds = DataService()
-                    df = ds.load_data()
-                    refined = self.unified_prediction(df, num_sets)
-                    # write refined result to store path so subsequent requests get ML result
-                    date_str = self._get_kst_today().strftime('%Y%m%d')
-                    store_path = self._get_daily_store_path(date_str, user_key)
-                    try:
-                        with open(store_path, 'w', encoding='utf-8') as f:
-                            json.dump({
-                                'mode': 'daily-fixed',
-                                'generated_for': date_str,
-                                'valid_until': (self._get_kst_today().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)).isoformat(),
-                                'created_at': self._get_kst_today().isoformat(),
-                                'user_key': user_key,
-                                'sets': [[int(x) for x in s] for s in refined.get('sets', [])],
-                                'confidence_scores': [float(x) for x in refined.get('confidence_scores', [])],
-                                'reasoning': refined.get('reasoning', [])
-                            }, ensure_ascii=False)
-                    except Exception as e:
-                        logger.error(f"Failed to write refined ML result for {job_key}: {e}")
-                except Exception as e:
-                    logger.error(f"ML worker job {job_key} failed: {e}")
-                finally:
-                    with self._job_lock:
-                        if job_key in self._pending_jobs:
-                            self._pending_jobs.remove(job_key)
-                    self._job_queue.task_done()
-            except Exception:
-                time.sleep(1.0)
-    
+    def refine_daily_prediction(self, user_key: str, num_sets: int, date_str: str) -> None:
+        """최신 데이터로 unified_prediction을 계산해 date_str의 일일 저장 파일을 덮어쓴다"""
+        from backend.app.services.data_service import DataService
+        df = DataService().load_data()
+        refined = self.unified_prediction(df, num_sets)
+        kst_now = self._get_kst_today()
+        store_path = self._get_daily_store_path(date_str, user_key)
+        tmp_path = f"{store_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'mode': 'daily-fixed',
+                'generated_for': date_str,
+                'valid_until': (kst_now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)).isoformat(),
+                'created_at': kst_now.isoformat(),
+                'user_key': user_key,
+                'sets': [[int(x) for x in s] for s in refined.get('sets', [])],
+                'confidence_scores': [float(x) for x in refined.get('confidence_scores', [])],
+                'reasoning': refined.get('reasoning', [])
+            }, f, ensure_ascii=False)
+        # 요청 스레드가 쓰는 중인 파일을 읽지 않도록 원자적으로 교체
+        os.replace(tmp_path, store_path)
+
+    def refine_stats(self) -> Dict[str, Any]:
+        return self._refiner.stats()
+
+    def shutdown_refiner(self) -> None:
+        self._refiner.shutdown()
+
     def _train_position_model(self, df: pd.DataFrame, position: int, precomputed_features: pd.DataFrame | None = None):
         """특정 위치의 번호를 예측하는 모델 학습"""
         try:
@@ -640,24 +811,20 @@ class PredictionService:
             return None
 
     def warmup_today_models(self, df: pd.DataFrame) -> None:
-        """금일(KST) 기준 피처/모델을 미리 생성하여 첫 요청 지연을 방지한다."""
+        """현재 데이터셋 기준 피처/모델을 미리 생성하여 첫 요청 지연을 방지한다."""
         try:
-            today_key = self._get_kst_today().strftime('%Y%m%d')
-            # 이미 워밍업된 날짜면 스킵
-            if self._last_warmup_date == today_key and today_key in self._models_cache_by_date:
+            key = ('trained_models', self._dataset_key(df))
+            # 같은 데이터셋으로 이미 워밍업했으면 스킵
+            if self._cache.get(key) is not None:
                 return
             # 피처 준비
-            features = self._features_cache_by_date.get(today_key)
-            if features is None:
-                features = self._create_features(df)
-                self._features_cache_by_date[today_key] = features
+            features = self._get_features(df)
             # 모델 6개 학습
             models_for_today: List[Any] = []
             for position in range(6):
                 model = self._train_position_model(df, position, precomputed_features=features)
                 models_for_today.append(model)
-            self._models_cache_by_date[today_key] = models_for_today
-            self._last_warmup_date = today_key
+            self._cache.put(key, models_for_today)
         except Exception as e:
             logger.error(f"워밍업 실패(비치명적): {e}")
     
@@ -0,0 +1,100 @@
+"""
+위치별 번호 확률표 (6×45) 사전 계산/저장
+
+ml_prediction은 최신 피처 1행만 쓰므로, 데이터셋 내용과 모델 파일이 같으면 위치별 확률 벡터는 상수다.
+수집/워밍업 시점(또는 scripts/build_proba_table.py)에 한 번 계산해 models/ 옆에 저장하고,
+요청 경로는 이 작은 배열만 읽는다(sklearn 임포트/피처 생성/모델 언피클 없음).
+
+저장 형식(npz, allow_pickle 불필요):
+- probs        : 6×45 float64, 행 = 위치, 열 = 번호-1 (합 1로 정규화)
+- top_k        : 6×K int16, 위치별 확률 내림차순 번호(1~45), 동률은 번호 오름차순
+- has_model    : 6 bool, 위치별 모델 존재 여부
+- dataset_key  : [최신 회차, 회차/번호 내용 해시]
+- model_fingerprint : 모델 파일 지문(파일 이름, 내용 SHA-256) JSON 문자열
+"""
+import os
+import json
+import logging
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TABLE_FILENAME = 'position_proba_table.npz'
+DEFAULT_TOP_K = 8
+
+
+def position_probabilities(models: Sequence[Any], recent_vals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """위치별 모델의 predict_proba(최신 피처 1행) → (6×45 정규화 확률, 6 bool 모델 존재 여부)
+
+    모델이 없거나 예측에 실패하거나 확률 합이 0이면 해당 위치는 균등 분포(1/45)다.
+    """
+    probs = np.full((6, 45), 1.0 / 45.0, dtype=np.float64)
+    has_model = np.zeros(6, dtype=bool)
+    for position in range(6):
+        m = models[position] if position < len(models) else None
+        if m is None:
+            continue
+        has_model[position] = True
+        try:
+            proba = np.asarray(m.predict_proba(recent_vals)[0], dtype=np.float64)
+            classes = np.asarray(m.classes_).astype(np.int64)
+            in_range = (classes >= 1) & (classes <= 45)
+            vec = np.zeros(45, dtype=np.float64)
+            vec[classes[in_range] - 1] = proba[in_range]
+            total = vec.sum()
+            if total > 0:
+                probs[position] = vec / total
+        except Exception as e:
+            logger.debug(f"predict_proba 실패 pos={position}: {e}")
+    return probs, has_model
+
+
+def top_k_numbers(probs: np.ndarray, k: int = DEFAULT_TOP_K) -> np.ndarray:
+    """위치별 확률 상위 k개 번호(1~45), 동률은 번호 오름차순 (sorted(..., reverse=True)와 같은 순서)"""
+    return (np.argsort(-probs, axis=1, kind='stable')[:, :k] + 1).astype(np.int16)
+
+
+def save_proba_table(path: str, probs: np.ndarray, has_model: np.ndarray, dataset_key: Sequence[str],
+                     model_fingerprint: Any, k: int = DEFAULT_TOP_K) -> str:
+    """확률표를 원자적으로 저장 (임시 파일 → os.replace)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}.npz"
+    np.savez(tmp,
+             probs=np.asarray(probs, dtype=np.float64),
+             top_k=top_k_numbers(probs, k),
+             has_model=np.asarray(has_model, dtype=bool),
+             dataset_key=np.array([str(x) for x in dataset_key]),
+             model_fingerprint=np.array(fingerprint_to_str(model_fingerprint)))
+    os.replace(tmp, path)
+    return path
+
+
+def load_proba_table(path: str) -> Optional[Dict[str, Any]]:
+    """저장된 확률표 로드 (없거나 손상되면 None)"""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return {
+                'probs': data['probs'],
+                'top_k': data['top_k'],
+                'has_model': data['has_model'],
+                'dataset_key': tuple(str(x) for x in data['dataset_key']),
+                'model_fingerprint': str(data['model_fingerprint']),
+            }
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"확률표 로드 실패(무시): {path}: {e}")
+        return None
+
+
+def fingerprint_to_str(model_fingerprint: Any) -> str:
+    """모델 파일 지문 → 비교용 JSON 문자열"""
+    return json.dumps(model_fingerprint, ensure_ascii=False, sort_keys=True)
+
+
+def table_matches(table: Dict[str, Any], dataset_key: Sequence[str], model_fingerprint: Any) -> bool:
+    return (table['dataset_key'] == tuple(str(x) for x in dataset_key)
+            and table['model_fingerprint'] == fingerprint_to_str(model_fingerprint))
+
@@ -0,0 +1,163 @@
+"""
+동행복권 getLottoNumber 원본 응답 아카이브
+
+회차별 원본 JSON을 100회차 단위 gzip JSON-lines 세그먼트(`draws_000001_000100.jsonl.gz`)에
+추가 기록한다. 각 레코드는 정규화된 JSON의 SHA-256(`sha256`)으로 주소화되어 읽을 때
+무결성을 검증하고, 같은 내용은 다시 기록하지 않는다.
+재수집/스키마 변경 시 네트워크 대신 아카이브를 먼저 읽어 외부 호출을 신규 회차로 한정한다.
+"""
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SIZE = 100
+_GZIP_MAGIC = b'\x1f\x8b\x08'
+
+
+def _canonical(payload: Dict) -> bytes:
+    return json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def content_hash(payload: Dict) -> str:
+    return hashlib.sha256(_canonical(payload)).hexdigest()
+
+
+def _scan_members(data: bytes) -> Tuple[List[bytes], int]:
+    """연속된 gzip 멤버를 하나씩 풀어 (멤버별 내용, 마지막 정상 멤버의 끝 위치) 반환
+
+    기록 도중 중단되어 잘린 멤버는 건너뛰고 다음 gzip 헤더부터 다시 읽는다.
+    """
+    chunks: List[bytes] = []
+    view = memoryview(data)
+    pos = 0
+    valid_end = 0
+    while pos < len(data):
+        decoder = zlib.decompressobj(wbits=31)
+        try:
+            out = decoder.decompress(view[pos:])
+        except zlib.error:
+            out = None
+        if out is not None and decoder.eof:
+            chunks.append(out)
+            pos = len(data) - len(decoder.unused_data)
+            valid_end = pos
+            continue
+        nxt = data.find(_GZIP_MAGIC, pos + 1)
+        logger.warning(f"손상된 gzip 멤버 건너뜀: offset={pos}")
+        if nxt < 0:
+            break
+        pos = nxt
+    return chunks, valid_end
+
+
+class RawDrawArchive:
+    """세그먼트 단위 원본 응답 저장소 (스레드 안전)"""
+
+    def __init__(self, root_dir: str, segment_size: int = SEGMENT_SIZE):
+        self.root_dir = root_dir
+        self.segment_size = segment_size
+        # {세그먼트 시작 회차: {회차: (sha256, payload)}}
+        self._segments: Dict[int, Dict[int, Tuple[str, Dict]]] = {}
+        # {세그먼트 시작 회차: 마지막 정상 gzip 멤버의 끝 위치} - 추가 전 손상된 꼬리를 잘라낼 기준
+        self._segment_ends: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _segment_start(self, draw_no: int) -> int:
+        return ((draw_no - 1) // self.segment_size) * self.segment_size + 1
+
+    def segment_path(self, draw_no: int) -> str:
+        start = self._segment_start(draw_no)
+        end = start + self.segment_size - 1
+        return os.path.join(self.root_dir, f'draws_{start:06d}_{end:06d}.jsonl.gz')
+
+    def _read_segment(self, path: str) -> Tuple[Dict[int, Tuple[str, Dict]], int]:
+        """세그먼트의 {회차: (sha256, payload)}와 마지막 정상 멤버의 끝 위치"""
+        records: Dict[int, Tuple[str, Dict]] = {}
+        if not os.path.exists(path):
+            return records, 0
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            logger.warning(f"{path}: 세그먼트 읽기 실패, 빈 세그먼트로 취급 ({e})")
+            return records, 0
+        chunks, valid_end = _scan_members(data)
+        if valid_end < len(data):
+            # 기록 도중 중단된 gzip 멤버는 버리고 정상 멤버만 사용
+            logger.warning(f"{path}: 세그먼트 손상 구간 무시 (정상 끝 {valid_end}/{len(data)}바이트)")
+        for line in b''.join(chunks).decode('utf-8', errors='replace').splitlines():
+            try:
+                rec = json.loads(line)
+                payload = rec['payload']
+                digest = rec['sha256']
+            except Exception:
+                continue
+            if content_hash(payload) != digest:
+                logger.warning(f"{path}: {rec.get('drwNo')}회차 체크섬 불일치, 무시")
+                continue
+            records[int(rec['drwNo'])] = (digest, payload)
+        return records, valid_end
+
+    def _segment(self, draw_no: int) -> Dict[int, Tuple[str, Dict]]:
+        start = self._segment_start(draw_no)
+        seg = self._segments.get(start)
+        if seg is None:
+            seg, self._segment_ends[start] = self._read_segment(self.segment_path(draw_no))
+            self._segments[start] = seg
+        return seg
+
+    def get(self, draw_no: int) -> Optional[Dict]:
+        """아카이브된 원본 응답 반환 (없으면 None)"""
+        with self._lock:
+            rec = self._segment(draw_no).get(draw_no)
+        return rec[1] if rec else None
+
+    def put(self, draw_no: int, payload: Dict) -> str:
+        """원본 응답 기록 후 sha256 반환. 동일 내용이 이미 있으면 기록하지 않는다."""
+        digest = content_hash(payload)
+        with self._lock:
+            seg = self._segment(draw_no)
+            existing = seg.get(draw_no)
+            if existing and existing[0] == digest:
+                return digest
+            os.makedirs(self.root_dir, exist_ok=True)
+            line = json.dumps({'drwNo': draw_no, 'sha256': digest, 'payload': payload},
+                              ensure_ascii=False, separators=(',', ':')) + '\n'
+            # gzip 멤버 단위 추가: 기존 세그먼트를 다시 압축하지 않는다
+            member = gzip.compress(line.encode('utf-8'))
+            path = self.segment_path(draw_no)
+            start = self._segment_start(draw_no)
+            valid_end = self._segment_ends.get(start, 0)
+            with open(path, 'ab') as f:
+                size = f.tell()
+                if size > valid_end:
+                    # 이전 기록이 중단된 꼬리를 잘라내 손상 멤버가 세그먼트 중간에 남지 않게 한다
+                    logger.warning(f"{path}: 중단된 기록 {size - valid_end}바이트 제거")
+                    f.truncate(valid_end)
+                f.write(member)
+            self._segment_ends[start] = min(size, valid_end) + len(member)
+            seg[draw_no] = (digest, payload)
+        return digest
+
+    def iter_payloads(self) -> Iterator[Tuple[int, Dict]]:
+        """모든 세그먼트의 (회차, 원본) 을 회차 순으로 순회"""
+        if not os.path.isdir(self.root_dir):
+            return
+        names = sorted(n for n in os.listdir(self.root_dir) if n.startswith('draws_') and n.endswith('.jsonl.gz'))
+        for name in names:
+            try:
+                start = int(name.split('_')[1])
+            except (IndexError, ValueError):
+                continue
+            with self._lock:
+                seg = self._segment(start)
+                items = sorted(seg.items())
+            for draw_no, (_, payload) in items:
+                yield draw_no, payload
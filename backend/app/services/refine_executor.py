@@ -0,0 +1,146 @@
+"""
+ML 보정(refine) 작업 실행기
+
+일일 추천은 통계 세트로 먼저 응답하고, ML 보정(unified_prediction)은 뒤에서 돌려 저장 파일을 덮어쓴다.
+보정은 CPU를 오래 쓰므로 API 프로세스의 스레드가 아니라 별도 프로세스 풀에서 실행해
+GIL 경쟁으로 /api/predict 지연이 늘지 않게 한다.
+
+- 같은 job_key(날짜:사용자:세트 수)가 대기/실행 중이면 다시 넣지 않는다(중복 제거).
+- 대기+실행 중 작업이 ML_REFINE_QUEUE_MAX에 닿으면 새 작업은 거절한다(백프레셔).
+  거절돼도 사용자는 이미 저장된 통계 추천을 그대로 받는다.
+- 큐 깊이/작업 지연/실패 수는 metrics(ml_refine.*)에 기록한다.
+
+환경 변수:
+- ML_REFINE_WORKERS   : 프로세스 수 (기본 1, 0이면 보정 비활성)
+- ML_REFINE_QUEUE_MAX : 대기+실행 중 작업 상한 (기본 64)
+"""
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 작업 프로세스 안에서 재사용하는 PredictionService (피처/모델/확률표 캐시 유지)
+_worker_service = None
+
+
+def _run_refine_job(user_key: str, num_sets: int, date_str: str) -> float:
+    """작업 프로세스에서 실행: ML 보정 결과를 일일 저장 파일에 기록하고 소요 초를 반환"""
+    global _worker_service
+    if _worker_service is None:
+        from .prediction_service import PredictionService
+        _worker_service = PredictionService()
+    started = time.perf_counter()
+    _worker_service.refine_daily_prediction(user_key, num_sets, date_str)
+    return time.perf_counter() - started
+
+
+def _get_env_int(name: str, default_value: int) -> int:
+    try:
+        return int(os.getenv(name, str(default_value)))
+    except Exception:
+        return default_value
+
+
+class RefineExecutor:
+    """중복 제거와 상한이 있는 ML 보정 프로세스 풀 (풀은 첫 제출 시 생성)"""
+
+    def __init__(self, workers: Optional[int] = None, queue_max: Optional[int] = None):
+        self.workers = max(0, _get_env_int('ML_REFINE_WORKERS', 1) if workers is None else workers)
+        self.queue_max = max(1, _get_env_int('ML_REFINE_QUEUE_MAX', 64) if queue_max is None else queue_max)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # API 프로세스는 스레드를 쓰므로 fork 대신 spawn
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+            logger.info(f"ML 보정 프로세스 풀 시작: workers={self.workers}, queue_max={self.queue_max}")
+        return self._pool
+
+    def submit(self, job_key: str, user_key: str, num_sets: int, date_str: str) -> str:
+        """작업 제출 → 'queued' | 'duplicate' | 'rejected' | 'disabled'"""
+        if not self.enabled:
+            return 'disabled'
+        with self._lock:
+            if job_key in self._inflight:
+                metrics.incr('ml_refine.deduped')
+                return 'duplicate'
+            if len(self._inflight) >= self.queue_max:
+                metrics.incr('ml_refine.rejected')
+                logger.warning(f"ML 보정 대기열 가득 참({self.queue_max}), 작업 거절: {job_key}")
+                return 'rejected'
+            pool = self._get_pool()
+            try:
+                future = pool.submit(_run_refine_job, user_key, num_sets, date_str)
+            except (BrokenProcessPool, RuntimeError) as e:
+                logger.error(f"ML 보정 작업 제출 실패: {job_key}: {e}")
+                failed = pool
+                metrics.incr('ml_refine.failed')
+            else:
+                failed = None
+                self._inflight[job_key] = time.perf_counter()
+                metrics.incr('ml_refine.submitted')
+                metrics.set_gauge('ml_refine.queue_depth', len(self._inflight))
+        if failed is not None:
+            self._discard_pool(failed)
+            return 'rejected'
+        future.add_done_callback(lambda f, key=job_key, pool=pool: self._on_done(key, f, pool))
+        return 'queued'
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """작업 프로세스가 죽은 풀을 정리하고 버린다 (다음 제출 때 새로 만듦)
+
+        관리 스레드와 살아남은 작업 프로세스가 남지 않도록 shutdown한다. 잠금 밖에서 호출해야 한다.
+        """
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, job_key: str, future: Future, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            submitted_at = self._inflight.pop(job_key, None)
+            metrics.set_gauge('ml_refine.queue_depth', len(self._inflight))
+        if submitted_at is not None:
+            # 대기 시간을 포함한 제출→완료 지연
+            metrics.observe('ml_refine.job_latency', time.perf_counter() - submitted_at)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            metrics.incr('ml_refine.failed')
+            logger.error(f"ML 보정 작업 실패: {job_key}: {error}")
+            if isinstance(error, BrokenProcessPool):
+                self._discard_pool(pool)
+            return
+        metrics.incr('ml_refine.completed')
+        metrics.observe('ml_refine.job_run', future.result())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_max': self.queue_max,
+                'queue_depth': len(self._inflight),
+                'pool_started': self._pool is not None,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
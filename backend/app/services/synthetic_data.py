@@ -0,0 +1,106 @@
+"""
+대용량 합성 회차 데이터 생성기 (규모 테스트용)
+
+실제 데이터(~1200회차)보다 훨씬 긴 이력(1만~1000만 회차)에서 분석/예측 서비스의
+확장성을 확인하기 위해 사용한다. 회차 루프 없이 NumPy로 청크 단위 일괄 생성한다.
+
+- 번호: 행마다 45개 균등 난수 키의 argpartition → 가장 작은 6개 = 당첨 번호(정렬),
+  7번째 = 보너스 번호 (비복원 균등 추출과 동일 분포, 보너스는 당첨 번호와 겹치지 않음)
+- 날짜: 1회차 2002-12-07부터 7일 간격 (with_dates=False면 NaT)
+- 판매액/1등 당첨금/당첨자 수: 기존 샘플 데이터와 같은 범위의 균등 정수 (선택)
+- 같은 seed면 같은 결과 (청크 크기는 고정값이라 결과에 영향 없음)
+"""
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .draw_store import NUMBER_COLUMNS, write_draw_store, store_dir_for
+
+logger = logging.getLogger(__name__)
+
+NUM_BALLS = 45
+FIRST_DRAW_DATE = np.datetime64('2002-12-07', 'D')
+# CSV/pandas 날짜로 왕복 가능한 마지막 날짜
+MAX_DRAW_DATE = np.datetime64('9999-12-31', 'D')
+
+# 결과 재현성을 위해 고정 (float32 키 기준 청크당 약 47MB)
+_CHUNK_SIZE = 1 << 18
+
+SUPPORTED_FORMATS = ('csv', 'store')
+
+
+def generate_number_arrays(n_draws: int, seed: Optional[int] = None):
+    """(N×6 uint8 정렬 당첨 번호, N uint8 보너스 번호) 생성"""
+    if n_draws < 0:
+        raise ValueError("n_draws는 0 이상이어야 합니다.")
+    rng = np.random.default_rng(seed)
+    numbers = np.empty((n_draws, 6), dtype=np.uint8)
+    bonus = np.empty(n_draws, dtype=np.uint8)
+    for start in range(0, n_draws, _CHUNK_SIZE):
+        stop = min(start + _CHUNK_SIZE, n_draws)
+        keys = rng.random((stop - start, NUM_BALLS), dtype=np.float32)
+        # 앞 7개(순서 무관) = 키가 가장 작은 7개 번호, 인덱스 6 = 그중 7번째로 작은 키
+        picked = np.argpartition(keys, 6, axis=1)[:, :7]
+        numbers[start:stop] = np.sort(picked[:, :6], axis=1) + 1
+        bonus[start:stop] = picked[:, 6] + 1
+    return numbers, bonus
+
+
+def generate_synthetic_draws(n_draws: int, seed: Optional[int] = None, start_draw: int = 1,
+                             with_dates: bool = True, with_sales: bool = True) -> pd.DataFrame:
+    """lotto_data.csv와 같은 컬럼 구성의 합성 회차 DataFrame 생성
+
+    with_dates=False면 draw_date는 NaT로 채운다(컬럼은 유지).
+    날짜가 9999-12-31을 넘는 규모(약 41만 회차 초과)는 with_dates=False로 생성해야 한다.
+    """
+    numbers, bonus = generate_number_arrays(n_draws, seed)
+    draw_numbers = np.arange(start_draw, start_draw + n_draws, dtype=np.int64)
+
+    if with_dates:
+        dates = FIRST_DRAW_DATE + (draw_numbers - 1) * np.timedelta64(7, 'D')
+        if n_draws and dates[-1] > MAX_DRAW_DATE:
+            raise ValueError(f"{int(draw_numbers[-1])}회차 날짜가 표현 가능 범위를 넘습니다. with_dates=False를 사용하세요.")
+    else:
+        dates = np.full(n_draws, np.datetime64('NaT'), dtype='datetime64[D]')
+
+    data = {
+        'draw_number': draw_numbers,
+        'draw_date': dates.astype('datetime64[s]'),
+    }
+    for i, col in enumerate(NUMBER_COLUMNS):
+        data[col] = numbers[:, i].astype(np.int64)
+    data['bonus_number'] = bonus.astype(np.int64)
+
+    if with_sales:
+        # 번호 스트림과 분리된 난수열을 써서 with_sales 여부가 번호에 영향을 주지 않게 한다
+        sales_rng = np.random.default_rng(None if seed is None else [seed, 1])
+        data['total_sales'] = sales_rng.integers(100000000000, 200000000000, size=n_draws, endpoint=True)
+        data['first_prize_amount'] = sales_rng.integers(1000000000, 3000000000, size=n_draws, endpoint=True)
+        data['first_prize_winners'] = sales_rng.integers(1, 20, size=n_draws, endpoint=True)
+
+    return pd.DataFrame(data)
+
+
+def write_synthetic_dataset(df: pd.DataFrame, csv_path: str, fmt: str = 'csv') -> str:
+    """합성 데이터를 지정 포맷으로 기록하고 기록 위치를 반환
+
+    - csv   : DataService.save_data (CSV + 매니페스트 + 컬럼형 저장소, load_data로 바로 사용)
+    - store : 컬럼형 저장소만 (CSV 없이 draw_store.load_draw_arrays로 직접 로드)
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"지원하지 않는 포맷: {fmt} (지원: {', '.join(SUPPORTED_FORMATS)})")
+
+    if fmt == 'store':
+        store_dir = store_dir_for(csv_path)
+        # 원본 CSV가 없으므로 파일 버전은 0으로 기록 (csv_stat 없이 로드)
+        if not write_draw_store(df, store_dir, (0, 0, 0)):
+            raise ValueError("컬럼형 저장소 기록 실패")
+        logger.info(f"합성 데이터 {len(df)}회차를 {store_dir}에 저장")
+        return store_dir
+
+    from .data_service import DataService
+    ds = DataService()
+    ds.data_file = csv_path
+    return ds.save_data(df)
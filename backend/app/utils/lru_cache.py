@@ -0,0 +1,89 @@
+"""
+크기 예산이 있는 LRU 캐시
+
+항목마다 추정 바이트 수를 기록하고, 합계가 max_bytes를 넘으면 가장 오래 쓰지 않은 항목부터 비운다.
+방금 넣은 항목은 예산보다 커도 남겨 둔다(매 요청 재계산 방지).
+적중/미스/축출 횟수는 인스턴스 속성과 메트릭(cache.<name>.hits 등) 양쪽에 기록한다.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from . import metrics
+
+_MISSING = object()
+
+
+class SizedLRUCache:
+    """{키: 값} LRU 캐시 (스레드 안전, 바이트 예산 기준 축출)"""
+
+    def __init__(self, name: str, max_bytes: int, sizeof: Optional[Callable[[Any], int]] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda _value: 0)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                metrics.incr(f'cache.{self.name}.misses')
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+        metrics.incr(f'cache.{self.name}.hits')
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: Optional[int] = None) -> None:
+        size = int(self._sizeof(value) if nbytes is None else nbytes)
+        evicted = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self.total_bytes -= old_size
+                evicted += 1
+            self.evictions += evicted
+            metrics.set_gauge(f'cache.{self.name}.bytes', self.total_bytes)
+        if evicted:
+            metrics.incr(f'cache.{self.name}.evictions', evicted)
+
+    def get_or_compute(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """캐시된 값 반환, 없으면 build() 결과를 저장 후 반환"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
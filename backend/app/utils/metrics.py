@@ -0,0 +1,55 @@
+"""
+프로세스 내 간단한 메트릭 레지스트리
+
+- 타이머: observe(name, seconds) → 횟수/합계/최대/최근 값
+- 카운터: incr(name, value)
+- 게이지: set_gauge(name, value)
+snapshot()은 /api/debug/metrics 응답에 그대로 사용한다. 워커 프로세스별 값이다.
+"""
+import threading
+from typing import Any, Dict
+
+_lock = threading.Lock()
+_timings: Dict[str, Dict[str, float]] = {}
+_counters: Dict[str, int] = {}
+_gauges: Dict[str, float] = {}
+
+
+def observe(name: str, seconds: float) -> None:
+    """소요 시간(초) 기록"""
+    with _lock:
+        t = _timings.get(name)
+        if t is None:
+            t = _timings[name] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0}
+        ms = seconds * 1000.0
+        t['count'] += 1
+        t['total_ms'] += ms
+        t['max_ms'] = max(t['max_ms'], ms)
+        t['last_ms'] = ms
+
+
+def incr(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def snapshot() -> Dict[str, Any]:
+    """현재 메트릭 사본 (타이머에는 평균 avg_ms 포함)"""
+    with _lock:
+        timings = {
+            name: {**t, 'avg_ms': t['total_ms'] / t['count'] if t['count'] else 0.0}
+            for name, t in _timings.items()
+        }
+        return {'timings': timings, 'counters': dict(_counters), 'gauges': dict(_gauges)}
+
+
+def reset() -> None:
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        _gauges.clear()
@@ -13,6 +13,7 @@ from backend.app.routes.static import router as static_router
 from backend.app.db.session import engine
 from backend.app.db.models import Base
 from backend.app.routes import api as api_module
+from backend.app.services.draw_refresher import DrawRefresher
 
 # 로깅 설정
 logging.basicConfig(
@@ -22,6 +23,16 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def _prewarm_after_ingest(df):
+    """새 회차 반영 직후 분석/예측 캐시를 미리 채워 첫 요청 지연을 없앤다."""
+    ds = api_module.data_service
+    # 버전 키가 붙은 캐시 프레임 기준으로 워밍업
+    df = ds.load_data()
+    ds.get_draw_matrix(df)
+    api_module.get_comprehensive_body()
+    api_module.prediction_service.prewarm(df)
+    logger.info("새 회차 캐시 워밍업 완료")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """애플리케이션 생명주기 관리"""
@@ -42,14 +53,32 @@ async def lifespan(app: FastAPI):
             ds = api_module.data_service
             ps = api_module.prediction_service
             df = ds.load_data()
+            # 위치별 확률표를 먼저 만들어 요청 경로가 sklearn/모델 로드 없이 응답하게 한다
+            ps.prewarm(df)
             ps.warmup_today_models(df)
             logger.info("ML 워밍업 완료")
         except Exception as e:
             logger.error(f"ML 워밍업 실패(무시 가능): {e}")
     else:
         logger.info("ML 워밍업 스킵 - 첫 요청 시 지연 발생 가능")
+    # 추첨 일정 기반 인앱 갱신기 (워커 중 1개만 리더로 동작)
+    refresher = None
+    if os.getenv("ENABLE_DRAW_REFRESHER", "false").strip().lower() in ("1","true","yes","y","on"):
+        try:
+            refresher = DrawRefresher(api_module.data_service)
+            refresher.add_warmup(_prewarm_after_ingest)
+            refresher.start()
+            logger.info("데이터 갱신기 시작")
+        except Exception as e:
+            logger.error(f"데이터 갱신기 시작 실패(무시 가능): {e}")
     yield
     # 종료 시 실행
+    if refresher is not None:
+        refresher.stop()
+    try:
+        api_module.prediction_service.shutdown_refiner()
+    except Exception as e:
+        logger.error(f"ML 보정 프로세스 풀 종료 실패(무시 가능): {e}")
     logger.info("로또 분석 서비스가 종료되었습니다.")
 
 # FastAPI 앱 생성
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+데이터 추가 저장(append_data) 테스트 스크립트
+
+저장소 루트에서 실행: python -m pytest backend/test_data_append.py  또는  python backend/test_data_append.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from backend.app.services.data_service import DataService
+from backend.app.services.draw_store import store_dir_for, load_draw_arrays
+
+
+def make_service(tmpdir):
+    """임시 디렉터리의 CSV를 쓰는 DataService (샘플 100회차 저장)"""
+    ds = DataService()
+    ds.data_file = os.path.join(tmpdir, 'lotto_data.csv')
+    ds.save_data(ds._generate_sample_data(100, seed=1))
+    return ds
+
+
+def new_draws(ds, start, count):
+    """start회차부터 count개 회차 (샘플 데이터의 회차 번호만 바꿈)"""
+    df = ds._generate_sample_data(count, seed=start).copy()
+    df['draw_number'] = range(start, start + count)
+    return df
+
+
+def test_append_twice_same_rows():
+    """같은 스냅샷/같은 행으로 두 번 추가해도 회차가 중복되지 않음"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ds = make_service(tmpdir)
+        existing = ds.load_data()
+        new = new_draws(ds, 101, 1)
+
+        ds.append_data(existing, new)
+        ds.append_data(existing, new)
+
+        csv = pd.read_csv(ds.data_file)
+        assert len(csv) == 101
+        assert not csv['draw_number'].duplicated().any()
+
+        manifest = ds._read_manifest(ds.data_file)
+        assert manifest['rows'] == 101
+        assert manifest['last_draw'] == 101
+
+        arrays = load_draw_arrays(store_dir_for(ds.data_file), csv_stat=ds._file_stat_key(ds.data_file))
+        assert arrays is not None
+        assert len(arrays['draw_number']) == 101
+        assert len(ds.load_data()) == 101
+
+
+def test_append_stale_snapshot_keeps_new_rows_only():
+    """오래된 스냅샷 기준 호출은 이미 저장된 회차를 건너뛰고 나머지만 추가"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ds = make_service(tmpdir)
+        stale = ds.load_data()
+
+        ds.append_data(stale, new_draws(ds, 101, 2))
+        merged = ds.append_data(stale, new_draws(ds, 101, 3))
+
+        csv = pd.read_csv(ds.data_file)
+        assert list(csv['draw_number'].tail(3)) == [101, 102, 103]
+        assert not csv['draw_number'].duplicated().any()
+        assert len(merged) == len(csv) == 103
+        assert ds._read_manifest(ds.data_file)['rows'] == 103
+
+
+def main():
+    print("🧪 append_data 테스트")
+    print("=" * 50)
+    for test in (test_append_twice_same_rows, test_append_stale_snapshot_keeps_new_rows_only):
+        test()
+        print(f"✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
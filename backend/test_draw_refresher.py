@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+데이터 갱신기(DrawRefresher)와 /data/update 동시 실행 테스트 스크립트
+
+저장소 루트에서 실행: python -m pytest backend/test_draw_refresher.py  또는  python backend/test_draw_refresher.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from backend.app.services.data_service import DataService
+from backend.app.services.draw_refresher import DrawRefresher
+
+
+def test_refresher_and_route_ingest_once():
+    """갱신기 틱과 라우트의 update_latest_data가 겹쳐도 새 회차는 한 번만 수집/추가"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ds = DataService()
+        ds.data_file = os.path.join(tmpdir, 'lotto_data.csv')
+        ds.save_data(ds._generate_sample_data(100, seed=1))
+
+        collect_calls = []
+
+        def fake_collect(start_draw, end_draw, *args, **kwargs):
+            collect_calls.append((start_draw, end_draw))
+            time.sleep(0.3)  # 네트워크 수집 동안 다른 호출이 끼어들 여지를 둠
+            df = ds._generate_sample_data(end_draw - start_draw + 1, seed=start_draw).copy()
+            df['draw_number'] = range(start_draw, end_draw + 1)
+            return df
+
+        ds._get_latest_draw_number = lambda now=None: 102
+        ds.collect_lotto_data = fake_collect
+
+        # 갱신기 스레드가 update_latest_data를 한 번 마치면 알림
+        refresher_ticked = threading.Event()
+        update_latest_data = ds.update_latest_data
+
+        def traced_update():
+            df = update_latest_data()
+            if threading.current_thread().name == 'draw-refresher':
+                refresher_ticked.set()
+            return df
+
+        ds.update_latest_data = traced_update
+
+        refresher = DrawRefresher(ds, lock_path=os.path.join(tmpdir, '.draw_refresher.lock'),
+                                  delay_minutes=0, initial_backoff=60, leader_retry_seconds=60)
+        # 라우트 핸들러가 스레드풀에서 호출하는 것과 같은 경로
+        route = threading.Thread(target=ds.update_latest_data)
+        refresher.start()
+        route.start()
+        try:
+            route.join(timeout=30)
+            assert refresher_ticked.wait(timeout=30)
+        finally:
+            refresher.stop()
+            refresher._thread.join(timeout=30)
+
+        csv = pd.read_csv(ds.data_file)
+        assert len(collect_calls) == 1
+        assert len(csv) == 102
+        assert not csv['draw_number'].duplicated().any()
+        assert ds._read_manifest(ds.data_file)['rows'] == 102
+        assert len(ds.load_data()) == 102
+
+
+def main():
+    print("🧪 갱신기/라우트 동시 갱신 테스트")
+    print("=" * 50)
+    test_refresher_and_route_ingest_once()
+    print("✅ test_refresher_and_route_ingest_once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Precompute the per-position probability table used by ML predictions.
+
+Loads the current dataset and the position classifiers in models/, evaluates
+predict_proba once on the latest feature row, and writes
+models/position_proba_table.npz (6x45 probabilities + per-position top-k).
+The web worker then serves ML predictions from this array without importing
+sklearn or unpickling models. Re-run after training new models; ingest
+warmup rebuilds it automatically when new draws arrive.
+
+Usage:
+  python scripts/build_proba_table.py
+  python scripts/build_proba_table.py --data /tmp/synthetic/lotto_data.csv
+"""
+import argparse
+import logging
+import sys
+import time
+
+try:
+    from backend.app.services.data_service import DataService
+    from backend.app.services.prediction_service import PredictionService
+except Exception as e:
+    print("Run this from project root so imports resolve. Error:", e)
+    raise
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=None, help='lotto CSV path (default: DataService data file)')
+    args = parser.parse_args()
+
+    ds = DataService()
+    if args.data:
+        ds.data_file = args.data
+    df = ds.load_data()
+
+    ps = PredictionService()
+    t0 = time.perf_counter()
+    path = ps.build_proba_table(df)
+    if path is None:
+        logger.error("No position models found in models/. Train them first (scripts/train_classifiers.py).")
+        sys.exit(1)
+    logger.info(f"Wrote {path} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
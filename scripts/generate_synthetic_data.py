@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Generate a large synthetic lotto history for scale testing.
+
+Writes N random draws (uniform 6-of-45 + distinct bonus) in the same schema as
+backend/data/lotto_data.csv so AnalysisService/PredictionService can be timed
+on histories far longer than the real ~1200 draws.
+
+Usage:
+  python scripts/generate_synthetic_data.py --draws 100000 --seed 42 --output /tmp/synthetic/lotto_data.csv
+  python scripts/generate_synthetic_data.py --draws 10000000 --no-dates --format store --output /tmp/synthetic/lotto_data.csv
+
+Formats:
+  csv   - CSV + manifest + columnar store (DataService.load_data works directly)
+  store - columnar .npy store only (<output>_store/), fastest for very large N
+"""
+import argparse
+import logging
+import time
+
+try:
+    from backend.app.services.synthetic_data import (
+        SUPPORTED_FORMATS, generate_synthetic_draws, write_synthetic_dataset,
+    )
+except Exception as e:
+    print("Run this from project root so imports resolve. Error:", e)
+    raise
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--draws', type=int, default=100000, help='number of draws to generate')
+    parser.add_argument('--seed', type=int, default=None, help='random seed (same seed -> same data)')
+    parser.add_argument('--start-draw', type=int, default=1, help='first draw number')
+    parser.add_argument('--no-dates', action='store_true', help='leave draw_date empty (required above ~417k draws)')
+    parser.add_argument('--no-sales', action='store_true', help='omit sales/prize columns')
+    parser.add_argument('--format', choices=SUPPORTED_FORMATS, default='csv')
+    parser.add_argument('--output', required=True, help='CSV path (store format writes <output>_store/)')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    df = generate_synthetic_draws(args.draws, seed=args.seed, start_draw=args.start_draw,
+                                  with_dates=not args.no_dates, with_sales=not args.no_sales)
+    t1 = time.perf_counter()
+    logger.info(f"Generated {len(df)} draws in {t1 - t0:.2f}s")
+
+    path = write_synthetic_dataset(df, args.output, fmt=args.format)
+    logger.info(f"Wrote {args.format} to {path} in {time.perf_counter() - t1:.2f}s")
+
+
+if __name__ == '__main__':
+    main()